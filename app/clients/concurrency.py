@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any
+
+import httpx
+
+from app.core.config import settings
+from app.core.logger import set_log
+
+
+OVERLOAD_STATUS_CODES = (429, 503)
+# latency gradient: a short EWMA of recent samples against a long EWMA baseline
+_RECENT_LATENCY_ALPHA = 0.2
+_BASELINE_LATENCY_ALPHA = 0.02
+_LATENCY_WARMUP_SAMPLES = 10
+
+
+class LimiterPermit:
+    """
+    One slot of an `AdaptiveConcurrencyLimiter`, used as an async context manager.
+
+    The latency fed to the limiter must not grow with output length: streams
+    call `mark_latency()` at the first chunk (time to first token), other
+    calls report `record_output_tokens()` and are sampled per output token.
+    Calls with neither give no latency sample. Timeouts and 429/503
+    responses count as overload.
+    """
+
+    def __init__(self, limiter: AdaptiveConcurrencyLimiter, key: str):
+        self.limiter = limiter
+        self.key = key
+        self._started = 0.0
+        self._latency: float | None = None
+        self._output_tokens: int | None = None
+
+    def mark_latency(self) -> None:
+        if self._latency is None:
+            self._latency = time.monotonic() - self._started
+
+    def record_output_tokens(self, tokens: int | None) -> None:
+        if tokens:
+            self._output_tokens = int(tokens)
+
+    async def __aenter__(self) -> LimiterPermit:
+        await self.limiter._acquire()
+        self._started = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if isinstance(exc, httpx.TimeoutException):
+                self.limiter._on_overload(self.key, reason="timeout")
+            elif (
+                isinstance(exc, httpx.HTTPStatusError)
+                and exc.response.status_code in OVERLOAD_STATUS_CODES
+            ):
+                self.limiter._on_overload(
+                    self.key, reason=f"http_{exc.response.status_code}"
+                )
+            elif exc is None:
+                if self._latency is not None:
+                    self.limiter._on_success(f"{self.key}:ttft", self._latency)
+                elif self._output_tokens:
+                    per_token = (time.monotonic() - self._started) / self._output_tokens
+                    self.limiter._on_success(f"{self.key}:per_token", per_token)
+                else:
+                    self.limiter._on_success(self.key, None)
+        finally:
+            self.limiter._release()
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Process-wide concurrency limit that adapts to the backend (AIMD).
+
+    - additive increase (+1 per `limit` successes) while latency stays within
+      `latency_tolerance` x the per-key baseline and the limit is actually used
+    - gentle decrease when the recent latency (short EWMA) exceeds that
+      gradient over the baseline (long EWMA), so single slow calls and a
+      lucky fastest call do not move the limit
+    - multiplicative decrease on timeouts and 429/503, at most once per cooldown
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        latency_tolerance: float = 2.0,
+        backoff_ratio: float = 0.5,
+        overload_cooldown_s: float = 2.0,
+    ):
+        self.name = name
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self.overload_cooldown_s = overload_cooldown_s
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._in_flight = 0
+        self._last_overload = 0.0
+        self._recent_latency: dict[str, float] = {}
+        self._baseline_latency: dict[str, float] = {}
+        self._latency_samples: dict[str, int] = {}
+
+        self.successes = 0
+        self.overloads = 0
+
+    def slot(self, key: str = "default") -> LimiterPermit:
+        return LimiterPermit(self, key)
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _capacity(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    async def _acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._waiters = deque()
+            self._in_flight = 0
+
+        if self._in_flight < self._capacity() and not self._waiters:
+            self._in_flight += 1
+            return
+
+        future: asyncio.Future[None] = loop.create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # slot was handed over just before cancellation
+                self._release()
+            elif future in self._waiters:
+                self._waiters.remove(future)
+            raise
+
+    def _release(self) -> None:
+        self._in_flight = max(0, self._in_flight - 1)
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self._capacity():
+            future = self._waiters.popleft()
+            if future.done():
+                continue
+            self._in_flight += 1
+            future.set_result(None)
+
+    def _on_success(self, key: str, latency: float | None) -> None:
+        self.successes += 1
+        if latency is not None and latency > 0:
+            recent = self._recent_latency.get(key, latency)
+            baseline = self._baseline_latency.get(key, latency)
+            recent += (latency - recent) * _RECENT_LATENCY_ALPHA
+            baseline += (latency - baseline) * _BASELINE_LATENCY_ALPHA
+            self._recent_latency[key] = recent
+            self._baseline_latency[key] = baseline
+            samples = self._latency_samples.get(key, 0) + 1
+            self._latency_samples[key] = samples
+
+            if (
+                samples >= _LATENCY_WARMUP_SAMPLES
+                and recent > baseline * self.latency_tolerance
+            ):
+                self.limit = max(float(self.min_limit), self.limit * 0.95)
+                return
+
+        saturated = self._waiters or self._in_flight >= self._capacity()
+        if saturated:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self._wake()
+
+    def _on_overload(self, key: str, *, reason: str) -> None:
+        self.overloads += 1
+        now = time.monotonic()
+        if now - self._last_overload < self.overload_cooldown_s:
+            return
+        self._last_overload = now
+        previous = self.limit
+        self.limit = max(float(self.min_limit), self.limit * self.backoff_ratio)
+        set_log(
+            f"{self.name} limiter backing off ({reason}, key={key}): "
+            f"{previous:.1f} -> {self.limit:.1f}",
+            level="warning",
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "limit": self._capacity(),
+            "limit_exact": round(self.limit, 3),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "successes": self.successes,
+            "overloads": self.overloads,
+            "recent_latency_s": {
+                key: round(value, 4) for key, value in self._recent_latency.items()
+            },
+            "baseline_latency_s": {
+                key: round(value, 4) for key, value in self._baseline_latency.items()
+            },
+        }
+
+
+@lru_cache(maxsize=1)
+def get_vllm_limiter() -> AdaptiveConcurrencyLimiter:
+    return AdaptiveConcurrencyLimiter(
+        "vllm",
+        initial_limit=settings.vllm_concurrency_initial,
+        min_limit=settings.vllm_concurrency_min,
+        max_limit=settings.vllm_concurrency_max,
+        latency_tolerance=settings.vllm_latency_tolerance,
+    )
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+from functools import lru_cache
+from typing import Any
+
+import httpx
+
+from app.clients.embedding_client import EmbeddingClient, vectors_from_response
+from app.core.config import settings
+from app.core.logger import set_log
+
+
+class EmbeddingBatcher:
+    """
+    Async micro-batcher in front of `EmbeddingClient.embed_many`.
+
+    Concurrent single-text `embed()` calls (e.g. from different requests) are
+    merged into one backend call. A batch is sent when it reaches
+    `max_batch_size` or `max_wait_ms` after its first item, whichever first.
+    When a batch is rejected for its input, its items are re-sent one by one
+    so only the caller with the bad text gets the error.
+    """
+
+    def __init__(
+        self,
+        embedding_client: EmbeddingClient,
+        *,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        self.embedding_client = embedding_client
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pending: list[tuple[str, asyncio.Future[list[float]]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.items = 0
+        self.split_batches = 0
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A new event loop (scripts, tests, worker restarts): drop state
+            # that belongs to the old loop.
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+            self._tasks = set()
+        return loop
+
+    async def embed(self, text: str) -> list[float]:
+        loop = self._bind_loop()
+        future: asyncio.Future[list[float]] = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_s, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[: self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size :]
+            # skip callers that were cancelled while waiting
+            batch = [(text, fut) for text, fut in batch if not fut.done()]
+            if not batch:
+                continue
+            task = asyncio.ensure_future(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(
+        self, batch: list[tuple[str, asyncio.Future[list[float]]]], *, split: bool = True
+    ) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            response = await self.embedding_client.embed_many(
+                inputs=[text for text, _ in batch]
+            )
+            vectors = vectors_from_response(response, len(batch))
+        except Exception as exc:
+            set_log(
+                f"EmbeddingBatcher batch of {len(batch)} failed: {type(exc).__name__}: {exc}",
+                level="error",
+            )
+            if split and len(batch) > 1 and _is_input_error(exc):
+                # one bad text must not fail every caller coalesced with it
+                self.split_batches += 1
+                await asyncio.gather(
+                    *(self._send([item], split=False) for item in batch)
+                )
+                return
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_s * 1000.0,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": (self.items / self.batches) if self.batches else 0.0,
+            "split_batches": self.split_batches,
+            "pending": len(self._pending),
+        }
+
+
+def _is_input_error(exc: Exception) -> bool:
+    # backend outages (timeouts, 5xx, 429) would only fail again per item
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return 400 <= status < 500 and status != 429
+    return isinstance(exc, ValueError)
+
+
+@lru_cache(maxsize=1)
+def get_embedding_batcher() -> EmbeddingBatcher:
+    return EmbeddingBatcher(
+        EmbeddingClient(port=""),
+        max_batch_size=settings.embedding_batch_max_size,
+        max_wait_ms=settings.embedding_batch_max_wait_ms,
+    )
@@ -1,8 +1,16 @@
 from __future__ import annotations
 from typing import Any, Optional
 import httpx
+from app.clients.http_pool import get_http_pool
+from app.clients.resilience import (
+    call_with_breaker,
+    get_circuit_breaker,
+    retry_async,
+    retry_sync,
+)
 from app.core.config import settings
 from app.core.logger import set_log
+from app.enums.common import HttpBackend
 
 
 class EmbeddingClient:
@@ -13,6 +21,7 @@ class EmbeddingClient:
         model_name: str | None = None,
         api_key: str | None = None,
         timeout_s: float = 60.0,
+        http_client: httpx.AsyncClient | None = None,
     ):
         self.base_url = (base_url or settings.embedding_base_url).rstrip("/")
         self.port = port
@@ -25,11 +34,36 @@ class EmbeddingClient:
             else f"{self.base_url}/v1/embeddings"
         )
         self.timeout = httpx.Timeout(timeout_s)
+        self._http_client = http_client
+        self._breaker = get_circuit_breaker(self.chat_url)
 
         set_log(
             f"EmbeddingClient initialized with base_url={self.base_url}, port={self.port}, model={self.model}"
         )
 
+    def _client(self, client: httpx.AsyncClient | None) -> httpx.AsyncClient:
+        return client or self._http_client or get_http_pool().get(HttpBackend.EMBEDDING)
+
+    async def _post(
+        self, client: httpx.AsyncClient | None, payload: dict[str, Any]
+    ) -> httpx.Response:
+        """POST with jittered retries and the endpoint's circuit breaker."""
+
+        async def attempt() -> httpx.Response:
+            response = await self._client(client).post(
+                self.chat_url,
+                json=payload,
+                headers=self._headers(),
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            return response
+
+        return await retry_async(
+            lambda: call_with_breaker(self._breaker, attempt),
+            description="EmbeddingClient request",
+        )
+
     def _headers(self) -> dict[str, str]:
         return {
             "Authorization": f"Bearer {self.api_key}",
@@ -38,7 +72,7 @@ class EmbeddingClient:
 
     async def embed(
         self,
-        client: httpx.AsyncClient,
+        client: httpx.AsyncClient | None = None,
         *,
         input: str,
         max_tokens: Optional[int] = None,
@@ -56,19 +90,42 @@ class EmbeddingClient:
             "input": input,
         }
 
-        response = await client.post(
-            self.chat_url,
-            json=payload,
-            headers=self._headers(),
-            timeout=self.timeout,
-        )
+        response = await self._post(client, payload)
         set_log(f"Response from EmbeddingClient.embed: {response.text[:30]}")
-        response.raise_for_status()
+        return response.json()
+
+    async def embed_many(
+        self,
+        client: httpx.AsyncClient | None = None,
+        *,
+        inputs: list[str],
+        extra: Optional[dict[str, Any]] = None,
+    ) -> dict[str, Any]:
+        """
+        Batched embed entrypoint. Sends all inputs in one /v1/embeddings call.
+        """
+        set_log(f"EmbeddingClient.embed_many called with {len(inputs)} inputs")
+
+        payload: dict[str, Any] = {
+            "model": self.model,
+            "input": list(inputs),
+        }
+        if extra:
+            payload.update(extra)
+
+        try:
+            response = await self._post(client, payload)
+        except httpx.HTTPStatusError as exc:
+            set_log(
+                f"EmbeddingClient.embed_many error response: {exc.response.status_code} - {exc.response.text[:500]}",
+                level="error",
+            )
+            raise
         return response.json()
 
     def embed_sync(
         self,
-        client: httpx.Client,
+        client: httpx.Client | None = None,
         *,
         input: str,
         max_tokens: Optional[int] = None,
@@ -83,12 +140,31 @@ class EmbeddingClient:
             "input": input,
         }
 
-        response = client.post(
-            self.chat_url,
-            json=payload,
-            headers=self._headers(),
-            timeout=self.timeout,
+        client = client or get_http_pool().get_sync(HttpBackend.EMBEDDING)
+
+        def attempt() -> httpx.Response:
+            response = client.post(
+                self.chat_url,
+                json=payload,
+                headers=self._headers(),
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            return response
+
+        response = retry_sync(
+            attempt, description="EmbeddingClient sync request", breaker=self._breaker
         )
         set_log(f"Response from EmbeddingClient.embed_sync: {response.text[:30]}")
-        response.raise_for_status()
         return response.json()
+
+
+def vectors_from_response(response: dict[str, Any], count: int) -> list[list[float]]:
+    """Return embeddings ordered by input position (`data[].index`)."""
+    data = response.get("data") or []
+    vectors: list[list[float]] = [[] for _ in range(count)]
+    for position, item in enumerate(data):
+        index = item.get("index", position)
+        if isinstance(index, int) and 0 <= index < count:
+            vectors[index] = item.get("embedding") or []
+    return vectors
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import importlib.util
+from collections import Counter
+from functools import lru_cache
+from typing import Any
+
+import httpx
+
+from app.core.config import settings
+from app.core.logger import set_log
+from app.enums.common import HttpBackend
+
+
+class _BackendStats:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.responses = 0
+        self.status_counts: Counter[int] = Counter()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "responses": self.responses,
+            "in_flight": self.requests - self.responses,
+            "status_counts": {str(k): v for k, v in sorted(self.status_counts.items())},
+        }
+
+
+def _pool_connections(client: httpx.AsyncClient | httpx.Client) -> dict[str, int]:
+    # httpcore does not expose pool state publicly, so read it defensively.
+    try:
+        connections = list(client._transport._pool.connections)  # type: ignore[attr-defined]
+    except Exception:
+        return {}
+
+    idle = sum(1 for conn in connections if conn.is_idle())
+    http2 = 0
+    for conn in connections:
+        try:
+            if "HTTP/2" in conn.info():
+                http2 += 1
+        except Exception:
+            continue
+
+    return {
+        "connections": len(connections),
+        "idle_connections": idle,
+        "active_connections": len(connections) - idle,
+        "http2_connections": http2,
+    }
+
+
+class HttpClientPool:
+    """
+    Process-wide pooled httpx clients, one per backend.
+
+    Opened/closed by the FastAPI lifespan hook. Outside of the app (scripts,
+    workers) clients are created lazily on first use.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry_s: float,
+        http2: bool = False,
+        timeout_s: float = 300.0,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_s,
+        )
+        self.timeout = httpx.Timeout(timeout_s)
+
+        self.http2 = http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            set_log(
+                "HTTP_HTTP2 is enabled but the `h2` package is not installed, falling back to HTTP/1.1",
+                level="warning",
+            )
+            self.http2 = False
+
+        self._clients: dict[HttpBackend, httpx.AsyncClient] = {}
+        self._sync_clients: dict[HttpBackend, httpx.Client] = {}
+        self._stats: dict[HttpBackend, _BackendStats] = {}
+
+    def _hooks(self, backend: HttpBackend, *, is_async: bool) -> dict[str, list]:
+        stats = self._stats.setdefault(backend, _BackendStats())
+
+        def on_request(request: httpx.Request) -> None:
+            stats.requests += 1
+
+        def on_response(response: httpx.Response) -> None:
+            stats.responses += 1
+            stats.status_counts[response.status_code] += 1
+
+        if not is_async:
+            return {"request": [on_request], "response": [on_response]}
+
+        async def on_request_async(request: httpx.Request) -> None:
+            on_request(request)
+
+        async def on_response_async(response: httpx.Response) -> None:
+            on_response(response)
+
+        return {"request": [on_request_async], "response": [on_response_async]}
+
+    def open(self) -> None:
+        for backend in HttpBackend:
+            self.get(backend)
+        set_log(
+            f"HttpClientPool opened: limits={self.limits}, http2={self.http2}"
+        )
+
+    def get(self, backend: HttpBackend) -> httpx.AsyncClient:
+        client = self._clients.get(backend)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+                trust_env=False,
+                event_hooks=self._hooks(backend, is_async=True),
+            )
+            self._clients[backend] = client
+        return client
+
+    def get_sync(self, backend: HttpBackend) -> httpx.Client:
+        client = self._sync_clients.get(backend)
+        if client is None or client.is_closed:
+            client = httpx.Client(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+                trust_env=False,
+                event_hooks=self._hooks(backend, is_async=False),
+            )
+            self._sync_clients[backend] = client
+        return client
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        for client in self._sync_clients.values():
+            client.close()
+        self._clients.clear()
+        self._sync_clients.clear()
+        set_log("HttpClientPool closed")
+
+    def stats(self) -> dict[str, Any]:
+        result: dict[str, Any] = {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry_s": self.limits.keepalive_expiry,
+            "backends": {},
+        }
+        for backend in HttpBackend:
+            stats = self._stats.get(backend)
+            entry: dict[str, Any] = stats.snapshot() if stats else {}
+            client = self._clients.get(backend)
+            if client is not None and not client.is_closed:
+                entry["async_pool"] = _pool_connections(client)
+            sync_client = self._sync_clients.get(backend)
+            if sync_client is not None and not sync_client.is_closed:
+                entry["sync_pool"] = _pool_connections(sync_client)
+            result["backends"][backend.value] = entry
+        return result
+
+
+@lru_cache(maxsize=1)
+def get_http_pool() -> HttpClientPool:
+    return HttpClientPool(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry_s=settings.http_keepalive_expiry_s,
+        http2=settings.http_http2,
+    )
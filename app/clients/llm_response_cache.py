@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.utils.cache import TieredCache, make_cache_key, sha256_text
+
+
+def compute_prompt_hash(
+    *,
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    image_b64: Optional[str] = None,
+    image_mime: Optional[str] = None,
+    temperature: float = 0.2,
+    max_tokens: Optional[int] = None,
+    extra: Optional[dict[str, Any]] = None,
+) -> str:
+    """
+    Deterministic hash of everything that determines an LLM response.
+
+    Used as the response cache key and as `agents_logs.prompt_hash`.
+    """
+    image_hash = sha256_text(image_b64) if image_b64 else None
+    return make_cache_key(
+        model,
+        system_prompt,
+        user_prompt,
+        image_hash,
+        image_mime if image_b64 else None,
+        {
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "extra": extra or {},
+        },
+    )
+
+
+@lru_cache(maxsize=1)
+def get_llm_response_cache() -> TieredCache:
+    persistent_path = (
+        Path(settings.cache_dir) / "llm_responses.sqlite3"
+        if settings.llm_cache_persistent
+        else None
+    )
+    return TieredCache(
+        "llm_response",
+        max_entries=settings.llm_cache_max_entries,
+        persistent_path=persistent_path,
+        max_persistent_bytes=int(settings.llm_cache_max_mb * 1024 * 1024),
+    )
+
+
+def replay_stream_chunks(deltas: list[str]) -> list[dict[str, Any]]:
+    """Rebuild OpenAI-style stream chunks from cached delta contents."""
+    return [
+        {"choices": [{"index": 0, "delta": {"content": delta}}]} for delta in deltas
+    ]
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Iterable
+
+import httpx
+
+from app.clients.resilience import CircuitBreaker, get_circuit_breaker
+from app.core.config import settings
+from app.core.logger import set_log
+
+
+class Replica:
+    """One vLLM server (OpenAI-compatible), addressed by its base url."""
+
+    def __init__(self, base_url: str, *, weight: float = 1.0):
+        self.base_url = base_url.rstrip("/")
+        self.weight = weight if weight > 0 else 1.0
+        self.chat_url = f"{self.base_url}/v1/chat/completions"
+        self.health_url = f"{self.base_url}/health"
+        self.models_url = f"{self.base_url}/v1/models"
+        self.breaker: CircuitBreaker = get_circuit_breaker(self.chat_url)
+
+        self.outstanding = 0
+        self.requests = 0
+        self.healthy = True
+        self.health_failures = 0
+        self.ejected_until = 0.0
+
+    def available(self, now: float) -> bool:
+        return (
+            self.healthy
+            and now >= self.ejected_until
+            and not self.breaker.is_open()
+        )
+
+    def load(self) -> float:
+        return (self.outstanding + 1) / self.weight
+
+    def stats(self, now: float | None = None) -> dict[str, Any]:
+        now = time.monotonic() if now is None else now
+        return {
+            "base_url": self.base_url,
+            "weight": self.weight,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "healthy": self.healthy,
+            "ejected_for_s": round(max(0.0, self.ejected_until - now), 1),
+            "available": self.available(now),
+            "circuit": self.breaker.state,
+        }
+
+
+class ReplicaPool:
+    """
+    Weighted least-outstanding-requests routing over vLLM replicas.
+
+    A replica is skipped while it is ejected (manually), failing health
+    checks, or its circuit breaker is open. When nothing is available the
+    least loaded replica is used anyway so the caller gets a real error.
+    """
+
+    def __init__(self, replicas: Iterable[Replica]):
+        self.replicas = list(replicas)
+        if not self.replicas:
+            raise ValueError("ReplicaPool needs at least one replica")
+        self._health_task: asyncio.Task[None] | None = None
+
+    @property
+    def primary(self) -> Replica:
+        return self.replicas[0]
+
+    def get(self, base_url: str) -> Replica:
+        base_url = base_url.rstrip("/")
+        for replica in self.replicas:
+            if replica.base_url == base_url:
+                return replica
+        raise ValueError(f"Unknown vLLM replica: {base_url}")
+
+    def pick(self, exclude: Iterable[str] = ()) -> Replica:
+        if len(self.replicas) == 1:
+            return self.replicas[0]
+        now = time.monotonic()
+        excluded = set(exclude)
+        available = [r for r in self.replicas if r.available(now)]
+        candidates = [r for r in available if r.base_url not in excluded]
+        candidates = candidates or available or self.replicas
+        # random tie-break so equal replicas share load evenly
+        return min(candidates, key=lambda r: (r.load(), random.random()))
+
+    @asynccontextmanager
+    async def lease(self, exclude: Iterable[str] = ()) -> AsyncIterator[Replica]:
+        """Pick a replica and count the request as outstanding until exit."""
+        replica = self.pick(exclude)
+        replica.outstanding += 1
+        replica.requests += 1
+        try:
+            yield replica
+        finally:
+            replica.outstanding = max(0, replica.outstanding - 1)
+
+    def eject(self, base_url: str, duration_s: float) -> Replica:
+        replica = self.get(base_url)
+        replica.ejected_until = time.monotonic() + max(0.0, duration_s)
+        set_log(f"vLLM replica {replica.base_url} ejected for {duration_s:.0f}s")
+        return replica
+
+    def restore(self, base_url: str) -> Replica:
+        replica = self.get(base_url)
+        replica.ejected_until = 0.0
+        set_log(f"vLLM replica {replica.base_url} restored")
+        return replica
+
+    async def check_health(self, client: httpx.AsyncClient) -> None:
+        async def check(replica: Replica) -> None:
+            try:
+                response = await client.get(
+                    replica.health_url,
+                    timeout=settings.vllm_health_check_timeout_s,
+                )
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+
+            if ok:
+                if not replica.healthy:
+                    set_log(f"vLLM replica {replica.base_url} is healthy again")
+                replica.healthy = True
+                replica.health_failures = 0
+                return
+
+            replica.health_failures += 1
+            if (
+                replica.healthy
+                and replica.health_failures >= settings.vllm_health_failure_threshold
+            ):
+                replica.healthy = False
+                set_log(
+                    f"vLLM replica {replica.base_url} failed {replica.health_failures} health checks",
+                    level="warning",
+                )
+
+        await asyncio.gather(*(check(replica) for replica in self.replicas))
+
+    async def fetch_max_model_len(
+        self, client: httpx.AsyncClient, model: str
+    ) -> int | None:
+        """Smallest `max_model_len` the replicas report for `model` in /v1/models."""
+        lengths: list[int] = []
+        for replica in self.replicas:
+            try:
+                response = await client.get(
+                    replica.models_url,
+                    timeout=settings.vllm_health_check_timeout_s,
+                )
+                response.raise_for_status()
+                models = response.json().get("data") or []
+            except (httpx.HTTPError, ValueError) as exc:
+                set_log(
+                    f"vLLM replica {replica.base_url} models unavailable: {exc}",
+                    level="warning",
+                )
+                continue
+            for entry in models:
+                max_model_len = entry.get("max_model_len")
+                # served-model-name may differ from VLLM_MODEL with a single model
+                if (entry.get("id") == model or len(models) == 1) and isinstance(
+                    max_model_len, int
+                ):
+                    lengths.append(max_model_len)
+        return min(lengths) if lengths else None
+
+    def start_health_checks(self, client: httpx.AsyncClient) -> None:
+        if self._health_task is not None and not self._health_task.done():
+            return
+
+        async def loop() -> None:
+            while True:
+                try:
+                    await self.check_health(client)
+                except Exception as exc:
+                    set_log(f"vLLM health check failed: {exc}", level="error")
+                await asyncio.sleep(settings.vllm_health_check_interval_s)
+
+        self._health_task = asyncio.create_task(loop())
+
+    async def stop_health_checks(self) -> None:
+        task, self._health_task = self._health_task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "health_checks": self._health_task is not None
+            and not self._health_task.done(),
+            "replicas": [replica.stats(now) for replica in self.replicas],
+        }
+
+
+def single_replica_pool(base_url: str) -> ReplicaPool:
+    return ReplicaPool([Replica(base_url)])
+
+
+@lru_cache(maxsize=1)
+def get_vllm_replica_pool() -> ReplicaPool:
+    """Shared pool built from VLLM_REPLICAS (falls back to VLLM_BASE_URL:VLLM_PORT)."""
+    urls = list(settings.vllm_replicas) or [
+        f"{settings.vllm_base_url.rstrip('/')}:{settings.vllm_port}"
+    ]
+    weights = list(settings.vllm_replica_weights)
+    return ReplicaPool(
+        Replica(url, weight=weights[i] if i < len(weights) else 1.0)
+        for i, url in enumerate(urls)
+    )
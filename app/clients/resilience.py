@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from functools import lru_cache
+from typing import Any, TypeVar
+
+import httpx
+
+from app.core.config import settings
+from app.core.logger import set_log
+
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the backend while its circuit breaker is open."""
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+    # timeouts, connect errors, dropped connections
+    return isinstance(exc, httpx.TransportError)
+
+
+# -------------------------
+# Circuit breaker
+# -------------------------
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint breaker: opens after `failure_threshold` consecutive
+    failures, fails fast for `reset_timeout_s`, then lets one trial call
+    through (half-open) to decide whether to close again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self, name: str, *, failure_threshold: int, reset_timeout_s: float
+    ):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout_s = reset_timeout_s
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self.rejected = 0
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected without a half-open trial."""
+        return (
+            self.state == self.OPEN
+            and time.monotonic() - self.opened_at < self.reset_timeout_s
+        )
+
+    def before_call(self) -> None:
+        if self.state == self.CLOSED:
+            return
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout_s:
+                self.rejected += 1
+                raise CircuitOpenError(f"Circuit open for {self.name}")
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self._trial_in_flight:
+            self.rejected += 1
+            raise CircuitOpenError(
+                f"Circuit half-open for {self.name}, trial in flight"
+            )
+        self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            set_log(f"Circuit closed for {self.name}")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or (
+            self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != self.OPEN:
+                set_log(
+                    f"Circuit opened for {self.name} after {self.consecutive_failures} failures",
+                    level="warning",
+                )
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release_trial(self) -> None:
+        """Give back a half-open trial slot when the call ended without a verdict."""
+        self._trial_in_flight = False
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "rejected": self.rejected,
+        }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+async def call_with_breaker(
+    breaker: CircuitBreaker, call: Callable[[], Awaitable[T]]
+) -> T:
+    """Run one attempt through `breaker`; only transient errors count as failures."""
+    breaker.before_call()
+    try:
+        result = await call()
+    except Exception as exc:
+        if is_retryable_error(exc):
+            breaker.record_failure()
+        elif isinstance(exc, httpx.HTTPStatusError):
+            # the endpoint answered (4xx): it is up
+            breaker.record_success()
+        else:
+            breaker.release_trial()
+        raise
+    except BaseException:
+        breaker.release_trial()
+        raise
+    breaker.record_success()
+    return result
+
+
+def get_circuit_breaker(endpoint: str) -> CircuitBreaker:
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            endpoint,
+            failure_threshold=settings.circuit_breaker_failure_threshold,
+            reset_timeout_s=settings.circuit_breaker_reset_timeout_s,
+        )
+        _breakers[endpoint] = breaker
+    return breaker
+
+
+# -------------------------
+# Latency tracking / adaptive timeouts
+# -------------------------
+
+
+class LatencyTracker:
+    """Rolling latency window per key (task type), for timeouts and hedging."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: dict[str, deque[float]] = {}
+
+    def record(self, key: str, latency_s: float) -> None:
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = deque(maxlen=self.window)
+            self._samples[key] = samples
+        samples.append(latency_s)
+
+    def percentile(self, key: str, pct: float) -> float | None:
+        samples = self._samples.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def timeout_for(self, key: str, ceiling_s: float) -> float:
+        """p99 x multiplier, clamped to [ADAPTIVE_TIMEOUT_MIN_S, ceiling_s]."""
+        p99 = self.percentile(key, 99)
+        if p99 is None:
+            return ceiling_s
+        timeout = p99 * settings.adaptive_timeout_multiplier
+        return max(settings.adaptive_timeout_min_s, min(ceiling_s, timeout))
+
+    def stats(self) -> dict[str, Any]:
+        result: dict[str, Any] = {}
+        for key, samples in self._samples.items():
+            result[key] = {
+                "samples": len(samples),
+                "p50_s": self.percentile(key, 50),
+                "p95_s": self.percentile(key, 95),
+                "p99_s": self.percentile(key, 99),
+            }
+        return result
+
+
+@lru_cache(maxsize=1)
+def get_latency_tracker() -> LatencyTracker:
+    return LatencyTracker()
+
+
+# -------------------------
+# Retry / hedging
+# -------------------------
+
+
+class _ResilienceCounters:
+    def __init__(self) -> None:
+        self.retries = 0
+        self.hedges_started = 0
+        self.hedges_won = 0
+
+
+_counters = _ResilienceCounters()
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for retry number `attempt` (1-based)."""
+    cap = min(
+        settings.retry_max_delay_s,
+        settings.retry_base_delay_s * (2 ** (attempt - 1)),
+    )
+    return random.uniform(0.0, cap)
+
+
+async def sleep_before_retry(
+    exc: BaseException, *, attempt: int, attempts: int, description: str
+) -> None:
+    delay = backoff_delay(attempt)
+    _counters.retries += 1
+    set_log(
+        f"{description} failed ({type(exc).__name__}: {exc}), "
+        f"retry {attempt}/{attempts - 1} in {delay:.2f}s",
+        level="warning",
+    )
+    await asyncio.sleep(delay)
+
+
+async def retry_async(
+    call: Callable[[], Awaitable[T]],
+    *,
+    description: str,
+    max_attempts: int | None = None,
+) -> T:
+    """Retry an idempotent call on transient errors with jittered backoff."""
+    attempts = max(1, max_attempts or settings.retry_max_attempts)
+    for attempt in range(1, attempts + 1):
+        try:
+            return await call()
+        except Exception as exc:
+            if attempt >= attempts or not is_retryable_error(exc):
+                raise
+            await sleep_before_retry(
+                exc, attempt=attempt, attempts=attempts, description=description
+            )
+    raise RuntimeError("unreachable")
+
+
+async def hedged_call(
+    call: Callable[[], Awaitable[T]],
+    *,
+    delay_s: float | None,
+) -> T:
+    """
+    Start `call`; if it has not finished after `delay_s`, start a duplicate and
+    return whichever succeeds first (the other is cancelled).
+    """
+    if delay_s is None:
+        return await call()
+
+    primary = asyncio.ensure_future(call())
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay_s)
+        if done:
+            return primary.result()
+
+        _counters.hedges_started += 1
+        hedge = asyncio.ensure_future(call())
+        tasks.add(hedge)
+        pending = set(tasks)
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        _counters.hedges_won += 1
+                    return task.result()
+                error = task.exception()
+        assert error is not None
+        raise error
+    finally:
+        # also on caller cancellation: an orphaned request would keep its
+        # limiter slot and replica lease until vLLM finished it
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def retry_sync(
+    call: Callable[[], T],
+    *,
+    description: str,
+    breaker: CircuitBreaker | None = None,
+    max_attempts: int | None = None,
+) -> T:
+    """Blocking counterpart of `retry_async` (+ breaker) for sync call sites."""
+    attempts = max(1, max_attempts or settings.retry_max_attempts)
+    for attempt in range(1, attempts + 1):
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = call()
+        except Exception as exc:
+            retryable = is_retryable_error(exc)
+            if breaker is not None:
+                if retryable:
+                    breaker.record_failure()
+                else:
+                    breaker.release_trial()
+            if attempt >= attempts or not retryable:
+                raise
+            delay = backoff_delay(attempt)
+            _counters.retries += 1
+            set_log(
+                f"{description} failed ({type(exc).__name__}: {exc}), "
+                f"retry {attempt}/{attempts - 1} in {delay:.2f}s",
+                level="warning",
+            )
+            time.sleep(delay)
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        return result
+    raise RuntimeError("unreachable")
+
+
+def hedge_delay_for(key: str) -> float | None:
+    """p95-based hedge delay, or None when hedging is off / not enough data."""
+    if not settings.vllm_hedge_enabled:
+        return None
+    p95 = get_latency_tracker().percentile(key, 95)
+    if p95 is None:
+        return None
+    return max(settings.vllm_hedge_min_delay_s, p95)
+
+
+def resilience_stats() -> dict[str, Any]:
+    return {
+        "retries": _counters.retries,
+        "hedges_started": _counters.hedges_started,
+        "hedges_won": _counters.hedges_won,
+        "circuit_breakers": {
+            name: breaker.stats() for name, breaker in _breakers.items()
+        },
+        "latency": get_latency_tracker().stats(),
+    }
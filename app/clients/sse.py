@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Callable
+
+try:  # orjson ships with the langgraph/langsmith dependency tree
+    import orjson
+
+    _loads: Callable[[bytes], Any] = orjson.loads
+    JSON_DECODER = "orjson"
+except ImportError:  # pragma: no cover - depends on the environment
+    _loads = json.loads
+    JSON_DECODER = "json"
+
+
+DONE = object()
+"""Sentinel returned by `SseDeltaParser.feed` for `data: [DONE]`."""
+
+
+def delta_content(chunk: Any) -> str | None:
+    """`choices[0].delta.content` of an OpenAI-style stream chunk, if any."""
+    try:
+        content = chunk["choices"][0]["delta"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return None
+    return content or None
+
+
+class SseDeltaParser:
+    """
+    Incremental byte-level parser for OpenAI-compatible SSE streams.
+
+    Feed raw bytes from `response.aiter_bytes()`; each complete `data:` line is
+    decoded once and returned as a `(chunk, delta_content)` pair. Lines without
+    `data:` (comments, `event:`, keep-alives) are skipped without decoding.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = b""
+        self.invalid_lines = 0
+
+    def feed(self, data: bytes) -> list[Any]:
+        """Parse `data`; returns pairs and possibly `DONE` (last item)."""
+        buffer = self._buffer + data if self._buffer else data
+        end = buffer.rfind(b"\n")
+        if end < 0:
+            self._buffer = buffer
+            return []
+        self._buffer = buffer[end + 1 :]
+        return self._parse_lines(buffer[:end].split(b"\n"))
+
+    def flush(self) -> list[Any]:
+        """Parse a trailing line that was not newline-terminated."""
+        buffer, self._buffer = self._buffer, b""
+        return self._parse_lines([buffer]) if buffer else []
+
+    def _parse_lines(self, lines: list[bytes]) -> list[Any]:
+        events: list[Any] = []
+        for line in lines:
+            if not line.startswith(b"data:"):
+                continue
+            payload = line[5:].strip()
+            if payload == b"[DONE]":
+                events.append(DONE)
+                break
+            try:
+                chunk = _loads(payload)
+            except ValueError:
+                self.invalid_lines += 1
+                continue
+            events.append((chunk, delta_content(chunk)))
+        return events
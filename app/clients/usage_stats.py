@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import threading
+from functools import lru_cache
+from typing import Any
+
+
+class _TaskUsage:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.requests_with_cache_details = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "requests_with_cache_details": self.requests_with_cache_details,
+            "prefix_hit_rate": (
+                self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+            ),
+        }
+
+
+class UsageTracker:
+    """
+    Token usage reported by vLLM, per task type.
+
+    `prefix_hit_rate` is cached_tokens / prompt_tokens, from
+    `usage.prompt_tokens_details.cached_tokens`. vLLM only reports it when
+    started with `--enable-prompt-tokens-details`; requests without the
+    field are counted in prompt_tokens but not in requests_with_cache_details.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._tasks: dict[str, _TaskUsage] = {}
+
+    def record(self, key: str, usage: dict[str, Any]) -> None:
+        details = usage.get("prompt_tokens_details") or {}
+        cached = details.get("cached_tokens") if isinstance(details, dict) else None
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None:
+                task = _TaskUsage()
+                self._tasks[key] = task
+            task.requests += 1
+            task.prompt_tokens += int(usage.get("prompt_tokens") or 0)
+            task.completion_tokens += int(usage.get("completion_tokens") or 0)
+            if isinstance(cached, int):
+                task.cached_tokens += cached
+                task.requests_with_cache_details += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {key: task.snapshot() for key, task in self._tasks.items()}
+
+
+@lru_cache(maxsize=1)
+def get_usage_tracker() -> UsageTracker:
+    return UsageTracker()
@@ -1,10 +1,43 @@
 from __future__ import annotations
-import json
+import time
+from contextlib import aclosing
 from typing import Any, AsyncIterator, Optional
 import httpx
+from app.clients.concurrency import (
+    AdaptiveConcurrencyLimiter,
+    LimiterPermit,
+    get_vllm_limiter,
+)
+from app.clients.http_pool import get_http_pool
+from app.clients.load_balancer import (
+    Replica,
+    ReplicaPool,
+    get_vllm_replica_pool,
+    single_replica_pool,
+)
+from app.clients.llm_response_cache import (
+    compute_prompt_hash,
+    get_llm_response_cache,
+    replay_stream_chunks,
+)
+from app.clients.resilience import (
+    call_with_breaker,
+    get_latency_tracker,
+    hedge_delay_for,
+    hedged_call,
+    is_retryable_error,
+    retry_async,
+    sleep_before_retry,
+)
+from app.clients.sse import DONE, SseDeltaParser
+from app.clients.usage_stats import get_usage_tracker
 from app.core.config import settings
 from app.core.logger import set_log
+from app.enums.common import HttpBackend, LlmOutputSchema
 from app.enums.multimodal_extraction import VllmTaskType
+from app.schemas.llm_outputs import get_response_format
+from app.utils.json_stream import IncrementalJsonParser
+from app.utils.token_budget import check_context_budget, get_token_counter
 
 
 class VllmClient:
@@ -15,23 +48,120 @@ class VllmClient:
         model_name: str | None = None,
         api_key: str | None = None,
         timeout_s: float = 300.0,
+        http_client: httpx.AsyncClient | None = None,
+        limiter: AdaptiveConcurrencyLimiter | None = None,
+        replicas: ReplicaPool | None = None,
     ):
         self.base_url = (base_url or settings.vllm_base_url).rstrip("/")
         self.port = settings.vllm_port if port is None else port
         self.model = model_name or settings.vllm_model
         self.api_key = api_key or getattr(settings, "vllm_api_key", "EMPTY")
 
-        self.chat_url = (
-            f"{self.base_url}:{self.port}/v1/chat/completions"
-            if self.port not in ("", None)
-            else f"{self.base_url}/v1/chat/completions"
-        )
+        if replicas is not None:
+            self._replicas = replicas
+        elif base_url is None and settings.vllm_replicas:
+            # shared pool: outstanding counts and health are process-wide
+            self._replicas = get_vllm_replica_pool()
+        else:
+            self._replicas = single_replica_pool(
+                f"{self.base_url}:{self.port}"
+                if self.port not in ("", None)
+                else self.base_url
+            )
+        self.chat_url = self._replicas.primary.chat_url
+        # timeout_s is the ceiling; per-task timeouts adapt from observed latency
+        self.timeout_s = timeout_s
         self.timeout = httpx.Timeout(timeout_s)
+        self._http_client = http_client
+        # process-wide by default, shared by every request and task type
+        self._limiter = limiter or get_vllm_limiter()
 
         set_log(
-            f"VllmClient initialized with base_url={self.base_url}, port={self.port}, model={self.model}"
+            f"VllmClient initialized with base_url={self.base_url}, port={self.port}, "
+            f"replicas={len(self._replicas.replicas)}, model={self.model}"
         )
 
+    @property
+    def replicas(self) -> ReplicaPool:
+        return self._replicas
+
+    def _client(self, client: httpx.AsyncClient | None) -> httpx.AsyncClient:
+        # explicit client > injected client > app-wide pooled client
+        return client or self._http_client or get_http_pool().get(HttpBackend.VLLM)
+
+    def prompt_hash(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        image_b64: Optional[str] = None,
+        image_mime: Optional[str] = "image/png",
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        extra: Optional[dict[str, Any]] = None,
+        output_schema: Optional[LlmOutputSchema] = None,
+    ) -> str:
+        """
+        Hash identifying this request (response cache key / agents_logs.prompt_hash);
+        takes the same prompt arguments as `chat`.
+        """
+        if output_schema is not None:
+            extra = self._with_output_schema(extra, output_schema)
+        return compute_prompt_hash(
+            model=self.model,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            image_b64=image_b64,
+            image_mime=image_mime,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            extra=extra,
+        )
+
+    def _response_cache_key(
+        self, use_cache: Optional[bool], *, stream: bool, **prompt: Any
+    ) -> str | None:
+        enabled = settings.llm_cache_enabled if use_cache is None else use_cache
+        if not enabled:
+            return None
+        # chat payloads and stream deltas are stored in different shapes
+        mode = "stream" if stream else "chat"
+        return f"{mode}:{self.prompt_hash(**prompt)}"
+
+    @staticmethod
+    def _with_output_schema(
+        extra: Optional[dict[str, Any]], output_schema: Optional[LlmOutputSchema]
+    ) -> Optional[dict[str, Any]]:
+        """Add vLLM structured-output (`response_format`) params for `output_schema`."""
+        if output_schema is None or not settings.vllm_structured_output_enabled:
+            return extra
+        return {"response_format": get_response_format(output_schema), **(extra or {})}
+
+    def _adaptive_timeout(self, latency_key: str) -> httpx.Timeout:
+        return httpx.Timeout(
+            get_latency_tracker().timeout_for(latency_key, self.timeout_s)
+        )
+
+    @staticmethod
+    def _record_usage(
+        payload: dict[str, Any], usage: Any, task_type: VllmTaskType
+    ) -> None:
+        """
+        Track token usage / prefix cache hits, and feed usage.prompt_tokens of
+        text-only prompts back into the token estimate.
+        """
+        if not isinstance(usage, dict):
+            return
+        get_usage_tracker().record(task_type.value, usage)
+
+        prompt_tokens = usage.get("prompt_tokens")
+        contents = [message.get("content") for message in payload["messages"]]
+        if not isinstance(prompt_tokens, int) or not all(
+            isinstance(content, str) for content in contents
+        ):
+            return
+        get_token_counter().calibrate(sum(map(len, contents)), prompt_tokens)
+
     def _headers(self) -> dict[str, str]:
         return {
             "Authorization": f"Bearer {self.api_key}",
@@ -65,29 +195,31 @@ class VllmClient:
             ],
         }
 
-    async def stream_chat(
+    def _build_payload(
         self,
-        client: httpx.AsyncClient,
         *,
         system_prompt: str,
         user_prompt: str,
-        image_b64: Optional[str] = None,
-        task_type: VllmTaskType = VllmTaskType.STREAM_CHAT,
-        mime_type: Optional[str] = "image/png",
-        temperature: float = 0.2,
-        max_tokens: Optional[int] = None,
-        extra: Optional[dict[str, Any]] = None,
-    ) -> AsyncIterator[dict[str, Any]]:
-        """
-        Streaming chat entrypoint
-        """
-        set_log(f"VllmClient called with task_type={task_type}")
+        image_b64: Optional[str],
+        image_mime: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int],
+        extra: Optional[dict[str, Any]],
+        stream: bool,
+    ) -> dict[str, Any]:
+        # fail fast instead of a rejected round trip (and its retries)
+        check_context_budget(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            image_count=1 if image_b64 and image_mime else 0,
+            max_tokens=max_tokens,
+        )
         messages = [
             {"role": "system", "content": system_prompt},
             self._build_user_message(
                 user_prompt=user_prompt,
                 image_b64=image_b64,
-                image_mime=mime_type,
+                image_mime=image_mime,
             ),
         ]
 
@@ -95,51 +227,352 @@ class VllmClient:
             "model": self.model,
             "messages": messages,
             "temperature": temperature,
-            "stream": True,
+            "stream": stream,
         }
 
         if max_tokens is not None:
             payload["max_tokens"] = max_tokens
+        if stream and settings.vllm_stream_include_usage:
+            # final chunk carries usage (prompt/cached tokens), consumed here
+            payload["stream_options"] = {"include_usage": True}
         if extra:
             payload.update(extra)
+        return payload
 
-        async with client.stream(
-            "POST",
-            self.chat_url,
-            json=payload,
-            headers=self._headers(),
-            timeout=self.timeout,
-        ) as response:
-            if response.status_code != 200:
-                error_text = await response.aread()
-                decoded_error = error_text.decode("utf-8", errors="replace")
-                set_log(
-                    f"VllmClient error response: {response.status_code} - {decoded_error} Task_type={task_type}",
-                    level="error",
-                )
-                response.raise_for_status()
+    async def _stream_once(
+        self,
+        client: httpx.AsyncClient | None,
+        payload: dict[str, Any],
+        task_type: VllmTaskType,
+        outcome: dict[str, bool],
+        tried: set[str],
+    ) -> AsyncIterator[tuple[dict[str, Any], str | None]]:
+        """
+        One streaming attempt: limiter slot + replica lease + circuit breaker
+        + adaptive timeout. The whole stream stays on the leased replica.
+        """
+        latency_key = f"{task_type.value}:ttft"
+        async with self._limiter.slot(task_type.value) as permit:
+            async with self._replicas.lease(exclude=tried) as replica:
+                tried.add(replica.base_url)
+                # closed explicitly so an early-stopping consumer aborts the
+                # upstream request (and frees the slot) right away, not at GC
+                async with aclosing(
+                    self._stream_from_replica(
+                        client, replica, permit, payload, task_type, outcome, latency_key
+                    )
+                ) as events:
+                    async for event in events:
+                        yield event
 
-            async for line in response.aiter_lines():
-                if not line:
-                    continue
-                if not line.startswith("data:"):
-                    continue
+    async def _stream_from_replica(
+        self,
+        client: httpx.AsyncClient | None,
+        replica: Replica,
+        permit: LimiterPermit,
+        payload: dict[str, Any],
+        task_type: VllmTaskType,
+        outcome: dict[str, bool],
+        latency_key: str,
+    ) -> AsyncIterator[tuple[dict[str, Any], str | None]]:
+        breaker = replica.breaker
+        breaker.before_call()
+        first_chunk = True
+        started = time.monotonic()
+        try:
+            async with self._client(client).stream(
+                "POST",
+                replica.chat_url,
+                json=payload,
+                headers=self._headers(),
+                timeout=self._adaptive_timeout(latency_key),
+            ) as response:
+                if response.status_code != 200:
+                    error_text = await response.aread()
+                    decoded_error = error_text.decode("utf-8", errors="replace")
+                    set_log(
+                        f"VllmClient error response: {response.status_code} - {decoded_error} Task_type={task_type}",
+                        level="error",
+                    )
+                    response.raise_for_status()
 
-                data = line.removeprefix("data:").strip()
-                if data == "[DONE]":
-                    break
+                parser = SseDeltaParser()
+                async for data in response.aiter_bytes():
+                    events = parser.feed(data)
+                    if not events:
+                        continue
 
-                try:
-                    yield json.loads(data)
-                except json.JSONDecodeError:
+                    if first_chunk:
+                        first_chunk = False
+                        permit.mark_latency()
+                        breaker.record_success()
+                        get_latency_tracker().record(
+                            latency_key, time.monotonic() - started
+                        )
+
+                    for event in events:
+                        if event is DONE:
+                            outcome["completed"] = True
+                            break
+                        yield event
+                    if outcome["completed"]:
+                        break
+                else:
+                    for event in parser.flush():
+                        if event is DONE:
+                            outcome["completed"] = True
+                            break
+                        yield event
+
+                if parser.invalid_lines:
                     set_log(
-                        f"Skipping non-JSON vLLM stream chunk: {data[:100]}",
+                        f"Skipped {parser.invalid_lines} non-JSON vLLM stream chunks Task_type={task_type}",
                         level="error",
                     )
+        except Exception as exc:
+            if first_chunk:
+                if is_retryable_error(exc):
+                    breaker.record_failure()
+                else:
+                    breaker.release_trial()
+            raise
+        except BaseException:
+            if first_chunk:
+                breaker.release_trial()
+            raise
+
+    async def _stream_events(
+        self,
+        client: httpx.AsyncClient | None,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        image_b64: Optional[str],
+        task_type: VllmTaskType,
+        mime_type: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int],
+        extra: Optional[dict[str, Any]],
+        use_cache: Optional[bool],
+        output_schema: Optional[LlmOutputSchema],
+    ) -> AsyncIterator[tuple[dict[str, Any], str | None]]:
+        """
+        `(chunk, delta_content)` pairs behind `stream_chat` / `stream_chat_deltas`.
+
+        With the response cache enabled (LLM_CACHE_ENABLED or use_cache=True),
+        a hit replays the stored delta stream instead of calling vLLM.
+        Transient failures are retried only before the first chunk is yielded.
+        """
+        set_log(f"VllmClient called with task_type={task_type}")
+        extra = self._with_output_schema(extra, output_schema)
+        cache_key = self._response_cache_key(
+            use_cache,
+            stream=True,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            image_b64=image_b64,
+            image_mime=mime_type,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            extra=extra,
+        )
+        if cache_key is not None:
+            cached = await get_llm_response_cache().aget(cache_key)
+            if cached is not None:
+                set_log(f"VllmClient stream cache hit Task_type={task_type}")
+                deltas = cached.get("deltas") or []
+                for chunk, delta in zip(replay_stream_chunks(deltas), deltas):
+                    yield chunk, delta
+                return
+
+        payload = self._build_payload(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            image_b64=image_b64,
+            image_mime=mime_type,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            extra=extra,
+            stream=True,
+        )
+
+        deltas: list[str] = []
+        outcome = {"completed": False}
+        # structured consumers close the stream once the root object closes
+        # (LLM_STREAM_STOP_AT_JSON_END): that object is the complete response
+        json_parser = (
+            IncrementalJsonParser()
+            if cache_key is not None and output_schema is not None
+            else None
+        )
+        json_complete = False
+        # retries prefer a replica that has not failed this request yet
+        tried: set[str] = set()
+        attempts = max(1, settings.retry_max_attempts)
+        for attempt in range(1, attempts + 1):
+            yielded = False
+            try:
+                async with aclosing(
+                    self._stream_once(client, payload, task_type, outcome, tried)
+                ) as events:
+                    async for chunk, delta in events:
+                        if delta is None and not chunk.get("choices"):
+                            # usage-only chunk from stream_options.include_usage
+                            self._record_usage(payload, chunk.get("usage"), task_type)
+                            continue
+                        yielded = True
+                        if cache_key is not None and delta:
+                            deltas.append(str(delta))
+                            if json_parser is not None and not json_complete:
+                                json_parser.feed(str(delta))
+                                if json_parser.done:
+                                    json_complete = True
+                                    await get_llm_response_cache().aset(
+                                        cache_key, {"deltas": list(deltas)}
+                                    )
+                        yield chunk, delta
+                break
+            except Exception as exc:
+                # tokens already reached the consumer: cannot replay safely
+                if yielded or attempt >= attempts or not is_retryable_error(exc):
+                    raise
+                await sleep_before_retry(
+                    exc,
+                    attempt=attempt,
+                    attempts=attempts,
+                    description=f"VllmClient stream Task_type={task_type}",
+                )
+
+        # only complete streams are cached; structured ones were cached above
+        # when their root object closed
+        if cache_key is not None and outcome["completed"] and json_parser is None:
+            await get_llm_response_cache().aset(cache_key, {"deltas": deltas})
+
+    async def stream_chat(
+        self,
+        client: httpx.AsyncClient | None = None,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        image_b64: Optional[str] = None,
+        task_type: VllmTaskType = VllmTaskType.STREAM_CHAT,
+        mime_type: Optional[str] = "image/png",
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        extra: Optional[dict[str, Any]] = None,
+        use_cache: Optional[bool] = None,
+        output_schema: Optional[LlmOutputSchema] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Streaming chat entrypoint, yields the decoded OpenAI-style chunks.
+
+        Callers that only need the text should use `stream_chat_deltas`.
+        """
+        async with aclosing(
+            self._stream_events(
+                client,
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                image_b64=image_b64,
+                task_type=task_type,
+                mime_type=mime_type,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                extra=extra,
+                use_cache=use_cache,
+                output_schema=output_schema,
+            )
+        ) as events:
+            async for chunk, _ in events:
+                yield chunk
+
+    async def stream_chat_deltas(
+        self,
+        client: httpx.AsyncClient | None = None,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        image_b64: Optional[str] = None,
+        task_type: VllmTaskType = VllmTaskType.STREAM_CHAT,
+        mime_type: Optional[str] = "image/png",
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        extra: Optional[dict[str, Any]] = None,
+        use_cache: Optional[bool] = None,
+        output_schema: Optional[LlmOutputSchema] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Streaming chat entrypoint, yields only non-empty delta contents.
+
+        The content is extracted once by the SSE parser, so there is no
+        per-token dict walking on the caller side.
+        """
+        async with aclosing(
+            self._stream_events(
+                client,
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                image_b64=image_b64,
+                task_type=task_type,
+                mime_type=mime_type,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                extra=extra,
+                use_cache=use_cache,
+                output_schema=output_schema,
+            )
+        ) as events:
+            async for _, delta in events:
+                if delta:
+                    yield delta
+
+    async def _chat_once(
+        self,
+        client: httpx.AsyncClient | None,
+        payload: dict[str, Any],
+        task_type: VllmTaskType,
+        tried: set[str],
+    ) -> dict[str, Any]:
+        """One non-streaming attempt: limiter slot + replica lease + breaker + adaptive timeout."""
+        latency_key = task_type.value
+
+        async def post(replica: Replica) -> httpx.Response:
+            response = await self._client(client).post(
+                replica.chat_url,
+                json=payload,
+                headers=self._headers(),
+                timeout=self._adaptive_timeout(latency_key),
+            )
+            set_log(
+                f"Response from VllmClient: {response.text[:30]}... Task_type={task_type}"
+            )
+            if response.status_code != 200:
+                set_log(
+                    f"VllmClient error response: {response.status_code} - {response.text} Task_type={task_type}",
+                    level="error",
+                )
+            response.raise_for_status()
+            return response
+
+        async with self._limiter.slot(task_type.value) as permit:
+            async with self._replicas.lease(exclude=tried) as replica:
+                tried.add(replica.base_url)
+                started = time.monotonic()
+                response = await call_with_breaker(
+                    replica.breaker, lambda: post(replica)
+                )
+            response_payload = response.json()
+            # whole-call latency grows with the output: sample it per token
+            permit.record_output_tokens(
+                (response_payload.get("usage") or {}).get("completion_tokens")
+            )
+        get_latency_tracker().record(latency_key, time.monotonic() - started)
+        self._record_usage(payload, response_payload.get("usage"), task_type)
+        return response_payload
 
     async def chat(
         self,
-        client: httpx.AsyncClient,
+        client: httpx.AsyncClient | None = None,
         *,
         system_prompt: str,
         user_prompt: str,
@@ -149,6 +582,8 @@ class VllmClient:
         temperature: float = 0.2,
         max_tokens: Optional[int] = None,
         extra: Optional[dict[str, Any]] = None,
+        use_cache: Optional[bool] = None,
+        output_schema: Optional[LlmOutputSchema] = None,
     ) -> dict[str, Any]:
         """
         Single chat entrypoint.
@@ -156,42 +591,53 @@ class VllmClient:
         Caller decides:
         - system_prompt content
         - whether image_b64 is passed
+        - whether the response cache is used (defaults to LLM_CACHE_ENABLED)
+
+        Transient failures are retried with jittered backoff; with
+        VLLM_HEDGE_ENABLED a duplicate request is sent after the task's p95.
         """
         set_log(f"VllmClient called with task_type={task_type}")
-        messages = [
-            {"role": "system", "content": system_prompt},
-            self._build_user_message(
-                user_prompt=user_prompt,
-                image_b64=image_b64,
-                image_mime=image_mime,
-            ),
-        ]
+        extra = self._with_output_schema(extra, output_schema)
+        cache_key = self._response_cache_key(
+            use_cache,
+            stream=False,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            image_b64=image_b64,
+            image_mime=image_mime,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            extra=extra,
+        )
+        if cache_key is not None:
+            cached = await get_llm_response_cache().aget(cache_key)
+            if cached is not None:
+                set_log(f"VllmClient cache hit Task_type={task_type}")
+                return cached
 
-        payload: dict[str, Any] = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": temperature,
-            "stream": False,
-        }
+        payload = self._build_payload(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            image_b64=image_b64,
+            image_mime=image_mime,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            extra=extra,
+            stream=False,
+        )
 
-        if max_tokens is not None:
-            payload["max_tokens"] = max_tokens
-        if extra:
-            payload.update(extra)
+        # retries and hedges prefer replicas this request has not used yet
+        tried: set[str] = set()
 
-        response = await client.post(
-            self.chat_url,
-            json=payload,
-            headers=self._headers(),
-            timeout=self.timeout,
-        )
-        set_log(
-            f"Response from VllmClient: {response.text[:30]}... Task_type={task_type}"
-        )
-        if response.status_code != 200:
-            set_log(
-                f"VllmClient error response: {response.status_code} - {response.text} Task_type={task_type}",
-                level="error",
+        async def attempt() -> dict[str, Any]:
+            return await hedged_call(
+                lambda: self._chat_once(client, payload, task_type, tried),
+                delay_s=hedge_delay_for(task_type.value),
             )
-        response.raise_for_status()
-        return response.json()
+
+        response_payload = await retry_async(
+            attempt, description=f"VllmClient chat Task_type={task_type}"
+        )
+        if cache_key is not None:
+            await get_llm_response_cache().aset(cache_key, response_payload)
+        return response_payload
@@ -28,11 +28,127 @@ class Settings(BaseSettings):
     vllm_base_url: str
     vllm_port: int
     vllm_model: str
+    # process-wide adaptive concurrency limit for all vLLM calls (app/clients/concurrency.py)
+    vllm_concurrency_initial: int = 8
+    vllm_concurrency_min: int = 1
+    vllm_concurrency_max: int = 64
+    vllm_latency_tolerance: float = 2.0
+    vllm_hedge_enabled: bool = False  # duplicate slow chat calls after the task's p95
+    vllm_hedge_min_delay_s: float = 1.0
+    vllm_stream_include_usage: bool = True  # usage / prefix-cache hits for streams
+    vllm_structured_output_enabled: bool = True  # response_format json_schema
+    # structured streams: close the vLLM request once the root JSON object closes
+    llm_stream_stop_at_json_end: bool = True
+    # JSON list of replica base urls, e.g. '["http://gpu1:8000","http://gpu2:8000"]';
+    # empty -> the single VLLM_BASE_URL:VLLM_PORT server
+    vllm_replicas: list[str] = []
+    vllm_replica_weights: list[float] = []  # same order as vllm_replicas, default 1.0
+    vllm_health_check_interval_s: float = 10.0
+    vllm_health_check_timeout_s: float = 2.0
+    vllm_health_failure_threshold: int = 2
+
+    # prompt token budgets (app/utils/token_budget.py)
+    # context length for the pre-send check; unset -> read from vLLM /v1/models
+    vllm_max_model_len: int | None = None
+    llm_tokenizer_path: str | None = None  # local tokenizer.json, needs `tokenizers`
+    llm_chars_per_token: float = 3.5  # estimate when no tokenizer, self-calibrates
+    llm_image_token_estimate: int = 1280
+    llm_completion_reserve_tokens: int = 2048  # assumed when max_tokens is unset
+    # the packed paper is the shared prompt prefix of every CR extraction call
+    cr_document_context_tokens: int = 16000
 
     embedding_base_url: str
     embedding_port: int
     embedding_model: str
     embedding_dimension: int
+    embedding_batch_max_size: int = 32
+    embedding_batch_max_wait_ms: float = 5.0
+
+    # local caches (app/utils/cache.py); persistent tiers are SQLite files in cache_dir
+    cache_dir: str = "./cache"
+    embedding_cache_enabled: bool = True
+    embedding_cache_max_entries: int = 2048
+    embedding_cache_persistent: bool = True
+    embedding_cache_max_mb: float = 256.0
+    llm_cache_enabled: bool = False  # opt-in, replays stored vLLM responses
+    llm_cache_max_entries: int = 512
+    llm_cache_persistent: bool = True
+    llm_cache_max_mb: float = 512.0
+    ocr_cache_enabled: bool = True  # parsed OCR pages keyed by page image hash
+    ocr_cache_max_entries: int = 2048
+    ocr_cache_persistent: bool = True
+    ocr_cache_max_mb: float = 256.0
+
+    # PDF page rasterization (app/utils/pdf_render.py); 0 workers -> min(4, cpu count)
+    pdf_render_workers: int = 0
+    pdf_render_use_processes: bool = True  # False: thread pool, no shared memory
+    pdf_render_scale: float = 2.0
+    # pages holding a rendered image at once (render + OCR window per upload)
+    ocr_pipeline_window: int = 8
+    # page image encoding for the VLM (app/utils/pdf_image.py); defaults keep
+    # PNG @ pdf_render_scale, see benchmarks/image_encoding.py before changing
+    pdf_image_format: str = "png"  # png | jpeg | webp (webp needs Pillow)
+    pdf_image_quality: int = 85
+    pdf_image_grayscale: bool = False  # gray for pages without colour graphics
+    pdf_image_crop: bool = False  # trim empty page margins
+    pdf_image_crop_margin_pt: float = 12.0
+    pdf_image_adaptive_dpi: bool = False  # replaces pdf_render_scale per page
+    pdf_image_min_dpi: int = 96
+    pdf_image_max_dpi: int = 144
+    pdf_image_target_long_side_px: int = 1400
+    pdf_image_dense_chars_per_sq_in: float = 40.0
+    # born-digital pages skip VLM OCR (app/utils/pdf_text.py classify_page)
+    pdf_text_layer_enabled: bool = True
+    pdf_text_layer_min_chars: int = 200
+    pdf_text_layer_min_glyph_coverage: float = 0.98
+    pdf_text_layer_max_image_ratio: float = 0.5
+
+    # pages read for bibliographic info; they are OCR'd first so extraction and
+    # embedding run alongside OCR of the rest of the document
+    bibliographic_max_pages: int = 5
+    # >1: send the 1..N page prefixes to vLLM at once and keep the smallest
+    # complete one (N extraction calls in flight); 0 keeps the page-by-page loop
+    bibliographic_speculative_prefixes: int = 0
+    # zero-LLM prefill from PDF metadata / first page text, and optionally a
+    # local Crossref-style JSONL dump looked up by DOI (app/utils/pdf_metadata.py)
+    bibliographic_prefill_enabled: bool = True
+    bibliographic_index_path: str | None = None
+    # bibliographic completeness is decided locally; the LLM judge only runs
+    # when these heuristics are ambiguous (bibliographic_info_node.py)
+    bibliographic_abstract_min_chars: int = 300
+    bibliographic_year_min: int = 1900
+    bibliographic_llm_judge_enabled: bool = True
+
+    # ingestion job queue (app/workers/ingestion_worker.py); workers on any
+    # host claim jobs from cr_soles.jobs with FOR UPDATE SKIP LOCKED
+    job_worker_concurrency: int = 2  # jobs run at once per worker process
+    job_poll_interval_s: float = 2.0
+    job_visibility_timeout_s: float = 300.0  # lease, renewed while a job runs
+    job_max_attempts: int = 3
+    job_retry_base_delay_s: float = 30.0
+    job_retry_max_delay_s: float = 900.0
+    job_shutdown_grace_s: float = 30.0
+
+    # bulk ingestion of directories / zip archives (app/services/bulk_ingestion.py);
+    # per-file results are appended to JSONL manifests so runs can be resumed
+    bulk_ingestion_concurrency: int = 4  # documents in flight per run
+    bulk_manifest_dir: str = "./cache/bulk"
+    bulk_max_pdf_mb: float = 200.0
+
+    # shared outbound HTTP pool (one client per backend, see app/clients/http_pool.py)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_s: float = 60.0
+    http_http2: bool = False  # requires the `h2` package
+
+    # resilience for backend calls (app/clients/resilience.py)
+    retry_max_attempts: int = 3
+    retry_base_delay_s: float = 0.5
+    retry_max_delay_s: float = 8.0
+    circuit_breaker_failure_threshold: int = 5
+    circuit_breaker_reset_timeout_s: float = 30.0
+    adaptive_timeout_multiplier: float = 3.0
+    adaptive_timeout_min_s: float = 30.0
 
     @property
     def is_production(self) -> bool:
@@ -0,0 +1,13 @@
+from enum import Enum
+
+
+class HttpBackend(str, Enum):
+    VLLM = "vllm"
+    EMBEDDING = "embedding"
+
+
+class LlmOutputSchema(str, Enum):
+    POPULATION = "population"
+    INSTRUMENT = "instrument"
+    OCR_PAGE = "ocr_page"
+    BIBLIOGRAPHIC_INFO = "bibliographic_info"
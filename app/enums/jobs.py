@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobType(str, Enum):
+    PDF_INGESTION = "pdf_ingestion"
@@ -8,3 +8,10 @@ class VllmTaskType(str, Enum):
     CHAT = "chat"
     STREAM_CHAT = "stream_chat"
     CR_EXTRACTION = "cr_extraction"
+
+
+class BulkFileStatus(str, Enum):
+    INGESTED = "ingested"  # new papers_staging row
+    SIMILAR = "similar"  # processed, matched an existing paper by embedding
+    DUPLICATE = "duplicate"  # same file already ingested, not processed
+    FAILED = "failed"
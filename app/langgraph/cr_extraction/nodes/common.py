@@ -1,21 +1,45 @@
 from __future__ import annotations
 
-import json
 from typing import Any
 
-
-def parse_json_object(text: str) -> dict[str, Any]:
-    cleaned = text.strip()
-    if cleaned.startswith("```"):
-        cleaned = cleaned.strip("`").strip()
-        if cleaned.lower().startswith("json"):
-            cleaned = cleaned[4:].strip()
-
-    start = cleaned.find("{")
-    end = cleaned.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        raise ValueError("No JSON object found in streamed response.")
-    return json.loads(cleaned[start : end + 1])
+from app.core.config import settings
+from app.core.logger import set_log
+from app.utils.token_budget import PagePack, pack_pages
+
+
+def pack_document_context(pages_content: list[dict[str, Any]]) -> PagePack:
+    """
+    Pack the paper once per run; every node sends the same text as its
+    prompt prefix so vLLM can reuse the cached prefill.
+    """
+    budget_tokens = settings.cr_document_context_tokens
+    pack = pack_pages(pages_content, budget_tokens=budget_tokens)
+    if pack.truncated_pages or pack.dropped_pages:
+        set_log(
+            f"cr_extraction document over budget, truncated={pack.truncated_pages} "
+            f"dropped={pack.dropped_pages} ({pack.used_tokens}/{budget_tokens} tokens)",
+            level="warning",
+        )
+    return pack
+
+
+def get_document_context(state: dict[str, Any]) -> str:
+    context = state.get("document_context")
+    if context is None:
+        context = pack_document_context(state.get("pages_content") or []).text
+    return context
+
+
+def get_document_pages(state: dict[str, Any]) -> list[dict[str, Any]]:
+    """Pages that made it into the document prefix (all pages if unknown)."""
+    pages_content = state.get("pages_content") or []
+    report = state.get("document_context_report")
+    if not report:
+        return pages_content
+    visible = set(report.get("included_pages") or []) | set(
+        report.get("truncated_pages") or []
+    )
+    return [item for item in pages_content if item.get("page") in visible]
 
 
 def get_page_text(page_item: dict[str, Any]) -> str:
@@ -3,31 +3,32 @@ from __future__ import annotations
 import time
 
 from app.core.logger import set_log
+from app.enums.common import LlmOutputSchema
 from app.enums.multimodal_extraction import VllmTaskType
 from app.langgraph.cr_extraction.state import CrExtractionState
-from app.langgraph.cr_extraction.nodes.common import parse_json_object
+from app.langgraph.cr_extraction.nodes.common import get_document_context
 from app.prompts.cr_extraction import (
-    get_instrument_system_prompt,
+    get_document_system_prompt,
     get_instrument_user_prompt,
 )
+from app.schemas.llm_outputs import parse_structured_output
 from app.utils.stream_invoke import stream_node_llm_and_collect
 
 
 async def instrument_node(state: CrExtractionState) -> CrExtractionState:
     set_log("cr_extraction.instrument_node")
 
-    pages_content = state.get("pages_content") or []
     population = state.get("population") or {}
     stream_prompt = state.get("stream_prompt")
     result = await stream_node_llm_and_collect(
         node="instrument_node",
-        system_prompt=get_instrument_system_prompt(),
+        system_prompt=get_document_system_prompt(get_document_context(state)),
         user_prompt=get_instrument_user_prompt(
-            pages_content,
             population,
             stream_prompt,
         ),
         task_type=VllmTaskType.CR_EXTRACTION,
+        output_schema=LlmOutputSchema.INSTRUMENT,
         port="",
         timeout_s=300.0,
         start_message="extracting instrument",
@@ -36,7 +37,9 @@ async def instrument_node(state: CrExtractionState) -> CrExtractionState:
 
     raw_text = str(result.get("text") or "")
     try:
-        cr_operationalization = parse_json_object(raw_text)
+        cr_operationalization = parse_structured_output(
+            LlmOutputSchema.INSTRUMENT, raw_text
+        )
     except Exception as exc:
         set_log(f"instrument_node parse failed: {exc}", level="error")
         cr_operationalization = {
@@ -3,26 +3,28 @@ from __future__ import annotations
 import time
 
 from app.core.logger import set_log
+from app.enums.common import LlmOutputSchema
 from app.enums.multimodal_extraction import VllmTaskType
 from app.langgraph.cr_extraction.state import CrExtractionState
-from app.langgraph.cr_extraction.nodes.common import parse_json_object
+from app.langgraph.cr_extraction.nodes.common import get_document_context
 from app.prompts.cr_extraction import (
-    get_population_system_prompt,
+    get_document_system_prompt,
     get_population_user_prompt,
 )
+from app.schemas.llm_outputs import parse_structured_output
 from app.utils.stream_invoke import stream_node_llm_and_collect
 
 
 async def population_node(state: CrExtractionState) -> CrExtractionState:
     set_log("cr_extraction.population_node")
 
-    pages_content = state.get("pages_content") or []
     stream_prompt = state.get("stream_prompt")
     result = await stream_node_llm_and_collect(
         node="population_node",
-        system_prompt=get_population_system_prompt(),
-        user_prompt=get_population_user_prompt(pages_content, stream_prompt),
+        system_prompt=get_document_system_prompt(get_document_context(state)),
+        user_prompt=get_population_user_prompt(stream_prompt),
         task_type=VllmTaskType.CR_EXTRACTION,
+        output_schema=LlmOutputSchema.POPULATION,
         port="",
         timeout_s=300.0,
         start_message="extracting population",
@@ -31,7 +33,7 @@ async def population_node(state: CrExtractionState) -> CrExtractionState:
 
     raw_text = str(result.get("text") or "")
     try:
-        population = parse_json_object(raw_text)
+        population = parse_structured_output(LlmOutputSchema.POPULATION, raw_text)
     except Exception as exc:
         set_log(f"population_node parse failed: {exc}", level="error")
         population = {
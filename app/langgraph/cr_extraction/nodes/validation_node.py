@@ -3,35 +3,44 @@ from __future__ import annotations
 from typing import Any
 
 from app.core.logger import set_log
+from app.enums.common import LlmOutputSchema
 from app.enums.multimodal_extraction import VllmTaskType
 from app.langgraph.cr_extraction.state import CrExtractionState
 from app.langgraph.cr_extraction.nodes.common import (
+    get_document_context,
+    get_document_pages,
     normalize_evidence_list,
-    parse_json_object,
     pick_relevant_pages,
 )
 from app.prompts.cr_extraction import (
-    get_instrument_system_prompt,
+    get_document_system_prompt,
     get_instrument_verify_prompt,
-    get_population_system_prompt,
     get_population_verify_prompt,
 )
+from app.schemas.llm_outputs import parse_structured_output
 from app.utils.stream_invoke import stream_node_llm_and_collect
 
 
 async def validation_node(state: CrExtractionState) -> CrExtractionState:
     validation_target = state.get("validation_target")
     pages_content = state.get("pages_content") or []
+    # same prefix as the extraction calls; relevant pages are named in the suffix
+    system_prompt = get_document_system_prompt(get_document_context(state))
+    document_pages = get_document_pages(state)
     set_log(f"cr_extraction.validation_node: target={validation_target}")
 
     if validation_target == "population":
         population = dict(state.get("population") or {})
-        relevant_pages = pick_relevant_pages(pages_content, population)
+        relevant_pages = pick_relevant_pages(document_pages, population)
         result = await stream_node_llm_and_collect(
             node="validation_node_population",
-            system_prompt=get_population_system_prompt(),
-            user_prompt=get_population_verify_prompt(relevant_pages, population),
+            system_prompt=system_prompt,
+            user_prompt=get_population_verify_prompt(
+                population,
+                [item.get("page") for item in relevant_pages],
+            ),
             task_type=VllmTaskType.CR_EXTRACTION,
+            output_schema=LlmOutputSchema.POPULATION,
             port="",
             timeout_s=300.0,
             start_message="re-validating population evidence",
@@ -40,7 +49,9 @@ async def validation_node(state: CrExtractionState) -> CrExtractionState:
 
         verify_text = str(result.get("text") or "")
         try:
-            population = parse_json_object(verify_text)
+            population = parse_structured_output(
+                LlmOutputSchema.POPULATION, verify_text
+            )
         except Exception as exc:
             set_log(f"validation population parse failed: {exc}", level="error")
             population["verify_raw_text"] = verify_text
@@ -64,15 +75,16 @@ async def validation_node(state: CrExtractionState) -> CrExtractionState:
 
     if validation_target == "instrument":
         cr_operationalization = dict(state.get("cr_operationalization") or {})
-        relevant_pages = pick_relevant_pages(pages_content, cr_operationalization)
+        relevant_pages = pick_relevant_pages(document_pages, cr_operationalization)
         result = await stream_node_llm_and_collect(
             node="validation_node_instrument",
-            system_prompt=get_instrument_system_prompt(),
+            system_prompt=system_prompt,
             user_prompt=get_instrument_verify_prompt(
-                relevant_pages,
                 cr_operationalization,
+                [item.get("page") for item in relevant_pages],
             ),
             task_type=VllmTaskType.CR_EXTRACTION,
+            output_schema=LlmOutputSchema.INSTRUMENT,
             port="",
             timeout_s=300.0,
             start_message="re-validating instrument evidence",
@@ -81,7 +93,9 @@ async def validation_node(state: CrExtractionState) -> CrExtractionState:
 
         verify_text = str(result.get("text") or "")
         try:
-            cr_operationalization = parse_json_object(verify_text)
+            cr_operationalization = parse_structured_output(
+                LlmOutputSchema.INSTRUMENT, verify_text
+            )
         except Exception as exc:
             set_log(f"validation instrument parse failed: {exc}", level="error")
             cr_operationalization["verify_raw_text"] = verify_text
@@ -28,6 +28,8 @@ class CrExtractionState(TypedDict, total=False):
     # ---------- Input ----------
     paper_id: str
     pages_content: List[Dict[str, Any]]  # OCR cleaned text per page
+    document_context: str  # packed pages, shared prompt prefix of every node
+    document_context_report: Dict[str, Any]
     current_page_index: int
 
     # ---------- Core extracted objects ----------
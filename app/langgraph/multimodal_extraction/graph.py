@@ -1,26 +1,35 @@
 from functools import lru_cache
 
-from langgraph.graph import END, StateGraph
+from langgraph.graph import END, START, StateGraph
 
 from app.langgraph.multimodal_extraction.nodes.bibliographic_info_node import (
     extract_bibliographic_info,
     prepare_retry,
     should_retry,
 )
-from app.langgraph.multimodal_extraction.nodes.ocr_node import run_ocr
+from app.langgraph.multimodal_extraction.nodes.metadata_node import (
+    prefill_bibliographic_info,
+)
+from app.langgraph.multimodal_extraction.nodes.ocr_node import (
+    run_ocr_head,
+    run_ocr_rest,
+)
 from app.langgraph.multimodal_extraction.nodes.embedding_node import embed_data
-from app.langgraph.multimodal_extraction.state import DocumentState
+from app.langgraph.multimodal_extraction.state import (
+    BibliographicOutput,
+    DocumentState,
+)
 
 
-def build_document_graph():
-    graph = StateGraph(DocumentState)
-    graph.add_node("ocr", run_ocr)
+def build_bibliographic_graph():
+    # a subgraph so the retry loop and embedding run inside one parent step,
+    # concurrently with ocr_rest instead of waiting for it between steps
+    graph = StateGraph(DocumentState, output_schema=BibliographicOutput)
     graph.add_node("extract_bibliographic_info", extract_bibliographic_info)
     graph.add_node("prepare_retry", prepare_retry)
     graph.add_node("embed", embed_data)
 
-    graph.set_entry_point("ocr")
-    graph.add_edge("ocr", "extract_bibliographic_info")
+    graph.set_entry_point("extract_bibliographic_info")
     graph.add_conditional_edges(
         "extract_bibliographic_info",
         should_retry,
@@ -31,6 +40,21 @@ def build_document_graph():
     return graph.compile()
 
 
+def build_document_graph():
+    graph = StateGraph(DocumentState)
+    graph.add_node("prefill", prefill_bibliographic_info)
+    graph.add_node("ocr_head", run_ocr_head)
+    graph.add_node("ocr_rest", run_ocr_rest)
+    graph.add_node("bibliographic", build_bibliographic_graph())
+
+    graph.add_edge(START, "prefill")
+    graph.add_edge(START, "ocr_head")
+    graph.add_edge("ocr_head", "ocr_rest")
+    graph.add_edge(["prefill", "ocr_head"], "bibliographic")
+    graph.add_edge(["ocr_rest", "bibliographic"], END)
+    return graph.compile()
+
+
 @lru_cache(maxsize=1)
 def get_document_graph():
     return build_document_graph()
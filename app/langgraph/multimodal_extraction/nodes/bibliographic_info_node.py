@@ -1,10 +1,11 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import re
+from datetime import date
 from typing import Any
 
-import httpx
-
 from app.prompts.multimodal_extraction import (
     get_bibliographic_info_determine_completion_prompt,
     get_bibliographic_info_extraction_prompt,
@@ -12,23 +13,26 @@ from app.prompts.multimodal_extraction import (
 from app.langgraph.multimodal_extraction.state import DocumentState
 from app.clients.vllm_client import VllmClient
 
+from app.core.config import settings
 from app.core.logger import set_log
+from app.enums.common import LlmOutputSchema
 from app.enums.multimodal_extraction import VllmTaskType
+from app.schemas.llm_outputs import parse_structured_output
 
 
 REQUIRED_FIELDS = ("title", "authors", "journal", "year", "abstract")
 
+# an abstract cut at a page break rarely ends like a sentence
+_SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]*$")
+_AUTHOR_RE = re.compile(r"^[^\W\d_][\w.,'’\- ]*$")
+_MAX_AUTHOR_WORDS = 6
+
 
 def _extract_json(text: str) -> dict[str, Any] | None:
-    start = text.find("{")
-    end = text.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        return None
-    snippet = text[start : end + 1]
     try:
-        set_log(f"Extracting JSON snippet: {snippet}")
-        return json.loads(snippet)
-    except json.JSONDecodeError:
+        return parse_structured_output(LlmOutputSchema.BIBLIOGRAPHIC_INFO, text)
+    except ValueError:
+        set_log(f"No bibliographic JSON in response: {text[:200]}", level="warning")
         return None
 
 
@@ -62,6 +66,13 @@ def _normalize_bibliographic_info(
     return normalized
 
 
+def _is_plausible_year(year: Any) -> bool:
+    return (
+        isinstance(year, int)
+        and settings.bibliographic_year_min <= year <= date.today().year + 1
+    )
+
+
 def _find_missing_fields(bibliographic_info: dict[str, Any]) -> list[str]:
     missing: list[str] = []
     if not bibliographic_info.get("title"):
@@ -70,7 +81,7 @@ def _find_missing_fields(bibliographic_info: dict[str, Any]) -> list[str]:
         missing.append("authors")
     if not bibliographic_info.get("journal"):
         missing.append("journal")
-    if not isinstance(bibliographic_info.get("year"), int):
+    if not _is_plausible_year(bibliographic_info.get("year")):
         missing.append("year")
     if not bibliographic_info.get("abstract"):
         missing.append("abstract")
@@ -90,7 +101,7 @@ def _merge_bibliographic_info(
     if incoming.get("authors"):
         merged["authors"] = incoming["authors"]
 
-    if isinstance(incoming.get("year"), int):
+    if _is_plausible_year(incoming.get("year")):
         merged["year"] = incoming["year"]
 
     incoming_abstract = incoming.get("abstract") or ""
@@ -101,13 +112,51 @@ def _merge_bibliographic_info(
     return _normalize_bibliographic_info(merged)
 
 
-def _collect_ocr_text(ocr_pages: list[dict], max_pages: int) -> str:
-    snippets: list[str] = []
-    for page in ocr_pages[:max_pages]:
-        text = page.get("text")
-        if isinstance(text, str) and text.strip():
-            snippets.append(text.strip())
-    return "\n\n".join(snippets)
+def _apply_prefill(
+    bibliographic_info: dict[str, Any], prefill: dict[str, Any]
+) -> dict[str, Any]:
+    # prefilled fields (PDF metadata, DOI index) are high confidence: the LLM
+    # never overrides them
+    if not prefill:
+        return bibliographic_info
+    return _normalize_bibliographic_info({**bibliographic_info, **prefill})
+
+
+def _page_text(page: dict) -> str:
+    text = page.get("text")
+    return text.strip() if isinstance(text, str) else ""
+
+
+def _is_plausible_author(author: Any) -> bool:
+    if not isinstance(author, str):
+        return False
+    name = author.strip()
+    return (
+        2 <= len(name) <= 100
+        and len(name.split()) <= _MAX_AUTHOR_WORDS
+        and bool(_AUTHOR_RE.match(name))
+    )
+
+
+def _assess_completeness(bibliographic_info: dict[str, Any]) -> bool | None:
+    """
+    Local completeness check: True complete, False incomplete (keep reading
+    pages), None when only the LLM judge can tell.
+    """
+    missing_fields = _find_missing_fields(bibliographic_info)
+    if any(field != "journal" for field in missing_fields):
+        return False
+    if missing_fields:
+        return None  # preprints and theses have no journal
+    abstract = bibliographic_info["abstract"]
+    if not _SENTENCE_END_RE.search(abstract):
+        return None  # may continue on the next page, or end in a formula/URL
+    if len(abstract) < settings.bibliographic_abstract_min_chars:
+        return None  # short abstracts exist, but so do truncated ones
+    authors = bibliographic_info["authors"]
+    if not all(_is_plausible_author(author) for author in authors):
+        return None  # affiliations or sentences picked up as authors
+    return True
 
 
 def _is_complete_response(text: str) -> bool:
@@ -115,70 +164,191 @@ def _is_complete_response(text: str) -> bool:
     return normalized.startswith("complete")
 
 
+async def _judge_completeness(
+    vllm_client: VllmClient, ocr_text: str, bibliographic_info: dict[str, Any]
+) -> bool:
+    completion_prompt = get_bibliographic_info_determine_completion_prompt()
+    completion_payload = await vllm_client.chat(
+        system_prompt=str(completion_prompt),
+        user_prompt=(
+            "OCR TEXT:\n"
+            f"{ocr_text}\n\n"
+            "BIBLIOGRAPHIC INFORMATION JSON:\n"
+            f"{json.dumps(bibliographic_info, ensure_ascii=True)}"
+        ),
+    )
+    completion_text = (
+        completion_payload.get("choices", [{}])[0]
+        .get("message", {})
+        .get("content", "")
+    )
+    return _is_complete_response(str(completion_text))
+
+
+async def _extract_from_text(
+    vllm_client: VllmClient,
+    ocr_text: str,
+    retry_focus: list[str],
+    bibliographic_info: dict[str, Any],
+) -> tuple[str, dict[str, Any], str]:
+    """
+    One extraction call: `(raw_text, normalized_info, prompt_hash)` for
+    `ocr_text`.
+    """
+    previous_info = None
+    if any(bibliographic_info.get(key) for key in REQUIRED_FIELDS):
+        previous_info = json.dumps(bibliographic_info, ensure_ascii=True)
+    prompt = get_bibliographic_info_extraction_prompt(
+        ocr_text, retry_focus, previous_info
+    )
+    request = {
+        "system_prompt": prompt,
+        "user_prompt": "Extract the bibliographic information",
+        "output_schema": LlmOutputSchema.BIBLIOGRAPHIC_INFO,
+    }
+    response_payload = await vllm_client.chat(
+        **request, task_type=VllmTaskType.BIBLIOGRAPHIC_INFO_EXTRACTION
+    )
+
+    # extract response from vLLM
+    raw_text = (
+        response_payload.get("choices", [{}])[0]
+        .get("message", {})
+        .get("content", "")
+    )
+    raw_text = str(raw_text).strip()
+    return (
+        raw_text,
+        _normalize_bibliographic_info(_extract_json(raw_text) or {}),
+        vllm_client.prompt_hash(**request),
+    )
+
+
+async def _is_complete(
+    vllm_client: VllmClient, ocr_text: str, bibliographic_info: dict[str, Any]
+) -> bool:
+    # check completeness, asking the LLM only when the heuristics cannot tell
+    assessment = _assess_completeness(bibliographic_info)
+    if assessment is not None:
+        return assessment
+    if not settings.bibliographic_llm_judge_enabled:
+        return True
+    set_log("Bibliographic completeness ambiguous, asking the LLM judge")
+    return await _judge_completeness(vllm_client, ocr_text, bibliographic_info)
+
+
+async def _extract_speculative(
+    vllm_client: VllmClient,
+    page_texts: list[str],
+    retry_focus: list[str],
+    bibliographic_info: dict[str, Any],
+    prefill: dict[str, Any],
+) -> tuple[dict[str, Any], str, str | None, bool]:
+    """
+    Send the 1..len(page_texts) page prefixes at once and settle on the
+    smallest one whose merged result is complete; the larger ones still in
+    flight are cancelled.
+    """
+    tasks = [
+        asyncio.create_task(
+            _extract_from_text(
+                vllm_client,
+                "\n\n".join(page_texts[:size]),
+                retry_focus,
+                bibliographic_info,
+            )
+        )
+        for size in range(1, len(page_texts) + 1)
+    ]
+    raw_text = ""
+    prompt_hash = None
+    try:
+        for size, task in enumerate(tasks, start=1):
+            raw_text, incoming, prompt_hash = await task
+            bibliographic_info = _apply_prefill(
+                _merge_bibliographic_info(bibliographic_info, incoming), prefill
+            )
+            prefix_text = "\n\n".join(page_texts[:size])
+            if await _is_complete(vllm_client, prefix_text, bibliographic_info):
+                set_log(
+                    f"Speculative bibliographic extraction complete at {size} of "
+                    f"{len(tasks)} page prefixes"
+                )
+                return bibliographic_info, raw_text, prompt_hash, True
+        return bibliographic_info, raw_text, prompt_hash, False
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
 async def extract_bibliographic_info(state: DocumentState) -> DocumentState:
     set_log("Extract_bibliographic_info node")
     ocr_pages = state.get("ocr_pages") or []
     retry_focus = state.get("retry_focus") or []
+    prefill = state.get("bibliographic_prefill") or {}
+    hints = state.get("bibliographic_hints") or {}
 
     vllm_client = VllmClient(port="", timeout_s=300.0)
-    bibliographic_info: dict[str, Any] = _normalize_bibliographic_info(
-        state.get("bibliographic_info") or {}
+    bibliographic_info: dict[str, Any] = _apply_prefill(
+        _normalize_bibliographic_info(state.get("bibliographic_info") or {}), prefill
     )
     raw_text = ""
-    bibliographic_info_complete = False
-
-    async with httpx.AsyncClient(timeout=300.0, trust_env=False) as client:
-        # limit to first 5 pages to extract bibliographic info
-        ocr_page_len = 5 if len(ocr_pages) > 5 else len(ocr_pages)
-        for page_count in range(1, ocr_page_len + 1):
-            ocr_text = _collect_ocr_text(ocr_pages, page_count)
-            if not ocr_text:
-                continue
-
-            # call VLLM to extract bibliographic info
-            prompt = get_bibliographic_info_extraction_prompt(ocr_text, retry_focus)
-            response_payload = await vllm_client.chat(
-                client=client,
-                system_prompt=prompt,
-                user_prompt="Extract the bibliographic information",
-                task_type=VllmTaskType.BIBLIOGRAPHIC_INFO_EXTRACTION,
-            )
-
-            # extract response from vLLM
-            raw_text = (
-                response_payload.get("choices", [{}])[0]
-                .get("message", {})
-                .get("content", "")
-            )
-            raw_text = str(raw_text).strip()
-            bibliographic_info_json = _extract_json(raw_text) or {}
-            bibliographic_info = _merge_bibliographic_info(
-                bibliographic_info,
-                _normalize_bibliographic_info(bibliographic_info_json),
-            )
-
-            # check completeness
-            completion_prompt = get_bibliographic_info_determine_completion_prompt()
-            completion_payload = await vllm_client.chat(
-                client=client,
-                system_prompt=str(completion_prompt),
-                user_prompt=(
-                    "OCR TEXT:\n"
-                    f"{ocr_text}\n\n"
-                    "BIBLIOGRAPHIC INFORMATION JSON:\n"
-                    f"{json.dumps(bibliographic_info, ensure_ascii=True)}"
-                ),
-            )
-            completion_text = (
-                completion_payload.get("choices", [{}])[0]
-                .get("message", {})
-                .get("content", "")
-            )
-
-            # determine if bibliographic info is complete
-            bibliographic_info_complete = _is_complete_response(str(completion_text))
-            if bibliographic_info_complete:
-                break
+    prompt_hash = None
+    # metadata / DOI index may already have everything: no LLM call at all
+    bibliographic_info_complete = bool(prefill) and (
+        _assess_completeness(bibliographic_info) is True
+    )
+    if bibliographic_info_complete:
+        set_log("Bibliographic info complete from PDF metadata, skipping the LLM")
+    elif prefill and not retry_focus:
+        # ask the LLM only for what the prefill did not find
+        retry_focus = _find_missing_fields(bibliographic_info)
+    if hints and not bibliographic_info_complete:
+        # kept unless the LLM answers a field; never part of the check above
+        bibliographic_info = _apply_prefill(
+            _merge_bibliographic_info(hints, bibliographic_info), prefill
+        )
+
+    # limit to the first pages to extract bibliographic info
+    page_texts = [
+        _page_text(page) for page in ocr_pages[: settings.bibliographic_max_pages]
+    ]
+    page_texts = [text for text in page_texts if text]
+
+    next_page = 0
+    speculative = min(settings.bibliographic_speculative_prefixes, len(page_texts))
+    if speculative > 1 and not bibliographic_info_complete:
+        (
+            bibliographic_info,
+            raw_text,
+            prompt_hash,
+            bibliographic_info_complete,
+        ) = await _extract_speculative(
+            vllm_client,
+            page_texts[:speculative],
+            retry_focus,
+            bibliographic_info,
+            prefill,
+        )
+        next_page = speculative
+
+    # each call sends only the next page plus what was extracted so far; the
+    # judge sees every page read so far
+    for page_index in range(next_page, len(page_texts)):
+        if bibliographic_info_complete:
+            break
+        raw_text, incoming, prompt_hash = await _extract_from_text(
+            vllm_client, page_texts[page_index], retry_focus, bibliographic_info
+        )
+        bibliographic_info = _apply_prefill(
+            _merge_bibliographic_info(bibliographic_info, incoming), prefill
+        )
+        bibliographic_info_complete = await _is_complete(
+            vllm_client,
+            "\n\n".join(page_texts[: page_index + 1]),
+            bibliographic_info,
+        )
 
     missing_fields = _find_missing_fields(bibliographic_info)
     if not bibliographic_info_complete and not missing_fields:
@@ -187,6 +357,7 @@ async def extract_bibliographic_info(state: DocumentState) -> DocumentState:
     return {
         "bibliographic_info": bibliographic_info,
         "bibliographic_info_raw": raw_text,
+        "bibliographic_prompt_hash": prompt_hash,
         "missing_fields": missing_fields,
         "bibliographic_info_complete": bibliographic_info_complete,
     }
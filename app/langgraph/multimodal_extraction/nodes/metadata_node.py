@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from app.langgraph.multimodal_extraction.state import DocumentState
+from app.core.config import settings
+from app.core.logger import set_log
+from app.utils.bibliographic_index import (
+    get_bibliographic_index,
+    record_to_bibliographic_info,
+)
+from app.utils.pdf_metadata import detect_bibliographic_fields
+from app.utils.pdf_render import get_pdf_renderer
+
+
+async def _lookup_index(doi: str) -> dict[str, Any] | None:
+    index = get_bibliographic_index()
+    if index is None:
+        return None
+    record = await asyncio.to_thread(index.lookup, doi)
+    return record_to_bibliographic_info(record) if record else None
+
+
+async def prefill_bibliographic_info(state: DocumentState) -> DocumentState:
+    """
+    Zero-LLM pass, run alongside the first OCR pages: bibliographic fields
+    read with high confidence from the PDF metadata, the first page's text
+    layer and the local DOI index. The LLM is then only asked for the rest.
+
+    A year found only next to a copyright / publication marker is a hint:
+    the LLM may fill or override it, and it never makes the prefill complete.
+    """
+    set_log("Prefill_bibliographic_info node")
+    pdf_bytes = state.get("pdf_bytes")
+    if not settings.bibliographic_prefill_enabled or not pdf_bytes:
+        return {"bibliographic_prefill": {}, "bibliographic_hints": {}}
+
+    try:
+        pdf = await get_pdf_renderer().metadata(pdf_bytes)
+    except Exception as exc:
+        # best effort: an unreadable PDF is reported by the OCR branch
+        set_log(f"PDF metadata unavailable: {exc}", level="warning")
+        return {"bibliographic_prefill": {}, "bibliographic_hints": {}}
+
+    detected = detect_bibliographic_fields(pdf["metadata"], pdf["first_page_text"])
+    prefill = dict(detected["fields"])
+    sources = dict(detected["sources"])
+    doi = detected["doi"]
+    if doi:
+        record = await _lookup_index(doi)
+        if record:
+            # a DOI match is authoritative for every field it has
+            prefill.update(record)
+            sources.update({key: "bibliographic_index" for key in record})
+
+    hints: dict[str, Any] = {}
+    if sources.get("year") == "page_text":
+        hints["year"] = prefill.pop("year")
+
+    set_log(f"Bibliographic prefill: doi={doi} fields={sources}")
+    return {
+        "bibliographic_prefill": prefill,
+        "bibliographic_hints": hints,
+        "doi": doi or "",
+    }
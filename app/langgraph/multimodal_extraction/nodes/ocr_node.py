@@ -1,123 +1,322 @@
 from __future__ import annotations
 
 import asyncio
+import base64
 import json
 import httpx
 from typing import Any
+from uuid import uuid4
 
 from app.prompts.multimodal_extraction import (
     get_vlm_ocr_system_prompt,
 )
 from app.langgraph.multimodal_extraction.state import DocumentState
 from app.clients.vllm_client import VllmClient
+from app.core.config import settings
 from app.core.logger import set_log
+from app.enums.common import LlmOutputSchema
 from app.enums.multimodal_extraction import VllmTaskType
+from app.schemas.llm_outputs import parse_structured_output
+from app.utils.ocr_cache import get_cached_ocr_page, set_cached_ocr_page
+from app.utils.pdf_render import RenderDocument, get_pdf_renderer
+from app.utils.stream_invoke import emit_node_event, emit_node_progress
 
 
-async def run_ocr(state: DocumentState) -> DocumentState:
-    set_log("Run_ocr node")
-    page_images_b64 = state.get("page_images_b64", [])
-    if not page_images_b64:
-        return {"ocr_pages": [], "ocr_text": ""}
+def _text_layer_thresholds() -> dict[str, Any] | None:
+    if not settings.pdf_text_layer_enabled:
+        return None
+    return {
+        "min_chars": settings.pdf_text_layer_min_chars,
+        "min_glyph_coverage": settings.pdf_text_layer_min_glyph_coverage,
+        "max_image_ratio": settings.pdf_text_layer_max_image_ratio,
+    }
+
+
+def _image_encoding() -> dict[str, Any]:
+    return {
+        "format": settings.pdf_image_format,
+        "quality": settings.pdf_image_quality,
+        "grayscale": settings.pdf_image_grayscale,
+        "crop": settings.pdf_image_crop,
+        "crop_margin_pt": settings.pdf_image_crop_margin_pt,
+        "adaptive_dpi": settings.pdf_image_adaptive_dpi,
+        "min_dpi": settings.pdf_image_min_dpi,
+        "max_dpi": settings.pdf_image_max_dpi,
+        "target_long_side_px": settings.pdf_image_target_long_side_px,
+        "dense_chars_per_sq_in": settings.pdf_image_dense_chars_per_sq_in,
+    }
+
+
+async def _start_ocr(
+    state: DocumentState, *, head_pages: int
+) -> tuple[DocumentState, asyncio.Task | None]:
+    """
+    Render + OCR pipeline over the whole document: page N is rendered while
+    earlier pages are being OCR'd, and each image is dropped as soon as its
+    OCR finishes. At most OCR_PIPELINE_WINDOW pages hold an image at once;
+    images never enter the graph state.
+
+    Returns once the first `head_pages` pages are done, with the task still
+    running the rest of the document (None when nothing is left). The rest
+    queue on the same window right behind the head pages, so they start as
+    soon as head pages free their slots.
+
+    Streams a `node_progress` event per rendered page and a `page_result`
+    event per finished page (custom stream mode).
+    """
+    pdf_bytes = state.get("pdf_bytes")
+    if not pdf_bytes:
+        return {"ocr_pages": [], "page_count": 0}, None
 
     system_prompt = get_vlm_ocr_system_prompt()
     user_prompt = state.get("prompt") or "Extract the content of this page."
 
-    # page_images_b64 = page_images_b64[:3]
-    page_results: list[dict] = []
-
-    vllm_client = VllmClient(
-        port="", timeout_s=300.0
-    )  # port is empty when run on runpod
-    semaphore = asyncio.Semaphore(4)
+    # port is empty when run on runpod. Page concurrency is bounded by the
+    # process-wide adaptive limiter inside VllmClient, shared with other uploads.
+    vllm_client = VllmClient(port="", timeout_s=300.0)
 
     def _extract_json_obj(text: str) -> dict[str, Any] | None:
-        cleaned = text.strip()
-        if cleaned.startswith("```"):
-            cleaned = cleaned.strip("`")
-        start = cleaned.find("{")
-        end = cleaned.rfind("}")
-        if start == -1 or end == -1 or end <= start:
-            return None
-        snippet = cleaned[start : end + 1]
         try:
-            obj = json.loads(snippet)
-            return obj if isinstance(obj, dict) else None
-        except json.JSONDecodeError:
+            return parse_structured_output(LlmOutputSchema.OCR_PAGE, text)
+        except ValueError:
             return None
 
-    async def _process_page(page_index: int, image_b64: str) -> dict:
-        async with semaphore:
-            try:
-                resp = await vllm_client.chat(
-                    client,
-                    system_prompt=system_prompt,
-                    user_prompt=f"Page {page_index}: {user_prompt}",
-                    image_b64=image_b64,
-                    task_type=VllmTaskType.OCR,
-                )
+    async def _process_page(page_index: int, image_b64: str, image_mime: str) -> dict:
+        try:
+            resp = await vllm_client.chat(
+                system_prompt=system_prompt,
+                user_prompt=f"Page {page_index}: {user_prompt}",
+                image_b64=image_b64,
+                image_mime=image_mime,
+                task_type=VllmTaskType.OCR,
+                output_schema=LlmOutputSchema.OCR_PAGE,
+            )
 
-                raw = resp.get("choices", [{}])[0].get("message", {}).get("content", "")
-                raw_text = raw if isinstance(raw, str) else json.dumps(raw)
-
-                parsed = _extract_json_obj(raw_text)
-                if parsed is None:
-                    # 모델이 JSON 외 텍스트를 섞거나, 깨진 JSON을 줄 때가 흔해서
-                    # 원문 일부를 남겨 원인 파악 가능하게 한다.
-                    return {
-                        "page": page_index,
-                        "error": "Invalid JSON from model",
-                        "error_type": "json_decode",
-                        "raw_preview": str(raw_text)[:500],
-                    }
+            raw = resp.get("choices", [{}])[0].get("message", {}).get("content", "")
+            raw_text = raw if isinstance(raw, str) else json.dumps(raw)
 
-                parsed["page"] = page_index
-                return parsed
-            except httpx.TimeoutException as e:
+            parsed = _extract_json_obj(raw_text)
+            if parsed is None:
+                # 모델이 JSON 외 텍스트를 섞거나, 깨진 JSON을 줄 때가 흔해서
+                # 원문 일부를 남겨 원인 파악 가능하게 한다.
                 return {
                     "page": page_index,
-                    "error": str(e),
-                    "error_type": "timeout",
+                    "error": "Invalid JSON from model",
+                    "error_type": "json_decode",
+                    "raw_preview": str(raw_text)[:500],
                 }
-            except httpx.HTTPStatusError as e:
+
+            parsed["page"] = page_index
+            parsed["source"] = "vlm"
+            return parsed
+        except httpx.TimeoutException as e:
+            return {
+                "page": page_index,
+                "error": str(e),
+                "error_type": "timeout",
+            }
+        except httpx.HTTPStatusError as e:
+            body_preview = ""
+            try:
+                body_preview = (e.response.text or "")[:500]
+            except Exception:
                 body_preview = ""
-                try:
-                    body_preview = (e.response.text or "")[:500]
-                except Exception:
-                    body_preview = ""
-                return {
-                    "page": page_index,
-                    "error": str(e),
-                    "error_type": "http_status",
-                    "status_code": getattr(e.response, "status_code", None),
-                    "body_preview": body_preview,
-                }
-            except Exception as e:
-                return {
-                    "page": page_index,
-                    "error": str(e),
-                    "error_type": type(e).__name__,
-                }
+            return {
+                "page": page_index,
+                "error": str(e),
+                "error_type": "http_status",
+                "status_code": getattr(e.response, "status_code", None),
+                "body_preview": body_preview,
+            }
+        except Exception as e:
+            return {
+                "page": page_index,
+                "error": str(e),
+                "error_type": type(e).__name__,
+            }
+
+    text_layer = _text_layer_thresholds()
+    encoding = _image_encoding()
+    # Semaphore wakes waiters in order, so pages enter the window in page order
+    window = asyncio.Semaphore(max(1, settings.ocr_pipeline_window))
+    text_layer_count = 0
+    cache_hits = 0
+
+    async def _render_and_process_page(
+        document: RenderDocument, index: int, node: str
+    ) -> dict:
+        nonlocal text_layer_count, cache_hits
+        async with window:
+            page = await document.process_page(
+                index,
+                scale=settings.pdf_render_scale,
+                text_layer=text_layer,
+                encoding=encoding,
+            )
+            emit_node_progress(
+                node=node,
+                message="page rendered",
+                page=page["page"],
+                stage="text_layer" if "content" in page else "rasterized",
+            )
+            if "content" in page:
+                # born-digital page: same shape as the VLM output, no GPU call
+                text_layer_count += 1
+                return {**page["content"], "page": page["page"], "source": "text_layer"}
 
-    async with httpx.AsyncClient(timeout=300.0, trust_env=False) as client:
-        tasks = [
-            _process_page(page_index=i, image_b64=img)
-            for i, img in enumerate(page_images_b64, start=1)
-        ]
-
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    page_results: list[dict] = []
-    for i, r in enumerate(results, start=1):
-        if isinstance(r, Exception):
-            set_log(f"OCR failed for page {i}: {type(r).__name__}: {r}")
-            # 실패한 페이지도 결과 리스트에 남겨서 후처리/재시도 가능하게
-            page_results.append(
-                {"page": i, "error": str(r), "error_type": type(r).__name__}
+            # re-uploads and revised PDFs: unchanged pages skip the VLM
+            image_sha256 = page["image_sha256"]
+            cached = await get_cached_ocr_page(
+                image_sha256, system_prompt, user_prompt
             )
-        else:
-            page_results.append(r)
+            if cached is not None:
+                cache_hits += 1
+                return {**cached, "page": page["page"], "source": "ocr_cache"}
+
+            image_b64 = base64.b64encode(page.pop("image")).decode("ascii")
+            result = await _process_page(
+                page_index=page["page"], image_b64=image_b64, image_mime=page["mime"]
+            )
+            if "error" not in result:
+                await set_cached_ocr_page(
+                    image_sha256, system_prompt, user_prompt, result
+                )
+            return result
+
+    async def _ocr_page(document: RenderDocument, index: int, node: str) -> dict:
+        page_number = index + 1
+        try:
+            result = await _render_and_process_page(document, index, node)
+        except Exception as exc:
+            error = {
+                "page": page_number,
+                "error": str(exc),
+                "error_type": type(exc).__name__,
+            }
+            emit_node_event(
+                event="page_result", node=node, page=page_number, result=error
+            )
+            raise
+        emit_node_event(event="page_result", node=node, page=page_number, result=result)
+        return result
+
+    def _collect(results: list, first_page: int) -> list[dict]:
+        page_results: list[dict] = []
+        for i, r in enumerate(results, start=first_page + 1):
+            if isinstance(r, Exception):
+                set_log(f"OCR failed for page {i}: {type(r).__name__}: {r}")
+                # 실패한 페이지도 결과 리스트에 남겨서 후처리/재시도 가능하게
+                page_results.append(
+                    {"page": i, "error": str(r), "error_type": type(r).__name__}
+                )
+            else:
+                page_results.append(r)
+        return page_results
+
+    head_done: asyncio.Future[DocumentState] = (
+        asyncio.get_running_loop().create_future()
+    )
+
+    async def _pipeline() -> list[dict]:
+        # raises ValueError for an unreadable PDF
+        async with get_pdf_renderer().document(pdf_bytes) as document:
+            if not document.page_count:
+                raise ValueError("PDF has no pages.")
+            page_count = document.page_count
+            head_last = min(page_count, head_pages)
+            emit_node_progress(
+                node="ocr_head",
+                message="rendering pages",
+                page_count=page_count,
+                first_page=1,
+                last_page=head_last,
+            )
+            # tasks start in creation order, so head pages take the window first
+            head = [
+                asyncio.create_task(_ocr_page(document, i, "ocr_head"))
+                for i in range(head_last)
+            ]
+            rest = [
+                asyncio.create_task(_ocr_page(document, i, "ocr_rest"))
+                for i in range(head_last, page_count)
+            ]
+            try:
+                head_results = await asyncio.gather(*head, return_exceptions=True)
+                head_done.set_result(
+                    {
+                        "ocr_pages": _collect(head_results, 0),
+                        "page_count": page_count,
+                    }
+                )
+                rest_results = await asyncio.gather(*rest, return_exceptions=True)
+            finally:
+                for task in rest:
+                    task.cancel()
+
+        set_log(
+            f"Completed OCR for {page_count} pages "
+            f"({text_layer_count} from the text layer, {cache_hits} from the OCR cache)"
+        )
+        return _collect(rest_results, head_last)
+
+    pipeline = asyncio.create_task(_pipeline())
+    try:
+        await asyncio.wait({head_done, pipeline}, return_when=asyncio.FIRST_COMPLETED)
+        if not head_done.done():
+            pipeline.result()  # raises the pipeline's error
+        head = head_done.result()
+        if pipeline.done():
+            pipeline.result()
+            return head, None
+        return head, pipeline
+    except BaseException:
+        pipeline.cancel()
+        raise
+
+
+# ocr_head hands the still-running tail of its pipeline to ocr_rest by id
+_rest_runs: dict[str, asyncio.Task] = {}
+# drop a tail nobody collected, e.g. when the graph failed between the nodes
+_REST_RUN_TTL_S = 600.0
+
+
+def _register_rest_run(task: asyncio.Task) -> str:
+    run_id = uuid4().hex
+    _rest_runs[run_id] = task
+
+    def _expire(done: asyncio.Task) -> None:
+        if not done.cancelled():
+            done.exception()  # retrieved by ocr_rest, or by nobody
+        asyncio.get_running_loop().call_later(
+            _REST_RUN_TTL_S, _rest_runs.pop, run_id, None
+        )
+
+    task.add_done_callback(_expire)
+    return run_id
+
+
+async def run_ocr_head(state: DocumentState) -> DocumentState:
+    """
+    OCR the pages bibliographic extraction reads; the rest of the document
+    keeps going in the background for ocr_rest.
+    """
+    set_log("Run_ocr_head node")
+    head, rest = await _start_ocr(state, head_pages=settings.bibliographic_max_pages)
+    if rest is not None:
+        head["ocr_rest_run"] = _register_rest_run(rest)
+    return head
+
 
-    set_log(f"Completed OCR for page document ({len(page_images_b64)} pages)")
+async def run_ocr_rest(state: DocumentState) -> DocumentState:
+    """Collect the remaining pages; runs alongside bibliographic extraction."""
+    set_log("Run_ocr_rest node")
+    head_pages = list(state.get("ocr_pages") or [])
+    rest = _rest_runs.pop(state.get("ocr_rest_run") or "", None)
+    if rest is None:
+        return {"ocr_pages": head_pages}
 
-    return {"ocr_pages": page_results}
+    try:
+        rest_pages = await rest
+    finally:
+        rest.cancel()
+    return {"ocr_pages": head_pages + rest_pages}
@@ -2,14 +2,32 @@ from typing import TypedDict
 
 
 class DocumentState(TypedDict, total=False):
-    page_images_b64: list[str]
+    pdf_bytes: bytes  # pages are rendered inside the OCR nodes, never kept in state
     prompt: str
     ocr_pages: list[dict]
+    page_count: int
+    ocr_rest_run: str  # id of the page pipeline ocr_head leaves running for ocr_rest
+    bibliographic_prefill: dict  # high-confidence fields found without the LLM
+    bibliographic_hints: dict  # lower-confidence fields the LLM may fill or override
+    doi: str
     bibliographic_info: dict
     bibliographic_info_raw: str
+    bibliographic_prompt_hash: str | None  # of the call that produced the raw output
     missing_fields: list[str]
     retry_focus: list[str]
     attempts: int
     max_attempts: int
     bibliographic_info_complete: bool
     embedding: list[float]
+
+
+class BibliographicOutput(TypedDict, total=False):
+    # what the bibliographic branch hands back; ocr_pages stays with the OCR branch
+    bibliographic_info: dict
+    bibliographic_info_raw: str
+    bibliographic_prompt_hash: str | None  # of the call that produced the raw output
+    missing_fields: list[str]
+    retry_focus: list[str]
+    attempts: int
+    bibliographic_info_complete: bool
+    embedding: list[float]
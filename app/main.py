@@ -1,16 +1,54 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.clients.http_pool import get_http_pool
+from app.clients.load_balancer import get_vllm_replica_pool
+from app.clients.vllm_client import VllmClient
 from app.core.config import settings
+from app.enums.common import HttpBackend
 from app.routers.multimodal_extraction_route import (
     router as multimodal_extraction_router,
 )
 from app.routers.paper_review_route import router as paper_review_router
 from app.routers.cr_extraction_route import router as cr_extraction_router
+from app.routers.system_route import router as system_router
+from app.routers.jobs_route import router as jobs_router
 from app.core.logger import set_log
+from app.utils.pdf_render import get_pdf_renderer
+from app.utils.token_budget import discover_max_model_len
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # one pooled http client per backend for the whole app lifetime
+    http_pool = get_http_pool()
+    http_pool.open()
+    # health-check vLLM replicas only when several are configured
+    replica_pool = get_vllm_replica_pool() if settings.vllm_replicas else None
+    if replica_pool is not None:
+        replica_pool.start_health_checks(http_pool.get(HttpBackend.VLLM))
+    # same endpoint as the graph nodes' VllmClient(port=""), bare base URL or replicas
+    context_discovery = asyncio.create_task(
+        discover_max_model_len(
+            http_pool.get(HttpBackend.VLLM), VllmClient(port="").replicas
+        )
+    )
+    try:
+        yield
+    finally:
+        context_discovery.cancel()
+        if replica_pool is not None:
+            await replica_pool.stop_health_checks()
+        await http_pool.aclose()
+        get_pdf_renderer().shutdown()
+
 
 is_prod = settings.is_production
 app = FastAPI(
     title=settings.app_name,
+    lifespan=lifespan,
     docs_url=None if is_prod else "/docs",
     redoc_url=None if is_prod else "/redoc",
     openapi_url=None if is_prod else "/openapi.json",
@@ -37,6 +75,8 @@ app.add_middleware(
 app.include_router(multimodal_extraction_router, prefix=settings.api_prefix)
 app.include_router(paper_review_router, prefix=settings.api_prefix)
 app.include_router(cr_extraction_router, prefix=settings.api_prefix)
+app.include_router(system_router, prefix=settings.api_prefix)
+app.include_router(jobs_router, prefix=settings.api_prefix)
 set_log("Routers loaded successfully")
 
 
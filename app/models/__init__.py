@@ -4,6 +4,7 @@ from app.models.papers_staging import PapersStaging
 from app.models.extractions import Extractions
 from app.models.evaluations import Evaluations
 from app.models.agents_logs import AgentLogs
+from app.models.jobs import Jobs
 
 __all__ = [
 	"Base",
@@ -12,4 +13,5 @@ __all__ = [
 	"Extractions",
 	"Evaluations",
 	"AgentLogs",
+	"Jobs",
 ]
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import Text, DateTime, func, text, ForeignKey
+from sqlalchemy import Text, Integer, DateTime, func, text, ForeignKey
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
@@ -26,6 +26,12 @@ class AgentLogs(Base):
         UUID(as_uuid=True),
         ForeignKey("cr_soles.extractions.id", ondelete="SET NULL"),
     )
+    # the staging row the output belongs to; paper_id stays NULL until approval
+    staging_idx: Mapped[int | None] = mapped_column(
+        Integer,
+        ForeignKey("cr_soles.papers_staging.idx", ondelete="SET NULL"),
+        index=True,
+    )
     agent_name: Mapped[str] = mapped_column(Text, nullable=False)
     raw_output: Mapped[str | None] = mapped_column(Text)
     cleaned_output: Mapped[dict | None] = mapped_column(JSONB)
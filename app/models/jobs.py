@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import Text, Integer, DateTime, LargeBinary, Index, func, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db import Base
+
+
+class Jobs(Base):
+    """Ingestion job queue, claimed by workers with FOR UPDATE SKIP LOCKED."""
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # claim query: queued jobs that are due, and running jobs whose lease expired
+        Index("ix_cr_soles_jobs_status_run_after", "status", "run_after"),
+        {"schema": "cr_soles"},
+    )
+
+    id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        server_default=text("gen_random_uuid()"),
+    )
+    job_type: Mapped[str] = mapped_column(Text, nullable=False)
+    # queued -> running -> succeeded | failed (running -> queued on retry)
+    status: Mapped[str] = mapped_column(
+        Text, nullable=False, server_default=text("'queued'")
+    )
+    # job arguments, e.g. {"ingestion_source", "prompt", "content_type", "filename"}
+    payload: Mapped[dict[str, Any]] = mapped_column(
+        JSONB, nullable=False, server_default=text("'{}'::jsonb")
+    )
+    # the upload itself, so any worker on any machine can run the job;
+    # deferred so claims and status reads don't pull the blob
+    pdf_bytes: Mapped[bytes | None] = mapped_column(LargeBinary, deferred=True)
+    attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, server_default=text("0")
+    )
+    max_attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, server_default=text("3")
+    )
+    # not claimed before this time (retry backoff)
+    run_after: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
+    # lease of the worker running the job; renewed while it runs, and the
+    # job is claimable again once it lapses (visibility timeout)
+    locked_by: Mapped[str | None] = mapped_column(Text)
+    locked_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    result: Mapped[dict[str, Any] | None] = mapped_column(JSONB)
+    error: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
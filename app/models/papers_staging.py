@@ -44,6 +44,9 @@ class PapersStaging(Base):
         nullable=True,
     )
     pdf_url: Mapped[str | None] = mapped_column(Text)
+    # exact-duplicate checks on upload (see utils.pdf_render.fingerprint)
+    pdf_sha256: Mapped[str | None] = mapped_column(Text, index=True)
+    text_fingerprint: Mapped[str | None] = mapped_column(Text, index=True)
     ingestion_source: Mapped[str | None] = mapped_column(Text)
     ingestion_timestamp: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -4,29 +4,27 @@ import json
 from typing import Any
 
 
-def _build_pages_context(
-    pages_content: list[dict[str, Any]], max_pages: int = 8
-) -> str:
-    parts: list[str] = []
-    for item in pages_content[:max_pages]:
-        page = item.get("page")
-        text = str(item.get("text") or "").strip()
-        tables = item.get("tables") or []
+# Prompt layout (vLLM automatic prefix caching):
+#   system = document prefix, byte-identical for every call on the same paper
+#   user   = node-specific task (schema, rules, candidate, focus pages)
+# Anything that differs between nodes must stay out of the prefix.
 
-        part = f"[PAGE {page}]"
-        if text:
-            part += f"\nTEXT:\n{text[:3000]}"
-        if tables:
-            part += f"\nTABLES:\n{json.dumps(tables, ensure_ascii=False)[:2000]}"
-        parts.append(part)
 
-    return "\n\n".join(parts)
+def get_document_system_prompt(pages_context: str) -> str:
+    return (
+        "You extract cognitive reserve metadata from a research paper.\n"
+        "The paper is given below as [PAGE n] blocks with TEXT and TABLES.\n"
+        "Each request after the paper asks for one extraction task.\n"
+        "Return JSON only. No markdown. No explanation.\n\n"
+        "[DOCUMENT]\n"
+        f"{pages_context}\n"
+        "[END DOCUMENT]"
+    )
 
 
-def get_population_system_prompt() -> str:
+def get_population_task_prompt() -> str:
     return """
-You extract study population metadata for cognitive reserve papers.
-Return JSON only. No markdown. No explanation.
+Task: extract study population metadata.
 
 Output schema:
 {
@@ -48,26 +46,21 @@ Rules:
 """.strip()
 
 
-def get_population_user_prompt(
-    pages_content: list[dict[str, Any]],
-    extra_instruction: str | None = None,
-) -> str:
-    context = _build_pages_context(pages_content)
+def get_population_user_prompt(extra_instruction: str | None = None) -> str:
     instruction = (
-        f"Additional instruction: {extra_instruction}\n\n" if extra_instruction else ""
+        f"\n\nAdditional instruction: {extra_instruction}" if extra_instruction else ""
     )
     return (
-        "Extract the study population information from the pages below.\n"
-        "Prioritize Methods, Participants, Sample, and Table 1 style content.\n\n"
+        f"{get_population_task_prompt()}\n\n"
+        "Extract the study population information from the document.\n"
+        "Prioritize Methods, Participants, Sample, and Table 1 style content."
         f"{instruction}"
-        f"{context}\n"
     )
 
 
-def get_instrument_system_prompt() -> str:
+def get_instrument_task_prompt() -> str:
     return """
-You extract one primary cognitive reserve instrument or proxy set.
-Return JSON only. No markdown. No explanation.
+Task: extract one primary cognitive reserve instrument or proxy set.
 
 Output schema:
 {
@@ -91,51 +84,54 @@ Rules:
 
 
 def get_instrument_user_prompt(
-    pages_content: list[dict[str, Any]],
     population: dict[str, Any] | None = None,
     extra_instruction: str | None = None,
 ) -> str:
-    context = _build_pages_context(pages_content)
     population_text = json.dumps(population or {}, ensure_ascii=False)
     instruction = (
-        f"Additional instruction: {extra_instruction}\n" if extra_instruction else ""
+        f"\nAdditional instruction: {extra_instruction}" if extra_instruction else ""
     )
     return (
-        "Extract one primary cognitive reserve instrument or proxy set from the pages below.\n"
+        f"{get_instrument_task_prompt()}\n\n"
+        "Extract one primary cognitive reserve instrument or proxy set from the document.\n"
         "Prioritize questionnaire names, assessed CR proxies, cognitive scales, and scoring/time fields.\n"
+        f"Population context: {population_text}"
         f"{instruction}"
-        f"Population context: {population_text}\n\n"
-        f"{context}\n"
     )
 
 
+def _format_focus_pages(focus_pages: list[Any]) -> str:
+    pages = [str(page) for page in focus_pages if page is not None]
+    return ", ".join(pages) if pages else "all"
+
+
 def get_population_verify_prompt(
-    pages_content: list[dict[str, Any]],
     candidate: dict[str, Any],
+    focus_pages: list[Any],
 ) -> str:
-    context = _build_pages_context(pages_content, max_pages=len(pages_content))
     candidate_json = json.dumps(candidate, ensure_ascii=False)
     return (
-        "Re-validate the population extraction against only the pages below.\n"
+        f"{get_population_task_prompt()}\n\n"
+        "Re-validate the population extraction against only pages "
+        f"{_format_focus_pages(focus_pages)} of the document.\n"
         "Keep a field only if it is directly supported by the page text.\n"
         "Evidence quotes must be exact substrings from the page text.\n"
         "Return the same JSON schema.\n\n"
-        f"CANDIDATE:\n{candidate_json}\n\n"
-        f"{context}\n"
+        f"CANDIDATE:\n{candidate_json}"
     )
 
 
 def get_instrument_verify_prompt(
-    pages_content: list[dict[str, Any]],
     candidate: dict[str, Any],
+    focus_pages: list[Any],
 ) -> str:
-    context = _build_pages_context(pages_content, max_pages=len(pages_content))
     candidate_json = json.dumps(candidate, ensure_ascii=False)
     return (
-        "Re-validate the cognitive reserve instrument extraction against only the pages below.\n"
+        f"{get_instrument_task_prompt()}\n\n"
+        "Re-validate the cognitive reserve instrument extraction against only pages "
+        f"{_format_focus_pages(focus_pages)} of the document.\n"
         "Keep a field only if it is directly supported by the page text.\n"
         "Evidence quotes must be exact substrings from the page text.\n"
         "Return the same JSON schema.\n\n"
-        f"CANDIDATE:\n{candidate_json}\n\n"
-        f"{context}\n"
+        f"CANDIDATE:\n{candidate_json}"
     )
@@ -54,15 +54,33 @@ bibliographic_info_extraction_system_prompt = """
 """
 
 
+bibliographic_info_update_instructions = """
+    The JSON below was extracted from the previous pages of the same document.
+    Update it with the OCR text of the next page: fill missing fields, and
+    continue an abstract that was cut at the page break. Keep values the new
+    page does not change.
+"""
+
+
 def get_bibliographic_info_extraction_prompt(
-    ocr_text: str, retry_focus: list[str] | None
+    ocr_text: str,
+    retry_focus: list[str] | None,
+    previous_info: str | None = None,
 ) -> str:
     focus = ""
     if retry_focus:
         focus = f"Focus on missing fields: {', '.join(retry_focus)}.\n"
+    previous = ""
+    if previous_info:
+        previous = (
+            f"{bibliographic_info_update_instructions}\n"
+            "BIBLIOGRAPHIC INFORMATION SO FAR:\n"
+            f"{previous_info}\n"
+        )
     return (
         f"{bibliographic_info_extraction_system_prompt}\n"
         f"{focus}"
+        f"{previous}"
         "OCR TEXT:\n"
         f"{ocr_text}\n"
     )
@@ -10,6 +10,7 @@ def create_agent_log(
     agent_name: str,
     paper_id=None,
     extraction_id=None,
+    staging_idx: int | None = None,
     raw_output: str | None = None,
     cleaned_output: dict | None = None,
     input_text: str | None = None,
@@ -20,6 +21,7 @@ def create_agent_log(
     log = AgentLogs(
         paper_id=paper_id,
         extraction_id=extraction_id,
+        staging_idx=staging_idx,
         agent_name=agent_name,
         raw_output=raw_output,
         cleaned_output=cleaned_output,
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.enums.jobs import JobStatus
+from app.models.jobs import Jobs
+
+
+def create_job(
+    db: Session,
+    *,
+    job_type: str,
+    payload: dict[str, Any],
+    pdf_bytes: bytes | None = None,
+    max_attempts: int | None = None,
+) -> Jobs:
+    job = Jobs(job_type=job_type, payload=payload, pdf_bytes=pdf_bytes)
+    if max_attempts is not None:
+        job.max_attempts = max_attempts
+    db.add(job)
+    db.flush()
+    return job
+
+
+def get_job_by_id(db: Session, *, job_id: UUID) -> Jobs | None:
+    return db.get(Jobs, job_id)
+
+
+def claim_jobs(
+    db: Session,
+    *,
+    worker_id: str,
+    limit: int,
+    visibility_timeout_s: float,
+) -> list[Jobs]:
+    """
+    Lock up to `limit` runnable jobs with FOR UPDATE SKIP LOCKED and lease
+    them to `worker_id` until now + `visibility_timeout_s`.
+
+    Runnable: queued and due, or running with a lapsed lease (its worker
+    died) and attempts left. Commit to release the row locks.
+    """
+    now = func.now()
+    stmt = (
+        select(Jobs)
+        .where(
+            or_(
+                and_(Jobs.status == JobStatus.QUEUED.value, Jobs.run_after <= now),
+                and_(
+                    Jobs.status == JobStatus.RUNNING.value,
+                    Jobs.locked_until < now,
+                    Jobs.attempts < Jobs.max_attempts,
+                ),
+            )
+        )
+        .order_by(Jobs.run_after)
+        .limit(int(limit))
+        .with_for_update(skip_locked=True)
+    )
+    jobs = list(db.execute(stmt).scalars().all())
+    lease = timedelta(seconds=visibility_timeout_s)
+    for job in jobs:
+        job.status = JobStatus.RUNNING.value
+        job.locked_by = worker_id
+        job.locked_until = now + lease
+        job.attempts = Jobs.attempts + 1
+        job.started_at = now
+    db.flush()
+    for job in jobs:
+        db.refresh(job)
+    return jobs
+
+
+def fail_abandoned_jobs(db: Session) -> int:
+    """Fail running jobs whose lease lapsed with no attempts left."""
+    result = db.execute(
+        update(Jobs)
+        .where(
+            Jobs.status == JobStatus.RUNNING.value,
+            Jobs.locked_until < func.now(),
+            Jobs.attempts >= Jobs.max_attempts,
+        )
+        .values(
+            status=JobStatus.FAILED.value,
+            error="Worker lease expired on the last attempt",
+            locked_by=None,
+            locked_until=None,
+            finished_at=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def _owned_by(job_id: UUID, worker_id: str) -> Any:
+    # a worker that lost its lease must not overwrite the new owner's state
+    return and_(
+        Jobs.id == job_id,
+        Jobs.locked_by == worker_id,
+        Jobs.status == JobStatus.RUNNING.value,
+    )
+
+
+def renew_job_lease(
+    db: Session,
+    *,
+    job_id: UUID,
+    worker_id: str,
+    visibility_timeout_s: float,
+) -> bool:
+    result = db.execute(
+        update(Jobs)
+        .where(_owned_by(job_id, worker_id))
+        .values(locked_until=func.now() + timedelta(seconds=visibility_timeout_s))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+def complete_job(
+    db: Session,
+    *,
+    job_id: UUID,
+    worker_id: str,
+    result: dict[str, Any],
+) -> bool:
+    updated = db.execute(
+        update(Jobs)
+        .where(_owned_by(job_id, worker_id))
+        .values(
+            status=JobStatus.SUCCEEDED.value,
+            result=result,
+            error=None,
+            pdf_bytes=None,  # the content now lives in papers_staging
+            locked_by=None,
+            locked_until=None,
+            finished_at=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return updated.rowcount > 0
+
+
+def fail_job(
+    db: Session,
+    *,
+    job_id: UUID,
+    worker_id: str,
+    error: str,
+    retry_delay_s: float | None,
+    count_attempt: bool = True,
+) -> bool:
+    """
+    Requeue after `retry_delay_s`, or fail for good when it is None. With
+    `count_attempt=False` the claim's attempt is handed back, for runs that
+    were interrupted rather than failed.
+    """
+    values: dict[str, Any] = {"error": error, "locked_by": None, "locked_until": None}
+    if not count_attempt:
+        values["attempts"] = Jobs.attempts - 1
+    if retry_delay_s is None:
+        values.update(status=JobStatus.FAILED.value, finished_at=func.now())
+    else:
+        values.update(
+            status=JobStatus.QUEUED.value,
+            run_after=func.now() + timedelta(seconds=retry_delay_s),
+        )
+    updated = db.execute(
+        update(Jobs)
+        .where(_owned_by(job_id, worker_id))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return updated.rowcount > 0
+
+
+def count_jobs_by_status(db: Session) -> dict[str, int]:
+    rows = db.execute(select(Jobs.status, func.count()).group_by(Jobs.status)).all()
+    return {status: int(count) for status, count in rows}
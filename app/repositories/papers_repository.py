@@ -68,6 +68,8 @@ def create_paper(
     pdf_url: str | None = None,
     ingestion_source: str | None = None,
     embedding: list[float] | None = None,
+    pdf_sha256: str | None = None,
+    text_fingerprint: str | None = None,
 ) -> Papers:
     paper = Papers(
         title=title,
@@ -79,12 +81,31 @@ def create_paper(
         pdf_url=pdf_url,
         ingestion_source=ingestion_source,
         embedding=embedding,
+        pdf_sha256=pdf_sha256,
+        text_fingerprint=text_fingerprint,
     )
     db.add(paper)
     db.flush()
     return paper
 
 
+def find_paper_by_fingerprint(
+    db: Session,
+    *,
+    pdf_sha256: str,
+    text_fingerprint: str | None = None,
+) -> Papers | None:
+    """Exact file match first, then the same first-page text."""
+    stmt = select(Papers).where(Papers.pdf_sha256 == pdf_sha256).limit(1)
+    paper = db.execute(stmt).scalars().first()
+    if paper is None and text_fingerprint:
+        stmt = (
+            select(Papers).where(Papers.text_fingerprint == text_fingerprint).limit(1)
+        )
+        paper = db.execute(stmt).scalars().first()
+    return paper
+
+
 def get_paper_by_id(
     db: Session,
     *,
@@ -25,6 +25,7 @@ def find_similar_papers(
 
     query = (
         select(
+            PapersStaging.idx,
             PapersStaging.id,
             PapersStaging.title,
             PapersStaging.authors,
@@ -104,6 +105,8 @@ def create_papers_staging(
     pdf_url: str | None = None,
     ingestion_source: str | None = None,
     embedding: list[float] | None = None,
+    pdf_sha256: str | None = None,
+    text_fingerprint: str | None = None,
     ingestion_timestamp: datetime | None = None,
     is_approved: bool | None = None,
     approval_timestamp: Any | None = None,
@@ -119,6 +122,8 @@ def create_papers_staging(
         pdf_url=pdf_url,
         ingestion_source=ingestion_source,
         embedding=embedding,
+        pdf_sha256=pdf_sha256,
+        text_fingerprint=text_fingerprint,
     )
 
     if ingestion_timestamp is not None:
@@ -133,6 +138,31 @@ def create_papers_staging(
     return paper_staging
 
 
+def find_papers_staging_by_fingerprint(
+    db: Session,
+    *,
+    pdf_sha256: str,
+    text_fingerprint: str | None = None,
+) -> PapersStaging | None:
+    """Latest staging row with the same file, then with the same first-page text."""
+    stmt = (
+        select(PapersStaging)
+        .where(PapersStaging.pdf_sha256 == pdf_sha256)
+        .order_by(PapersStaging.idx.desc())
+        .limit(1)
+    )
+    item = db.execute(stmt).scalars().first()
+    if item is None and text_fingerprint:
+        stmt = (
+            select(PapersStaging)
+            .where(PapersStaging.text_fingerprint == text_fingerprint)
+            .order_by(PapersStaging.idx.desc())
+            .limit(1)
+        )
+        item = db.execute(stmt).scalars().first()
+    return item
+
+
 def get_papers_staging_by_idx(
     db: Session,
     *,
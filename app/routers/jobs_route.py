@@ -0,0 +1,55 @@
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile, Depends
+
+from app.services.jobs import get_job_status, submit_ingestion_job
+from app.core.logger import set_log
+from app.core.db import get_db
+from sqlalchemy.orm import Session
+
+
+router = APIRouter()
+
+router_prefix = "/jobs"
+
+
+@router.post(f"{router_prefix}/ingest", tags=["jobs"], status_code=202)
+async def submit_ingestion(
+    pdf: UploadFile = File(...),
+    ingestion_source: str = Form("web"),
+    prompt: str = Form("Describe the document"),
+    db: Session = Depends(get_db),
+):
+    set_log("submit_ingestion")
+    pdf_bytes = await pdf.read()
+
+    try:
+        return submit_ingestion_job(
+            db,
+            pdf_bytes=pdf_bytes,
+            ingestion_source=ingestion_source,
+            content_type=pdf.content_type,
+            prompt=prompt,
+            filename=pdf.filename,
+        )
+    except ValueError as exc:
+        set_log(f"ValueError in submit_ingestion: {exc}", level="error")
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:
+        set_log(f"Exception in submit_ingestion: {exc}", level="error")
+        raise HTTPException(
+            status_code=502, detail=f"Job submission failed: {exc}"
+        ) from exc
+
+
+@router.get(f"{router_prefix}/{{job_id}}", tags=["jobs"])
+async def get_job(job_id: str, db: Session = Depends(get_db)):
+    set_log("get_job")
+    try:
+        return get_job_status(db, job_id=job_id)
+    except ValueError as exc:
+        set_log(f"ValueError in get_job: {exc}", level="error")
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except Exception as exc:
+        set_log(f"Exception in get_job: {exc}", level="error")
+        raise HTTPException(
+            status_code=502, detail=f"Job lookup failed: {exc}"
+        ) from exc
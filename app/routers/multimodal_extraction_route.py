@@ -1,6 +1,8 @@
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile, Depends
+from fastapi.responses import StreamingResponse
 
-from app.services.multimodal_extraction import run_service
+from app.services.bulk_ingestion import run_bulk_zip_stream
+from app.services.multimodal_extraction import run_service, run_stream_service
 from app.core.logger import set_log
 from app.core.db import get_db
 from sqlalchemy.orm import Session
@@ -35,3 +37,65 @@ async def extract_document(
         raise HTTPException(
             status_code=502, detail=f"VLLM request failed: {exc}"
         ) from exc
+
+
+@router.post(f"{router_prefix}/extract/stream", tags=["document"])
+async def extract_document_stream(
+    pdf: UploadFile = File(...),
+    ingestion_source: str = Form("web"),
+    prompt: str = Form("Describe the document"),
+    db: Session = Depends(get_db),
+):
+    set_log("multimodal_extraction stream endpoint called")
+    pdf_bytes = await pdf.read()
+
+    try:
+        stream = await run_stream_service(
+            pdf_bytes, ingestion_source, pdf.content_type, prompt, db
+        )
+        return StreamingResponse(
+            stream,
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "X-Accel-Buffering": "no",
+            },
+        )
+    except ValueError as exc:
+        set_log(f"ValueError in extract_document_stream: {exc}", level="error")
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:
+        set_log(f"Exception in extract_document_stream: {exc}", level="error")
+        raise HTTPException(
+            status_code=502, detail=f"VLLM request failed: {exc}"
+        ) from exc
+
+
+@router.post(f"{router_prefix}/extract/bulk", tags=["document"])
+async def extract_documents_bulk(
+    archive: UploadFile = File(...),
+    ingestion_source: str = Form("bulk"),
+    prompt: str = Form("Describe the document"),
+):
+    set_log("multimodal_extraction bulk endpoint called")
+
+    try:
+        stream = await run_bulk_zip_stream(archive.file, ingestion_source, prompt)
+        return StreamingResponse(
+            stream,
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "X-Accel-Buffering": "no",
+            },
+        )
+    except ValueError as exc:
+        set_log(f"ValueError in extract_documents_bulk: {exc}", level="error")
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:
+        set_log(f"Exception in extract_documents_bulk: {exc}", level="error")
+        raise HTTPException(
+            status_code=502, detail=f"Bulk ingestion failed: {exc}"
+        ) from exc
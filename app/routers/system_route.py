@@ -0,0 +1,83 @@
+from fastapi import APIRouter, HTTPException, Query
+
+from app.clients.concurrency import get_vllm_limiter
+from app.clients.embedding_batcher import get_embedding_batcher
+from app.clients.http_pool import get_http_pool
+from app.clients.llm_response_cache import get_llm_response_cache
+from app.clients.load_balancer import get_vllm_replica_pool
+from app.clients.resilience import resilience_stats
+from app.clients.usage_stats import get_usage_tracker
+from app.core.config import settings
+from app.core.logger import set_log
+from app.utils.bibliographic_index import get_bibliographic_index
+from app.utils.cache import TieredCache
+from app.utils.embedding import get_embedding_cache
+from app.utils.ocr_cache import get_ocr_page_cache
+from app.utils.pdf_render import get_pdf_renderer
+from app.utils.token_budget import get_max_model_len, get_token_counter
+
+
+router = APIRouter()
+
+router_prefix = "/system"
+
+
+@router.get(f"{router_prefix}/stats", tags=["system"])
+async def get_system_stats():
+    set_log("get_system_stats")
+    return {
+        "http_pool": get_http_pool().stats(),
+        "vllm_limiter": get_vllm_limiter().stats(),
+        "vllm_replicas": (
+            get_vllm_replica_pool().stats()
+            if settings.vllm_replicas
+            else {"enabled": False}
+        ),
+        "resilience": resilience_stats(),
+        "vllm_usage": get_usage_tracker().stats(),
+        "token_counter": {
+            **get_token_counter().stats(),
+            "max_model_len": get_max_model_len(),
+        },
+        "embedding_batcher": get_embedding_batcher().stats(),
+        "pdf_renderer": get_pdf_renderer().stats(),
+        "embedding_cache": _cache_stats(get_embedding_cache()),
+        "llm_response_cache": _cache_stats(
+            get_llm_response_cache() if settings.llm_cache_enabled else None
+        ),
+        "ocr_page_cache": _cache_stats(get_ocr_page_cache()),
+        "bibliographic_index": (
+            get_bibliographic_index().stats()
+            if get_bibliographic_index() is not None
+            else {"enabled": False}
+        ),
+    }
+
+
+@router.post(f"{router_prefix}/vllm/replicas/eject", tags=["system"])
+async def eject_vllm_replica(
+    base_url: str = Query(...),
+    duration_s: float = Query(300.0, ge=0),
+):
+    set_log("eject_vllm_replica")
+    try:
+        return get_vllm_replica_pool().eject(base_url, duration_s).stats()
+    except ValueError as exc:
+        set_log(f"ValueError in eject_vllm_replica: {exc}", level="error")
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.post(f"{router_prefix}/vllm/replicas/restore", tags=["system"])
+async def restore_vllm_replica(base_url: str = Query(...)):
+    set_log("restore_vllm_replica")
+    try:
+        return get_vllm_replica_pool().restore(base_url).stats()
+    except ValueError as exc:
+        set_log(f"ValueError in restore_vllm_replica: {exc}", level="error")
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def _cache_stats(cache: TieredCache | None) -> dict:
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import copy
+from functools import lru_cache
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field, ValidationError
+
+from app.core.logger import set_log
+from app.enums.common import LlmOutputSchema
+from app.utils.json_repair import parse_json_object
+
+
+# -------------------------
+# Output models (one per structured LLM call)
+# -------------------------
+
+
+class EvidenceOutput(BaseModel):
+    page: int
+    quote: str
+
+
+class PopulationOutput(BaseModel):
+    population_summary: str | None = None
+    target_population: str | None = None
+    age_band: Literal["young", "middle", "older", "mixed"] | None = None
+    clinical_condition_tags: list[str] = Field(default_factory=list)
+    country_setting: str | None = None
+    evidence: list[EvidenceOutput] = Field(default_factory=list)
+    confidence: float = 0.0
+
+
+class InstrumentOutput(BaseModel):
+    instrument_name: str | None = None
+    instrument_family: list[
+        Literal[
+            "CRIq",
+            "CRQ",
+            "LEQ",
+            "NART",
+            "MWT-B",
+            "mCRS",
+            "CRASH",
+            "CR-interview",
+            "multi_proxy_custom",
+            "not_detected",
+        ]
+    ] = Field(default_factory=list)
+    detected_proxy_labels: list[str] = Field(default_factory=list)
+    scoring_method: str | None = None
+    time_administration: str | None = None
+    evidence: list[EvidenceOutput] = Field(default_factory=list)
+    confidence: float = 0.0
+
+
+class OcrTableOutput(BaseModel):
+    headers: list[str] = Field(default_factory=list)
+    rows: list[list[str]] = Field(default_factory=list)
+
+
+class OcrPageOutput(BaseModel):
+    text: str = ""
+    tables: list[OcrTableOutput] = Field(default_factory=list)
+    images: list[str] = Field(default_factory=list)
+
+
+class BibliographicInfoOutput(BaseModel):
+    title: str = ""
+    authors: list[str] = Field(default_factory=list)
+    journal: str = ""
+    year: int | None = None
+    abstract: str = ""
+    pdf_url: str = ""
+
+
+OUTPUT_SCHEMAS: dict[LlmOutputSchema, type[BaseModel]] = {
+    LlmOutputSchema.POPULATION: PopulationOutput,
+    LlmOutputSchema.INSTRUMENT: InstrumentOutput,
+    LlmOutputSchema.OCR_PAGE: OcrPageOutput,
+    LlmOutputSchema.BIBLIOGRAPHIC_INFO: BibliographicInfoOutput,
+}
+
+
+# -------------------------
+# Guided decoding / validation
+# -------------------------
+
+
+def _require_all_properties(schema: dict[str, Any]) -> dict[str, Any]:
+    # defaults keep validation tolerant; guided decoding should still emit every key
+    if schema.get("type") == "object" and "properties" in schema:
+        schema["required"] = list(schema["properties"])
+        schema["additionalProperties"] = False
+    for value in schema.values():
+        if isinstance(value, dict):
+            _require_all_properties(value)
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict):
+                    _require_all_properties(item)
+    return schema
+
+
+@lru_cache(maxsize=None)
+def _json_schema(name: LlmOutputSchema) -> dict[str, Any]:
+    return _require_all_properties(OUTPUT_SCHEMAS[name].model_json_schema())
+
+
+def get_response_format(name: LlmOutputSchema) -> dict[str, Any]:
+    """OpenAI-style `response_format` for vLLM structured outputs."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name.value,
+            "schema": copy.deepcopy(_json_schema(name)),
+            "strict": True,
+        },
+    }
+
+
+def validate_output(name: LlmOutputSchema, obj: dict[str, Any]) -> dict[str, Any]:
+    """
+    Coerce a parsed object into the schema (missing keys get defaults).
+
+    Raises ValueError when the object cannot be coerced.
+    """
+    try:
+        return OUTPUT_SCHEMAS[name].model_validate(obj).model_dump()
+    except ValidationError as exc:
+        raise ValueError(f"{name.value} output does not match schema: {exc}") from exc
+
+
+def parse_structured_output(name: LlmOutputSchema, text: str) -> dict[str, Any]:
+    """
+    Tolerant parse of a structured LLM output: repair the JSON, then coerce it
+    into the schema. An object that parses but does not match the schema is
+    returned as-is so callers can still normalise it.
+
+    Raises ValueError when no JSON object can be recovered.
+    """
+    obj = parse_json_object(text)
+    try:
+        return validate_output(name, obj)
+    except ValueError as exc:
+        set_log(str(exc), level="warning")
+        return obj
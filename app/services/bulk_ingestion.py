@@ -0,0 +1,427 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import tempfile
+import time
+import zipfile
+from functools import partial
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Callable
+
+from app.clients.concurrency import get_vllm_limiter
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.core.logger import set_log
+from app.enums.multimodal_extraction import BulkFileStatus
+from app.repositories.papers_repository import find_paper_by_fingerprint
+from app.repositories.papers_staging_repository import (
+    find_papers_staging_by_fingerprint,
+)
+from app.services.multimodal_extraction import run_service
+from sqlalchemy.orm import Session
+
+
+# (name, size in bytes, reader); bytes are only read when the file is scheduled
+PdfSource = tuple[str, int, Callable[[], bytes]]
+
+BULK_CONTENT_TYPE = "application/pdf"
+# how often the scheduler re-checks the vLLM queue while holding back files
+_ADMIT_POLL_S = 0.25
+
+
+def _format_sse(event: str, data: dict[str, Any]) -> str:
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+# -------------------------
+# Sources
+# -------------------------
+
+
+def list_directory_pdfs(root: str | Path) -> list[PdfSource]:
+    root = Path(root)
+    if not root.is_dir():
+        raise ValueError(f"Not a directory: {root}")
+    paths = sorted(
+        path
+        for path in root.rglob("*")
+        if path.suffix.lower() == ".pdf" and path.is_file()
+    )
+    return [
+        (path.relative_to(root).as_posix(), path.stat().st_size, path.read_bytes)
+        for path in paths
+    ]
+
+
+def open_zip(path: str | Path) -> zipfile.ZipFile:
+    try:
+        return zipfile.ZipFile(path)
+    except (zipfile.BadZipFile, OSError) as exc:
+        raise ValueError(f"Not a readable zip archive: {exc}") from exc
+
+
+def list_zip_pdfs(archive: zipfile.ZipFile) -> list[PdfSource]:
+    return [
+        (info.filename, info.file_size, partial(archive.read, info))
+        for info in archive.infolist()
+        if not info.is_dir()
+        and info.filename.lower().endswith(".pdf")
+        and not info.filename.startswith("__MACOSX/")
+    ]
+
+
+# -------------------------
+# Manifest and progress
+# -------------------------
+
+
+def _is_final(record: dict[str, Any]) -> bool:
+    status = record.get("status")
+    if status in (BulkFileStatus.INGESTED.value, BulkFileStatus.SIMILAR.value):
+        return True
+    # a copy of another file in the same run is only final if that file is
+    # in the DB; a re-run settles it with the DB hash check
+    return status == BulkFileStatus.DUPLICATE.value and "file" not in (
+        record.get("duplicate_of") or {}
+    )
+
+
+class BulkManifest:
+    """
+    Per-file results of a bulk run, one JSON record per line, appended as
+    each file finishes.
+
+    Re-running with the same manifest skips files that already reached a
+    final status (by name and size before reading them, by sha256 after);
+    failed files are tried again. The file is locked for the lifetime of
+    the manifest: a second run on it, from this process or another, gets
+    ValueError instead of interleaving its records.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._done_files: set[tuple[str, int]] = set()
+        self._done_hashes: set[str] = set()
+
+        self._handle = self.path.open("a+", encoding="utf-8")
+        try:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._handle.close()
+            raise ValueError(
+                f"Bulk ingestion with manifest {self.path} is already running."
+            ) from None
+
+        data = self.path.read_bytes()
+        for line in data.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line of an interrupted run
+            if isinstance(record, dict) and _is_final(record):
+                self._mark_done(record)
+        if data and not data.endswith(b"\n"):
+            self._handle.write("\n")
+
+    def _mark_done(self, record: dict[str, Any]) -> None:
+        self._done_files.add((record.get("file"), record.get("size")))
+        if record.get("sha256"):
+            self._done_hashes.add(record["sha256"])
+
+    @property
+    def done_count(self) -> int:
+        return len(self._done_files)
+
+    def is_done_file(self, name: str, size: int) -> bool:
+        return (name, size) in self._done_files
+
+    def is_done_hash(self, sha256: str) -> bool:
+        return sha256 in self._done_hashes
+
+    def record(self, record: dict[str, Any]) -> None:
+        self._handle.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._handle.flush()
+        if _is_final(record):
+            self._mark_done(record)
+
+    def close(self) -> None:
+        # closing the file releases the lock
+        self._handle.close()
+
+
+class BulkProgress:
+    def __init__(self, files_total: int):
+        self.files_total = files_total
+        self.started = time.monotonic()
+        self.counts = {status.value: 0 for status in BulkFileStatus}
+        self.resumed = 0
+        self.pages = 0
+
+    def add(self, record: dict[str, Any]) -> None:
+        self.counts[record["status"]] += 1
+        if record["status"] in (
+            BulkFileStatus.INGESTED.value,
+            BulkFileStatus.SIMILAR.value,
+        ):
+            self.pages += record.get("page_count") or 0
+
+    def snapshot(self) -> dict[str, Any]:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        processed = (
+            self.counts[BulkFileStatus.INGESTED.value]
+            + self.counts[BulkFileStatus.SIMILAR.value]
+        )
+        return {
+            "files_total": self.files_total,
+            "files_done": sum(self.counts.values()) + self.resumed,
+            "resumed": self.resumed,
+            **self.counts,
+            "pages": self.pages,
+            "elapsed_s": round(elapsed, 1),
+            "pages_per_s": round(self.pages / elapsed, 3),
+            "papers_per_min": round(processed * 60 / elapsed, 3),
+        }
+
+
+# -------------------------
+# Ingestion
+# -------------------------
+
+
+def _find_ingested(db: Session, sha256: str) -> dict[str, Any] | None:
+    paper = find_paper_by_fingerprint(db, pdf_sha256=sha256)
+    if paper is not None:
+        return {"paper_id": paper.id, "staging_idx": None}
+    staging = find_papers_staging_by_fingerprint(db, pdf_sha256=sha256)
+    if staging is not None:
+        return {"paper_id": staging.id, "staging_idx": staging.idx}
+    return None
+
+
+def _read_and_hash(read: Callable[[], bytes]) -> tuple[bytes, str]:
+    pdf_bytes = read()
+    return pdf_bytes, hashlib.sha256(pdf_bytes).hexdigest()
+
+
+async def _ingest_file(
+    source: PdfSource,
+    manifest: BulkManifest,
+    claimed: dict[str, str],
+    *,
+    ingestion_source: str,
+    prompt: str,
+) -> dict[str, Any]:
+    name, size, read = source
+    started = time.monotonic()
+    record: dict[str, Any] = {
+        "file": name,
+        "size": size,
+        "sha256": None,
+        "status": BulkFileStatus.FAILED.value,
+    }
+    db = SessionLocal()
+    try:
+        if size > settings.bulk_max_pdf_mb * 1024 * 1024:
+            raise ValueError(f"PDF larger than {settings.bulk_max_pdf_mb} MB")
+        pdf_bytes, sha256 = await asyncio.to_thread(_read_and_hash, read)
+        record["sha256"] = sha256
+
+        if sha256 in claimed:
+            duplicate_of = {"file": claimed[sha256]}
+        elif manifest.is_done_hash(sha256):
+            duplicate_of = {"manifest": True}
+        else:
+            duplicate_of = await asyncio.to_thread(_find_ingested, db, sha256)
+        if duplicate_of is not None:
+            record.update(
+                status=BulkFileStatus.DUPLICATE.value, duplicate_of=duplicate_of
+            )
+        else:
+            claimed[sha256] = name
+            result = await run_service(
+                pdf_bytes, ingestion_source, BULK_CONTENT_TYPE, prompt, db
+            )
+            db.commit()
+            if result.get("duplicate"):
+                # same first-page text as an ingested paper
+                status = BulkFileStatus.DUPLICATE
+                record["duplicate_of"] = {
+                    "paper_id": result.get("paper_id"),
+                    **result["duplicate"],
+                }
+            elif result.get("similar_documents"):
+                status = BulkFileStatus.SIMILAR
+            else:
+                status = BulkFileStatus.INGESTED
+            record.update(
+                status=status.value,
+                paper_id=result.get("paper_id"),
+                page_count=result.get("page_count", 0),
+                missing_fields=result.get("missing_fields") or [],
+            )
+    except Exception as exc:
+        db.rollback()
+        record["error"] = f"{type(exc).__name__}: {exc}"
+        set_log(f"Bulk ingestion of {name} failed: {record['error']}", level="warning")
+    finally:
+        db.close()
+    record["elapsed_s"] = round(time.monotonic() - started, 3)
+    return record
+
+
+async def run_bulk_ingestion(
+    sources: list[PdfSource],
+    manifest: BulkManifest,
+    *,
+    ingestion_source: str,
+    prompt: str = "Describe the document",
+    concurrency: int | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Ingest `sources` through `run_service`, yielding a `file_result` and a
+    `progress` event per finished file, then `done` with the totals.
+
+    Up to `concurrency` documents are in flight. Their page OCR calls share
+    the process-wide vLLM limiter with every other request, so beyond the
+    first document a new one is only started while that limiter has no
+    queue: the GPU stays fed without piling up rendered pages. Each file
+    commits on its own session, so an interrupted run loses at most the
+    files in flight.
+    """
+    limit = max(1, concurrency or settings.bulk_ingestion_concurrency)
+    limiter = get_vllm_limiter()
+    progress = BulkProgress(len(sources))
+    claimed: dict[str, str] = {}
+    running: set[asyncio.Task] = set()
+    pending = iter(sources)
+    exhausted = False
+
+    set_log(
+        f"Bulk ingestion of {len(sources)} PDFs, concurrency={limit}, "
+        f"manifest={manifest.path} ({manifest.done_count} already done)"
+    )
+    try:
+        while True:
+            while (
+                not exhausted
+                and len(running) < limit
+                and (not running or limiter.queue_depth == 0)
+            ):
+                source = next(pending, None)
+                if source is None:
+                    exhausted = True
+                elif manifest.is_done_file(source[0], source[1]):
+                    progress.resumed += 1
+                else:
+                    running.add(
+                        asyncio.create_task(
+                            _ingest_file(
+                                source,
+                                manifest,
+                                claimed,
+                                ingestion_source=ingestion_source,
+                                prompt=prompt,
+                            )
+                        )
+                    )
+            if not running:
+                break
+
+            done, _ = await asyncio.wait(
+                running, timeout=_ADMIT_POLL_S, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                running.discard(task)
+                record = task.result()
+                manifest.record(record)
+                progress.add(record)
+                yield {"event": "file_result", **record}
+                yield {"event": "progress", **progress.snapshot()}
+    finally:
+        # client gone or run interrupted: in-flight files are retried on resume
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+    summary = progress.snapshot()
+    set_log(f"Bulk ingestion done: {summary}")
+    yield {"event": "done", "manifest": str(manifest.path), **summary}
+
+
+# -------------------------
+# Zip upload (SSE)
+# -------------------------
+
+
+def _spool_upload(upload: BinaryIO) -> tuple[Path, str]:
+    """Copy an upload to a file next to the manifests; `(path, sha256)`."""
+    directory = Path(settings.bulk_manifest_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(
+        dir=directory, suffix=".zip", delete=False
+    ) as handle:
+        while chunk := upload.read(1024 * 1024):
+            digest.update(chunk)
+            handle.write(chunk)
+    return Path(handle.name), digest.hexdigest()
+
+
+async def run_bulk_zip_stream(
+    upload: BinaryIO,
+    ingestion_source: str,
+    prompt: str,
+) -> AsyncIterator[str]:
+    """
+    SSE bulk ingestion of an uploaded zip of PDFs. The archive is validated
+    before the stream starts (ValueError -> 400). The manifest is keyed by
+    the archive's sha256, so uploading the same zip again resumes the run.
+    """
+    zip_path, zip_sha256 = await asyncio.to_thread(_spool_upload, upload)
+    try:
+        archive = open_zip(zip_path)
+        sources = list_zip_pdfs(archive)
+        if not sources:
+            archive.close()
+            raise ValueError("No PDF files in the archive.")
+    except Exception:
+        zip_path.unlink(missing_ok=True)
+        raise
+    try:
+        manifest = BulkManifest(
+            Path(settings.bulk_manifest_dir) / f"zip_{zip_sha256[:16]}.jsonl"
+        )
+    except Exception:
+        archive.close()
+        zip_path.unlink(missing_ok=True)
+        raise
+
+    async def event_generator() -> AsyncIterator[str]:
+        try:
+            yield _format_sse(
+                "status",
+                {
+                    "message": "bulk ingestion stream started",
+                    "files": len(sources),
+                    "already_done": manifest.done_count,
+                    "manifest": str(manifest.path),
+                },
+            )
+            async for event in run_bulk_ingestion(
+                sources, manifest, ingestion_source=ingestion_source, prompt=prompt
+            ):
+                yield _format_sse(event.pop("event"), event)
+        except Exception as exc:
+            set_log(f"Exception in run_bulk_zip_stream: {exc}", level="error")
+            yield _format_sse("error", {"message": str(exc)})
+        finally:
+            manifest.close()
+            archive.close()
+            zip_path.unlink(missing_ok=True)
+
+    return event_generator()
@@ -6,6 +6,7 @@ from typing import Any, AsyncIterator
 from app.core.logger import set_log
 from sqlalchemy.orm import Session
 from app.langgraph.cr_extraction import get_cr_extraction_graph
+from app.langgraph.cr_extraction.nodes.common import pack_document_context
 from app.repositories.papers_repository import (
     get_paper_by_id,
 )
@@ -30,9 +31,12 @@ def _normalize_pages_content(contents: Any) -> list[dict[str, Any]]:
 def _build_initial_state(
     payload: CRExtractionRequest, pages_content: list[dict[str, Any]]
 ) -> dict:
+    document = pack_document_context(pages_content)
     return {
         "paper_id": payload.paper_id,
         "pages_content": pages_content,
+        "document_context": document.text,
+        "document_context_report": document.report(),
         "current_page_index": 0,
         "debug_events": [],
         "stream_prompt": payload.stream_prompt,
@@ -105,6 +109,7 @@ async def run_stream_service(
                 "message": "cr extraction stream started",
                 "paper_id": paper_id,
                 "page_count": len(pages_content),
+                "document_context": state.get("document_context_report"),
             },
         )
 
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import random
+from typing import Any
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.logger import set_log
+from app.enums.jobs import JobType
+from app.models.jobs import Jobs
+from app.repositories.jobs_repository import create_job, get_job_by_id
+from app.services.multimodal_extraction import SUPPORTED_PDF_TYPES, run_service
+from sqlalchemy.orm import Session
+
+
+def _job_to_dict(job: Jobs) -> dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "run_after": job.run_after,
+        "error": job.error,
+        "result": job.result,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def submit_ingestion_job(
+    db: Session,
+    *,
+    pdf_bytes: bytes,
+    ingestion_source: str,
+    content_type: str | None,
+    prompt: str,
+    filename: str | None = None,
+) -> dict[str, Any]:
+    if not content_type or content_type not in SUPPORTED_PDF_TYPES:
+        raise ValueError("Only PDF files are supported.")
+    if not pdf_bytes:
+        raise ValueError("Empty PDF upload.")
+
+    job = create_job(
+        db,
+        job_type=JobType.PDF_INGESTION.value,
+        payload={
+            "ingestion_source": ingestion_source,
+            "content_type": content_type,
+            "prompt": prompt,
+            "filename": filename,
+        },
+        pdf_bytes=pdf_bytes,
+        max_attempts=settings.job_max_attempts,
+    )
+    db.refresh(job)
+    set_log(f"Queued ingestion job {job.id} ({len(pdf_bytes)} bytes)")
+    return _job_to_dict(job)
+
+
+def get_job_status(db: Session, *, job_id: str) -> dict[str, Any]:
+    try:
+        job_uuid = UUID(str(job_id))
+    except ValueError as exc:
+        raise ValueError(f"Invalid job id: {job_id}") from exc
+    job = get_job_by_id(db, job_id=job_uuid)
+    if job is None:
+        raise ValueError(f"Job not found: {job_id}")
+    return _job_to_dict(job)
+
+
+def retry_delay_for(attempt: int) -> float:
+    """Full-jitter exponential backoff before attempt `attempt + 1`."""
+    cap = min(
+        settings.job_retry_max_delay_s,
+        settings.job_retry_base_delay_s * (2 ** max(0, attempt - 1)),
+    )
+    return random.uniform(0.0, cap)
+
+
+async def run_ingestion_job(db: Session, job: Jobs) -> dict[str, Any]:
+    """Run one claimed job through `run_service`; the JSON-safe job result."""
+    payload = job.payload or {}
+    result = await run_service(
+        job.pdf_bytes or b"",
+        payload.get("ingestion_source") or "job",
+        payload.get("content_type"),
+        payload.get("prompt") or "Describe the document",
+        db,
+    )
+    # pages stay in papers_staging; the job keeps the summary
+    summary = {key: value for key, value in result.items() if key != "pages_content"}
+    return json.loads(json.dumps(summary, default=str))
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
-import base64
-
-import fitz  # PyMuPDF
+import json
+from typing import Any, AsyncIterator
 
 from app.langgraph.multimodal_extraction import get_document_graph
+from app.core.config import settings
 from app.core.logger import set_log
+from app.enums.multimodal_extraction import VllmTaskType
+from app.models.papers import Papers
+from app.models.papers_staging import PapersStaging
+from app.repositories.agents_logs_repository import create_agent_log
+from app.repositories.papers_repository import find_paper_by_fingerprint
 from app.repositories.papers_staging_repository import (
     find_similar_papers,
+    find_papers_staging_by_fingerprint,
     create_papers_staging,
 )
+from app.utils.pdf_render import get_pdf_renderer
 from sqlalchemy.orm import Session
 
 
@@ -23,52 +30,137 @@ SUPPORTED_PDF_TYPES = {
 }
 
 
+def _format_sse(event: str, data: dict[str, Any]) -> str:
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
 def _ensure_supported_pdf(content_type: str | None) -> None:
     if not content_type or content_type not in SUPPORTED_PDF_TYPES:
         raise ValueError("Only PDF files are supported.")
 
 
-async def run_service(
-    pdf_bytes: bytes,
-    ingestion_source: str,
-    content_type: str | None,
-    prompt: str,
-    db: Session,
-) -> dict:
+def _find_duplicate(db: Session, fingerprint: dict[str, Any]) -> dict | None:
+    pdf_sha256 = fingerprint["pdf_sha256"]
+    text_fingerprint = fingerprint["text_fingerprint"]
+
+    # approved papers first, then the latest staging row
+    match: Papers | PapersStaging | None = find_paper_by_fingerprint(
+        db, pdf_sha256=pdf_sha256, text_fingerprint=text_fingerprint
+    )
+    staging_idx = None
+    if match is None:
+        match = find_papers_staging_by_fingerprint(
+            db, pdf_sha256=pdf_sha256, text_fingerprint=text_fingerprint
+        )
+        if match is None:
+            return None
+        staging_idx = match.idx
+
+    matched_on = "pdf_sha256" if match.pdf_sha256 == pdf_sha256 else "text_fingerprint"
+    set_log(
+        f"Duplicate PDF ({matched_on}) of paper {match.id} staging_idx={staging_idx}, skipping extraction"
+    )
+    pages_content = match.pages_content or []
+    return {
+        "pages_content": pages_content,
+        "bibliographic_info": {
+            "title": match.title,
+            "authors": match.authors or [],
+            "journal": match.journal or "",
+            "year": match.year,
+            "abstract": match.abstract or "",
+            "pdf_url": match.pdf_url or "",
+        },
+        "missing_fields": [],
+        "page_count": len(pages_content),
+        "paper_id": match.id,
+        "similar_documents": [
+            {"id": match.id, "title": match.title, "similarity": 1.0}
+        ],
+        "duplicate": {"matched_on": matched_on, "staging_idx": staging_idx},
+    }
+
+
+async def _check_upload(
+    pdf_bytes: bytes, content_type: str | None, db: Session
+) -> tuple[dict[str, Any], dict | None]:
+    """`(fingerprint, duplicate_result)`; raises ValueError for bad uploads."""
     _ensure_supported_pdf(content_type)
 
     set_log("Processing document bytes")
 
-    try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    except Exception as exc:
-        raise ValueError(f"Invalid PDF: {exc}") from exc
-
-    page_images_b64: list[str] = []
-    try:
-        for page in doc:
-            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2), alpha=False)
-            png_bytes = pix.tobytes("png")
-            page_images_b64.append(base64.b64encode(png_bytes).decode("ascii"))
-    finally:
-        doc.close()
-
-    if not page_images_b64:
+    # exact duplicates are answered before any GPU work (ValueError if invalid)
+    fingerprint = await get_pdf_renderer().fingerprint(pdf_bytes)
+    if not fingerprint["page_count"]:
         raise ValueError("PDF has no pages.")
+    return fingerprint, _find_duplicate(db, fingerprint)
 
-    graph = get_document_graph()
 
-    state = {
-        "page_images_b64": page_images_b64,
+def _initial_state(pdf_bytes: bytes, prompt: str) -> dict[str, Any]:
+    # pages are rendered and OCR'd inside the graph, a window at a time
+    return {
+        "pdf_bytes": pdf_bytes,
         "prompt": prompt,
         "attempts": 0,
         "max_attempts": 1,
     }
 
+
+async def run_service(
+    pdf_bytes: bytes,
+    ingestion_source: str,
+    content_type: str | None,
+    prompt: str,
+    db: Session,
+) -> dict:
+    fingerprint, duplicate = await _check_upload(pdf_bytes, content_type, db)
+    if duplicate is not None:
+        return duplicate
+
+    graph = get_document_graph()
+    state = _initial_state(pdf_bytes, prompt)
+
     set_log("Invoking document graph")
 
     # invoke the graph
     result = await graph.ainvoke(state)
+    return _store_result(
+        db, result, ingestion_source=ingestion_source, fingerprint=fingerprint
+    )
+
+
+def _log_bibliographic_output(
+    db: Session, result: dict[str, Any], *, staging_idx: int, paper_id=None
+) -> None:
+    """
+    agents_logs row for the extraction call behind `bibliographic_info`,
+    linked to the staging row it was stored in or matched against.
+    """
+    raw_output = result.get("bibliographic_info_raw")
+    if not raw_output:
+        return  # metadata / DOI prefill only, no LLM call
+    create_agent_log(
+        db,
+        agent_name=VllmTaskType.BIBLIOGRAPHIC_INFO_EXTRACTION.value,
+        paper_id=paper_id,
+        staging_idx=staging_idx,
+        raw_output=raw_output,
+        cleaned_output=result.get("bibliographic_info"),
+        node_name="extract_bibliographic_info",
+        prompt_hash=result.get("bibliographic_prompt_hash"),
+        model_name=settings.vllm_model,
+    )
+
+
+def _store_result(
+    db: Session,
+    result: dict[str, Any],
+    *,
+    ingestion_source: str,
+    fingerprint: dict[str, Any],
+) -> dict:
+    """Similar-paper lookup and the papers_staging insert for a graph result."""
     pages_content = result.get("ocr_pages", [])
 
     bibliographic_info = result.get("bibliographic_info") or {}
@@ -101,6 +193,12 @@ async def run_service(
         )
 
         matched_paper_id = similar_doc[0].get("id")
+        _log_bibliographic_output(
+            db,
+            result,
+            staging_idx=similar_doc[0]["idx"],
+            paper_id=matched_paper_id,
+        )
         return {
             "pages_content": pages_content,
             "bibliographic_info": bibliographic_info,
@@ -139,7 +237,10 @@ async def run_service(
         pdf_url=pdf_url,
         ingestion_source=ingestion_source,
         embedding=embedding if embedding else None,
+        pdf_sha256=fingerprint["pdf_sha256"],
+        text_fingerprint=fingerprint["text_fingerprint"],
     )
+    _log_bibliographic_output(db, result, staging_idx=paper.idx, paper_id=paper.id)
 
     return {
         "pages_content": pages_content,
@@ -156,3 +257,92 @@ async def run_service(
     #     "page_count": 0,
     #     "paper_id": paper.id,
     # }
+
+
+async def run_stream_service(
+    pdf_bytes: bytes,
+    ingestion_source: str,
+    content_type: str | None,
+    prompt: str,
+    db: Session,
+) -> AsyncIterator[str]:
+    """
+    SSE variant of `run_service`. The upload is validated before the stream
+    starts (ValueError -> 400); then events arrive as the graph runs:
+
+    - node_progress: pages being rendered / read from the text layer
+    - page_result: each page's OCR result as soon as it is done
+    - bibliographic_prefill, bibliographic_info: metadata and LLM results
+    - done: paper_id, similar documents and bibliographic info (the pages
+      were already sent as page_result events), or error
+    """
+    fingerprint, duplicate = await _check_upload(pdf_bytes, content_type, db)
+    graph = get_document_graph()
+    state = _initial_state(pdf_bytes, prompt)
+
+    async def event_generator() -> AsyncIterator[str]:
+        yield _format_sse(
+            "status",
+            {
+                "message": "multimodal extraction stream started",
+                "page_count": fingerprint["page_count"],
+                "duplicate": duplicate is not None,
+            },
+        )
+        if duplicate is not None:
+            yield _format_sse("done", duplicate)
+            return
+
+        final_state: dict[str, Any] = {}
+        try:
+            async for mode, chunk in graph.astream(
+                state,
+                stream_mode=["updates", "custom", "values"],
+            ):
+                if mode == "values":
+                    final_state = chunk
+                elif mode == "custom" and isinstance(chunk, dict):
+                    yield _format_sse(chunk.get("event", "custom"), chunk)
+                elif mode == "updates" and isinstance(chunk, dict):
+                    for node, update in chunk.items():
+                        update = update or {}
+                        if node == "prefill":
+                            yield _format_sse(
+                                "bibliographic_prefill",
+                                {
+                                    "doi": update.get("doi"),
+                                    "fields": update.get("bibliographic_prefill"),
+                                },
+                            )
+                        elif node == "bibliographic":
+                            yield _format_sse(
+                                "bibliographic_info",
+                                {
+                                    "bibliographic_info": update.get(
+                                        "bibliographic_info"
+                                    ),
+                                    "missing_fields": update.get("missing_fields"),
+                                    "complete": update.get(
+                                        "bibliographic_info_complete"
+                                    ),
+                                },
+                            )
+                        else:
+                            yield _format_sse("node_done", {"node": node})
+
+            stored = _store_result(
+                db,
+                final_state,
+                ingestion_source=ingestion_source,
+                fingerprint=fingerprint,
+            )
+            stored.pop("pages_content", None)
+            yield _format_sse(
+                "done",
+                {"message": "multimodal extraction stream completed", **stored},
+            )
+        except Exception as exc:
+            set_log(f"Exception in run_stream_service: {exc}", level="error")
+            yield _format_sse("error", {"message": str(exc)})
+
+    return event_generator()
@@ -164,6 +164,8 @@ def approve_paper_staging(db: Session, idx: int) -> PapersStaging:
             "pdf_url": item.pdf_url,
             "ingestion_source": item.ingestion_source,
             "embedding": item.embedding,
+            "pdf_sha256": item.pdf_sha256,
+            "text_fingerprint": item.text_fingerprint,
         }
 
         if item.id is None:
@@ -225,6 +227,8 @@ def update_paper_staging(
             "ingestion_source": cleaned.get(
                 "ingestion_source", original.ingestion_source
             ),
+            "pdf_sha256": original.pdf_sha256,
+            "text_fingerprint": original.text_fingerprint,
         }
 
         if should_reembed:
@@ -265,6 +269,8 @@ def update_paper_staging(
             pdf_url=edited_fields["pdf_url"],
             ingestion_source=edited_fields["ingestion_source"],
             embedding=edited_fields["embedding"],
+            pdf_sha256=edited_fields["pdf_sha256"],
+            text_fingerprint=edited_fields["text_fingerprint"],
         )
         update_papers_staging_fields(
             db,
@@ -341,6 +347,8 @@ def update_paper(
             pdf_url=updated.pdf_url,
             ingestion_source=updated.ingestion_source,
             embedding=embedding_to_log,
+            pdf_sha256=updated.pdf_sha256,
+            text_fingerprint=updated.text_fingerprint,
             ingestion_timestamp=updated.ingestion_timestamp,
             is_approved=True,
             approval_timestamp=func.now(),
@@ -1,9 +1,5 @@
 from __future__ import annotations
 
-import base64
-
-import fitz  # PyMuPDF
-
 from app.langgraph.multimodal_extraction import get_document_graph
 from app.core.logger import set_log
 from app.repositories.papers_staging_repository import (
@@ -39,27 +35,11 @@ async def run_service(
 
     set_log("Processing document bytes")
 
-    try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    except Exception as exc:
-        raise ValueError(f"Invalid PDF: {exc}") from exc
-
-    page_images_b64: list[str] = []
-    try:
-        for page in doc:
-            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2), alpha=False)
-            png_bytes = pix.tobytes("png")
-            page_images_b64.append(base64.b64encode(png_bytes).decode("ascii"))
-    finally:
-        doc.close()
-
-    if not page_images_b64:
-        raise ValueError("PDF has no pages.")
-
     graph = get_document_graph()
 
+    # pages are rendered and OCR'd inside the graph, a window at a time
     state = {
-        "page_images_b64": page_images_b64,
+        "pdf_bytes": pdf_bytes,
         "prompt": prompt,
         "attempts": 0,
         "max_attempts": 1,
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+from app.core.logger import set_log
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _first(value: Any) -> Any:
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _record_year(record: dict[str, Any]) -> int | None:
+    for key in ("published-print", "published-online", "published", "issued"):
+        parts = (record.get(key) or {}).get("date-parts") or []
+        if parts and parts[0] and isinstance(parts[0][0], int):
+            return parts[0][0]
+    year = record.get("year")
+    if isinstance(year, str) and year.strip().isdigit():
+        return int(year)
+    return year if isinstance(year, int) else None
+
+
+def _record_authors(record: dict[str, Any]) -> list[str]:
+    authors: list[str] = []
+    for author in record.get("author") or record.get("authors") or []:
+        if isinstance(author, str):
+            name = author
+        else:
+            name = author.get("name") or " ".join(
+                part for part in (author.get("given"), author.get("family")) if part
+            )
+        if name and name.strip():
+            authors.append(" ".join(name.split()))
+    return authors
+
+
+def record_to_bibliographic_info(record: dict[str, Any]) -> dict[str, Any]:
+    """Bibliographic fields of a Crossref-style record; empty ones are left out."""
+    abstract = " ".join(_TAG_RE.sub(" ", str(record.get("abstract") or "")).split())
+    info = {
+        "title": " ".join(str(_first(record.get("title")) or "").split()),
+        "authors": _record_authors(record),
+        "journal": " ".join(
+            str(_first(record.get("container-title") or record.get("journal")) or "")
+            .split()
+        ),
+        "year": _record_year(record),
+        "abstract": abstract,
+    }
+    return {key: value for key, value in info.items() if value}
+
+
+class BibliographicIndex:
+    """
+    DOI lookups in a local JSONL dump (one Crossref-style record per line,
+    with a "DOI" or "doi" key).
+
+    The first lookup scans the file once and keeps only DOI -> line offset,
+    so a large dump costs a dict of offsets, not the records. Lookups do file
+    I/O: call them off the event loop.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._offsets: dict[str, int] | None = None
+        self.lookups = 0
+        self.hits = 0
+
+    def _load_offsets(self) -> dict[str, int]:
+        with self._lock:
+            if self._offsets is not None:
+                return self._offsets
+            offsets: dict[str, int] = {}
+            with self.path.open("rb") as handle:
+                offset = handle.tell()
+                for line in iter(handle.readline, b""):
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        record = None
+                    doi = (
+                        record.get("DOI") or record.get("doi")
+                        if isinstance(record, dict)
+                        else None
+                    )
+                    if isinstance(doi, str) and doi.strip():
+                        offsets.setdefault(doi.strip().lower(), offset)
+                    offset = handle.tell()
+            set_log(f"Bibliographic index loaded: {len(offsets)} DOIs from {self.path}")
+            self._offsets = offsets
+            return offsets
+
+    def lookup(self, doi: str) -> dict[str, Any] | None:
+        self.lookups += 1
+        offset = self._load_offsets().get(doi.strip().lower())
+        if offset is None:
+            return None
+        with self.path.open("rb") as handle:
+            handle.seek(offset)
+            record = json.loads(handle.readline())
+        self.hits += 1
+        return record
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "loaded": self._offsets is not None,
+            "dois": len(self._offsets or {}),
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_bibliographic_index() -> BibliographicIndex | None:
+    if not settings.bibliographic_index_path:
+        return None
+    path = Path(settings.bibliographic_index_path)
+    if not path.is_file():
+        set_log(f"Bibliographic index not found: {path}", level="warning")
+        return None
+    return BibliographicIndex(path)
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from app.core.logger import set_log
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Stable sha256 key over JSON-serializable parts."""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# accessed_at updates are buffered and written in batches (every N reads or
+# seconds, and before evicting)
+_ACCESS_FLUSH_EVERY = 256
+_ACCESS_FLUSH_INTERVAL_S = 30.0
+# eviction frees down to this share of max_bytes so it runs in batches
+_EVICT_TO_RATIO = 0.9
+
+
+class LruCache:
+    """In-process LRU bounded by entry count."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(0, int(max_entries))
+        self._items: OrderedDict[str, Any] = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> Any | None:
+        if key not in self._items:
+            return None
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def set(self, key: str, value: Any) -> None:
+        if self.max_entries == 0:
+            return
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class SqliteCacheStore:
+    """
+    Persistent key/value tier in a local SQLite file.
+
+    Values are stored as JSON text. When `max_bytes` is set, the least
+    recently accessed rows are evicted after writes that exceed it; the byte
+    total is kept in memory, not re-summed per write. Calls block on SQLite:
+    async code goes through `TieredCache.aget/aset`, which run them in a
+    thread.
+    """
+
+    def __init__(self, path: str | Path, *, max_bytes: int | None = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._pending_access: dict[str, float] = {}
+        self._last_access_flush = time.monotonic()
+
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=5.0, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed_at "
+            "ON cache_entries (accessed_at)"
+        )
+        self._conn.commit()
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache_entries"
+        ).fetchone()
+        self._total_bytes = int(row[0])
+
+    def get_encoded(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._pending_access[key] = time.time()
+            if (
+                len(self._pending_access) >= _ACCESS_FLUSH_EVERY
+                or time.monotonic() - self._last_access_flush
+                >= _ACCESS_FLUSH_INTERVAL_S
+            ):
+                self._flush_access()
+            return row[0]
+
+    def get(self, key: str) -> Any | None:
+        encoded = self.get_encoded(key)
+        return json.loads(encoded) if encoded is not None else None
+
+    def set_encoded(self, key: str, encoded: str) -> None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, encoded, len(encoded), now, now),
+            )
+            self._conn.commit()
+            self._pending_access.pop(key, None)
+            self._total_bytes += len(encoded) - (int(row[0]) if row else 0)
+            if self.max_bytes is not None and self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def set(self, key: str, value: Any) -> None:
+        self.set_encoded(key, json.dumps(value, ensure_ascii=False))
+
+    def _flush_access(self) -> None:
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE cache_entries SET accessed_at = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._pending_access.items()],
+            )
+            self._conn.commit()
+            self._pending_access.clear()
+        self._last_access_flush = time.monotonic()
+
+    def _evict(self) -> None:
+        self._flush_access()
+        target = int(self.max_bytes * _EVICT_TO_RATIO)
+        doomed: list[str] = []
+        freed = 0
+        cursor = self._conn.execute(
+            "SELECT key, size FROM cache_entries ORDER BY accessed_at ASC"
+        )
+        for key, size in cursor:
+            if self._total_bytes - freed <= target:
+                break
+            doomed.append(key)
+            freed += int(size)
+        cursor.close()
+        self._conn.executemany(
+            "DELETE FROM cache_entries WHERE key = ?", [(key,) for key in doomed]
+        )
+        self._conn.commit()
+        self._total_bytes -= freed
+        self.evictions += len(doomed)
+
+    def size_bytes(self) -> int:
+        return self._total_bytes
+
+    def count(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+        return int(row[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_access()
+            self._conn.close()
+
+
+class TieredCache:
+    """
+    In-process LRU in front of an optional SQLite tier, with hit/miss counters.
+
+    Both tiers hold JSON text, so every hit decodes a fresh value that the
+    caller may mutate. Coroutines use `aget`/`aset` (SQLite I/O in a thread);
+    `get`/`set` are the blocking equivalents for sync code.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_entries: int,
+        persistent_path: str | Path | None = None,
+        max_persistent_bytes: int | None = None,
+    ):
+        self.name = name
+        self._memory = LruCache(max_entries)
+        self._lock = threading.Lock()
+        self._persistent: SqliteCacheStore | None = None
+        if persistent_path:
+            try:
+                self._persistent = SqliteCacheStore(
+                    persistent_path, max_bytes=max_persistent_bytes
+                )
+            except (sqlite3.Error, OSError) as exc:
+                set_log(
+                    f"{name} cache: persistent tier disabled ({exc})", level="warning"
+                )
+
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.sets = 0
+
+    def _get_memory(self, key: str) -> str | None:
+        with self._lock:
+            encoded = self._memory.get(key)
+            if encoded is not None:
+                self.memory_hits += 1
+            elif self._persistent is None:
+                self.misses += 1
+            return encoded
+
+    def _get_persistent(self, key: str) -> str | None:
+        try:
+            encoded = self._persistent.get_encoded(key)
+        except sqlite3.Error as exc:
+            set_log(f"{self.name} cache read failed: {exc}", level="warning")
+            encoded = None
+        with self._lock:
+            if encoded is None:
+                self.misses += 1
+            else:
+                self.persistent_hits += 1
+                self._memory.set(key, encoded)
+        return encoded
+
+    def _set_memory(self, key: str, value: Any) -> str:
+        encoded = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self.sets += 1
+            self._memory.set(key, encoded)
+        return encoded
+
+    def _set_persistent(self, key: str, encoded: str) -> None:
+        try:
+            self._persistent.set_encoded(key, encoded)
+        except sqlite3.Error as exc:
+            set_log(f"{self.name} cache write failed: {exc}", level="warning")
+
+    def get(self, key: str) -> Any | None:
+        encoded = self._get_memory(key)
+        if encoded is None and self._persistent is not None:
+            encoded = self._get_persistent(key)
+        return json.loads(encoded) if encoded is not None else None
+
+    async def aget(self, key: str) -> Any | None:
+        encoded = self._get_memory(key)
+        if encoded is None and self._persistent is not None:
+            encoded = await asyncio.to_thread(self._get_persistent, key)
+        return json.loads(encoded) if encoded is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        encoded = self._set_memory(key, value)
+        if self._persistent is not None:
+            self._set_persistent(key, encoded)
+
+    async def aset(self, key: str, value: Any) -> None:
+        encoded = self._set_memory(key, value)
+        if self._persistent is not None:
+            await asyncio.to_thread(self._set_persistent, key, encoded)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.persistent_hits + self.misses
+            hits = self.memory_hits + self.persistent_hits
+            result: dict[str, Any] = {
+                "memory_entries": len(self._memory),
+                "memory_max_entries": self._memory.max_entries,
+                "memory_evictions": self._memory.evictions,
+                "memory_hits": self.memory_hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "sets": self.sets,
+                "hit_rate": (hits / lookups) if lookups else 0.0,
+            }
+        if self._persistent is not None:
+            try:
+                result["persistent_entries"] = self._persistent.count()
+                result["persistent_bytes"] = self._persistent.size_bytes()
+            except sqlite3.Error:
+                pass
+            result["persistent_evictions"] = self._persistent.evictions
+        return result
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-import httpx
+from functools import lru_cache
+from pathlib import Path
+
+from app.clients.embedding_batcher import get_embedding_batcher
 from app.clients.embedding_client import EmbeddingClient
 from typing import Mapping, Any, TypedDict
 
 
+from app.core.config import settings
 from app.core.logger import set_log
+from app.utils.cache import TieredCache, make_cache_key, sha256_text
 
 
 class EmbeddingData(TypedDict, total=False):
@@ -19,23 +24,74 @@ def _bi_to_text(bi: Mapping[str, Any]) -> str:
     return f"{title}\n\n{abstract}".strip()
 
 
+@lru_cache(maxsize=1)
+def get_embedding_cache() -> TieredCache | None:
+    if not settings.embedding_cache_enabled:
+        return None
+    persistent_path = (
+        Path(settings.cache_dir) / "embeddings.sqlite3"
+        if settings.embedding_cache_persistent
+        else None
+    )
+    return TieredCache(
+        "embedding",
+        max_entries=settings.embedding_cache_max_entries,
+        persistent_path=persistent_path,
+        max_persistent_bytes=int(settings.embedding_cache_max_mb * 1024 * 1024),
+    )
+
+
+def _embedding_cache_key(text: str) -> str:
+    # content-addressed: same model + same `_bi_to_text` output -> same vector
+    return make_cache_key(settings.embedding_model, sha256_text(text))
+
+
+async def _get_cached_embedding(text: str) -> list[float] | None:
+    cache = get_embedding_cache()
+    if cache is None:
+        return None
+    return await cache.aget(_embedding_cache_key(text))
+
+
+async def _set_cached_embedding(text: str, embedding: list[float]) -> None:
+    cache = get_embedding_cache()
+    if cache is None or not embedding:
+        return
+    await cache.aset(_embedding_cache_key(text), embedding)
+
+
+def _get_cached_embedding_sync(text: str) -> list[float] | None:
+    cache = get_embedding_cache()
+    if cache is None:
+        return None
+    return cache.get(_embedding_cache_key(text))
+
+
+def _set_cached_embedding_sync(text: str, embedding: list[float]) -> None:
+    cache = get_embedding_cache()
+    if cache is None or not embedding:
+        return
+    cache.set(_embedding_cache_key(text), embedding)
+
+
 async def embed_bibliographic_info(bi: Mapping[str, Any]) -> EmbeddingData:
     text_to_embed = _bi_to_text(bi)
 
     if not text_to_embed:
         raise ValueError("No text available for embedding.")
 
-    # Same rationale as OCR node: EmbeddingClient.embed() uses its own timeout.
-    embedding_client = EmbeddingClient(port="")
+    cached = await _get_cached_embedding(text_to_embed)
+    if cached is not None:
+        set_log("Embedding cache hit")
+        return {"embedding": cached}
 
-    async with httpx.AsyncClient(timeout=300.0, trust_env=False) as client:
-        resp = await embedding_client.embed(
-            client,
-            input=text_to_embed,
-        )
+    # Concurrent calls from different requests are coalesced into one
+    # /v1/embeddings request by the shared micro-batcher.
+    embedding = await get_embedding_batcher().embed(text_to_embed)
+    await _set_cached_embedding(text_to_embed, embedding)
 
     return {
-        "embedding": resp.get("data", [{}])[0].get("embedding", []),
+        "embedding": embedding,
     }
 
 
@@ -45,13 +101,16 @@ def embed_bibliographic_info_sync(bi: Mapping[str, Any]) -> EmbeddingData:
     if not text_to_embed:
         raise ValueError("No text available for embedding.")
 
+    cached = _get_cached_embedding_sync(text_to_embed)
+    if cached is not None:
+        set_log("Embedding cache hit")
+        return {"embedding": cached}
+
     embedding_client = EmbeddingClient(port="")
-    with httpx.Client(timeout=300.0, trust_env=False) as client:
-        resp = embedding_client.embed_sync(
-            client,
-            input=text_to_embed,
-        )
+    resp = embedding_client.embed_sync(input=text_to_embed)
+    embedding = resp.get("data", [{}])[0].get("embedding", [])
+    _set_cached_embedding_sync(text_to_embed, embedding)
 
     return {
-        "embedding": resp.get("data", [{}])[0].get("embedding", []),
+        "embedding": embedding,
     }
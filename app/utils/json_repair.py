@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+
+_FENCE_RE = re.compile(r"^```[a-zA-Z0-9_-]*\s*|\s*```\s*$")
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _strip_fences(text: str) -> str:
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = _FENCE_RE.sub("", cleaned).strip()
+    return cleaned
+
+
+def repair_json(text: str) -> str:
+    """
+    Best-effort repair of LLM JSON starting at `text[0]` (`{` or `[`).
+
+    Handles the usual failure modes of streamed/cut-off output: trailing
+    commas, Python literals, raw newlines inside strings, text after the
+    root value, and unterminated strings/containers (closed at the end).
+    """
+    out: list[str] = []
+    stack: list[str] = []
+    in_string = False
+    escaped = False
+    i = 0
+    n = len(text)
+
+    while i < n:
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+                out.append(ch)
+            elif ch == "\\":
+                escaped = True
+                out.append(ch)
+            elif ch == '"':
+                in_string = False
+                out.append(ch)
+            elif ch == "\n":
+                out.append("\\n")
+            elif ch == "\r":
+                out.append("\\r")
+            elif ch == "\t":
+                out.append("\\t")
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            if stack and stack[-1] == ch:
+                stack.pop()
+                out.append(ch)
+                if not stack:
+                    break  # ignore anything after the root value
+        elif ch.isalpha():
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            out.append(_PY_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(ch)
+        i += 1
+
+    if in_string:
+        if escaped:
+            out.pop()
+        out.append('"')
+    _drop_incomplete_tail(out, in_object=bool(stack) and stack[-1] == "}")
+    while stack:
+        _drop_trailing_comma(out)
+        out.append(stack.pop())
+    return "".join(out)
+
+
+def _drop_trailing_comma(out: list[str]) -> None:
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j:]
+
+
+_PARTIAL_SCALAR_RE = re.compile(
+    r"([:,\[])\s*(-|-?\d+\.|-?\d+(?:\.\d+)?[eE][+-]?|[a-zA-Z]+)$"
+)
+
+
+def _drop_incomplete_tail(out: list[str], *, in_object: bool) -> None:
+    text = "".join(out).rstrip()
+    trimmed = text
+
+    # a cut inside a number or literal: `1.`, `1e`, `tr`
+    match = _PARTIAL_SCALAR_RE.search(trimmed)
+    if match and match.group(2) not in ("true", "false", "null"):
+        replacement = ": null" if match.group(1) == ":" else match.group(1)
+        trimmed = trimmed[: match.start()] + replacement
+
+    # a cut after `"key":` or `"key"` inside an object cannot be closed as-is
+    if in_object:
+        trimmed = re.sub(
+            r'([,{])\s*"(?:[^"\\]|\\.)*"\s*:?\s*$', r"\1", trimmed
+        )
+
+    if trimmed != text:
+        out[:] = list(trimmed)
+
+
+def _parse_from(cleaned: str, start: int) -> Any:
+    snippet = cleaned[start:]
+    try:
+        value, _ = json.JSONDecoder().raw_decode(snippet)
+        return value
+    except json.JSONDecodeError:
+        pass
+
+    try:
+        return json.loads(repair_json(snippet))
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"Unrecoverable JSON in response: {exc}") from exc
+
+
+def parse_json_lenient(text: str) -> Any:
+    """
+    Parse the first JSON object/array in `text`, repairing it if needed.
+
+    Raises ValueError when there is no JSON value to recover.
+    """
+    cleaned = _strip_fences(text)
+    starts = [pos for pos in (cleaned.find("{"), cleaned.find("[")) if pos != -1]
+    if not starts:
+        raise ValueError("No JSON value found in response.")
+    return _parse_from(cleaned, min(starts))
+
+
+def parse_json_object(text: str) -> dict[str, Any]:
+    """First JSON object in `text` (repaired if needed); raises ValueError."""
+    cleaned = _strip_fences(text)
+    start = cleaned.find("{")
+    if start == -1:
+        raise ValueError("No JSON object found in response.")
+    value = _parse_from(cleaned, start)
+    if not isinstance(value, dict):
+        raise ValueError("No JSON object found in response.")
+    return value
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+
+class IncrementalJsonParser:
+    """
+    Token-by-token scanner for a streamed JSON object.
+
+    `feed()` returns the top-level `(key, value)` pairs completed by that
+    chunk, so callers can surface fields before the stream ends. Once the
+    root object closes `done` is set and further input (trailing prose,
+    a second object) is ignored. Text before the root `{` is skipped.
+    """
+
+    def __init__(self) -> None:
+        self.done = False
+        self.fields: dict[str, Any] = {}
+        self.invalid_members = 0
+
+        self._root: list[str] = []  # root object text so far
+        self._member: list[str] = []  # current top-level member text
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def started(self) -> bool:
+        return self._depth > 0 or self.done
+
+    @property
+    def text(self) -> str:
+        """Root object text consumed so far (complete once `done`)."""
+        return "".join(self._root)
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        completed: list[tuple[str, Any]] = []
+        if self.done:
+            return completed
+
+        for ch in chunk:
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._root.append(ch)
+                continue
+
+            self._root.append(ch)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                self._member.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_member(completed)
+                    self.done = True
+                    break
+            elif ch == "," and self._depth == 1:
+                self._finish_member(completed)
+                continue
+
+            self._member.append(ch)
+
+        return completed
+
+    def _finish_member(self, completed: list[tuple[str, Any]]) -> None:
+        member = "".join(self._member).strip()
+        self._member = []
+        if not member:
+            return
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            self.invalid_members += 1
+            return
+        for key, value in parsed.items():
+            self.fields[key] = value
+            completed.append((key, value))
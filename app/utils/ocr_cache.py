@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+from app.enums.common import LlmOutputSchema
+from app.utils.cache import TieredCache, make_cache_key
+
+
+@lru_cache(maxsize=1)
+def get_ocr_page_cache() -> TieredCache | None:
+    if not settings.ocr_cache_enabled:
+        return None
+    persistent_path = (
+        Path(settings.cache_dir) / "ocr_pages.sqlite3"
+        if settings.ocr_cache_persistent
+        else None
+    )
+    return TieredCache(
+        "ocr_page",
+        max_entries=settings.ocr_cache_max_entries,
+        persistent_path=persistent_path,
+        max_persistent_bytes=int(settings.ocr_cache_max_mb * 1024 * 1024),
+    )
+
+
+def _ocr_page_cache_key(image_sha256: str, system_prompt: str, user_prompt: str) -> str:
+    # content-addressed: the page number is not part of the key, so a page that
+    # moved in a revised upload still hits
+    schema = (
+        LlmOutputSchema.OCR_PAGE.value
+        if settings.vllm_structured_output_enabled
+        else None
+    )
+    return make_cache_key(
+        "ocr_page", settings.vllm_model, system_prompt, user_prompt, schema, image_sha256
+    )
+
+
+async def get_cached_ocr_page(
+    image_sha256: str, system_prompt: str, user_prompt: str
+) -> dict[str, Any] | None:
+    cache = get_ocr_page_cache()
+    if cache is None:
+        return None
+    return await cache.aget(_ocr_page_cache_key(image_sha256, system_prompt, user_prompt))
+
+
+async def set_cached_ocr_page(
+    image_sha256: str, system_prompt: str, user_prompt: str, page: dict[str, Any]
+) -> None:
+    """Store a parsed OCR page (only successful parses should be cached)."""
+    cache = get_ocr_page_cache()
+    if cache is None:
+        return
+    value = {key: page[key] for key in ("text", "tables", "images") if key in page}
+    await cache.aset(_ocr_page_cache_key(image_sha256, system_prompt, user_prompt), value)
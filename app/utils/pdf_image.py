@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import io
+from typing import Any
+
+import fitz  # PyMuPDF
+
+try:  # optional, only needed for WebP
+    from PIL import Image
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+# Runs inside the pdf_render pool workers: keep it free of app settings.
+
+IMAGE_MIME_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+
+_POINTS_PER_INCH = 72.0
+
+
+def _content_rect(page: Any, margin: float) -> Any:
+    """Union of text, image and drawing boxes plus `margin`; the page if empty."""
+    rect = fitz.EMPTY_RECT()
+    for block in page.get_text("blocks"):
+        rect |= fitz.Rect(block[:4])
+    for info in page.get_image_info():
+        rect |= fitz.Rect(info["bbox"])
+    for drawing in page.get_drawings():
+        rect |= drawing["rect"]
+
+    if rect.is_empty:
+        return page.rect
+    rect = fitz.Rect(rect.x0 - margin, rect.y0 - margin, rect.x1 + margin, rect.y1 + margin)
+    return rect & page.rect
+
+
+def _is_gray(color: Any) -> bool:
+    return not color or max(color) - min(color) < 0.02
+
+
+def _is_text_only(page: Any) -> bool:
+    # no raster images and no coloured vector graphics (charts, highlights)
+    if page.get_image_info():
+        return False
+    return all(
+        _is_gray(drawing.get("color")) and _is_gray(drawing.get("fill"))
+        for drawing in page.get_drawings()
+    )
+
+
+def _pick_dpi(page: Any, rect: Any, options: dict[str, Any]) -> float:
+    """
+    Dense text needs resolution to stay legible; otherwise size the image so
+    its long side is about `target_long_side_px`.
+    """
+    min_dpi = float(options.get("min_dpi", 96))
+    max_dpi = float(options.get("max_dpi", 144))
+
+    area_sq_in = (rect.width * rect.height) / (_POINTS_PER_INCH**2)
+    chars = sum(1 for ch in page.get_text("text", clip=rect) if not ch.isspace())
+    if area_sq_in and chars / area_sq_in >= float(options.get("dense_chars_per_sq_in", 40)):
+        return max_dpi
+
+    long_side_in = max(rect.width, rect.height) / _POINTS_PER_INCH
+    if not long_side_in:
+        return max_dpi
+    dpi = float(options.get("target_long_side_px", 1400)) / long_side_in
+    return min(max_dpi, max(min_dpi, dpi))
+
+
+def _encode(pix: Any, fmt: str, quality: int) -> tuple[bytes, str]:
+    if fmt == "webp" and Image is not None:
+        mode = "L" if pix.n == 1 else "RGB"
+        image = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+        buffer = io.BytesIO()
+        image.save(buffer, format="WEBP", quality=quality, method=4)
+        return buffer.getvalue(), "webp"
+    if fmt in ("jpeg", "webp"):  # WebP without Pillow falls back to JPEG
+        return pix.tobytes("jpeg", jpg_quality=quality), "jpeg"
+    return pix.tobytes("png"), "png"
+
+
+def encode_page_image(
+    page: Any, *, scale: float, options: dict[str, Any] | None = None
+) -> tuple[bytes, str, dict[str, Any]]:
+    """
+    Rasterize and encode one page for the VLM: `(image_bytes, mime, info)`.
+
+    Without `options` this is the plain RGB PNG at `scale`. Options:
+    format ("png" | "jpeg" | "webp") and quality; grayscale (text-only pages
+    are rendered in gray); crop + crop_margin_pt (trim empty page margins);
+    adaptive_dpi with min_dpi / max_dpi / target_long_side_px /
+    dense_chars_per_sq_in (replaces `scale`).
+    """
+    options = options or {}
+    clip = page.rect
+    if options.get("crop"):
+        clip = _content_rect(page, float(options.get("crop_margin_pt", 12.0)))
+
+    if options.get("adaptive_dpi"):
+        scale = _pick_dpi(page, clip, options) / _POINTS_PER_INCH
+
+    grayscale = bool(options.get("grayscale")) and _is_text_only(page)
+    pix = page.get_pixmap(
+        matrix=fitz.Matrix(scale, scale),
+        clip=clip,
+        colorspace=fitz.csGRAY if grayscale else fitz.csRGB,
+        alpha=False,
+    )
+    data, fmt = _encode(
+        pix,
+        str(options.get("format") or "png").lower(),
+        int(options.get("quality", 85)),
+    )
+    info = {
+        "format": fmt,
+        "dpi": round(scale * _POINTS_PER_INCH),
+        "grayscale": grayscale,
+        "cropped": clip != page.rect,
+        "width": pix.width,
+        "height": pix.height,
+    }
+    return data, IMAGE_MIME_TYPES[fmt], info
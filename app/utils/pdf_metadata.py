@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Any
+
+# Pure functions over `doc.metadata` and the first page's text layer; no
+# model calls and no app settings.
+
+DOI_RE = re.compile(r"\b(10\.\d{4,9}/[^\s\"<>]+)", re.I)
+_DOI_TRAILING = ".,;:)]}'"
+
+# "Neurobiology of Aging 80 (2019) 1-10" (Elsevier style running header)
+_JOURNAL_HEADER_RE = re.compile(
+    r"^\s*(?P<journal>[A-Z][A-Za-z&,:'\- ]{3,120}?)\s+\d+\s*"
+    r"\((?P<year>(?:19|20)\d{2})\)\s*(?:\d+|e\d+)",
+    re.M,
+)
+# PDF "subject" as written by publishers: "Journal Name, 80 (2019) 1-10. doi:..."
+_SUBJECT_RE = re.compile(
+    r"^\s*(?P<journal>[^,\d]{4,120}?),\s*\d+.*?\((?P<year>(?:19|20)\d{2})\)"
+)
+_PUBLISHED_YEAR_RE = re.compile(
+    # not "(c)": on a first page that is as often an enumeration marker
+    r"(?:©|copyright|published(?: online)?:?)"
+    r"[^\n\d]{0,40}?(?:\d{1,2}\s+[A-Za-z]+\s+)?(?P<year>(?:19|20)\d{2})\b",
+    re.I,
+)
+_FILENAME_TITLE_RE = re.compile(
+    r"(?:^microsoft word\s*-|^untitled|\.(?:docx?|pdf|tex|dvi|indd)$)", re.I
+)
+_AUTHOR_SPLIT_RE = re.compile(r"\s*;\s*|\s+(?:and|&)\s+")
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(re.findall(r"\w+", text))
+
+
+def find_doi(*texts: str | None) -> str | None:
+    for text in texts:
+        match = DOI_RE.search(text or "")
+        if match:
+            return match.group(1).rstrip(_DOI_TRAILING).lower()
+    return None
+
+
+def _metadata_title(metadata: dict[str, Any], page_text: str) -> str | None:
+    title = " ".join(str(metadata.get("title") or "").split())
+    if len(title) < 15 or len(title.split()) < 3 or _FILENAME_TITLE_RE.search(title):
+        return None
+    # producers often fill the title with a file or template name; trust it
+    # only when the first page prints the same words
+    if _normalize(title) not in _normalize(page_text):
+        return None
+    return title
+
+
+def _metadata_authors(metadata: dict[str, Any], page_text: str) -> list[str] | None:
+    raw = " ".join(str(metadata.get("author") or "").split())
+    if not raw:
+        return None
+    authors = [name.strip(" ,") for name in _AUTHOR_SPLIT_RE.split(raw)]
+    if ";" not in raw:
+        authors = [part.strip() for name in authors for part in name.split(",")]
+    authors = [name for name in authors if name]
+
+    page_words = set(_normalize(page_text).split())
+    for name in authors:
+        words = _normalize(name).split()
+        # "Smith, J." split on the comma leaves one-word parts: not a list we
+        # can trust. Each author's longest name part (the surname, whatever
+        # the order) must appear on the first page.
+        if len(words) < 2 or max(words, key=len) not in page_words:
+            return None
+    return authors
+
+
+def _journal_and_year(
+    metadata: dict[str, Any], page_text: str
+) -> tuple[str | None, int | None]:
+    subject = " ".join(str(metadata.get("subject") or "").split())
+    match = _SUBJECT_RE.match(subject)
+    if match and _normalize(match.group("journal")) in _normalize(page_text):
+        return match.group("journal").strip(), int(match.group("year"))
+
+    match = _JOURNAL_HEADER_RE.search(page_text[:2000])
+    if match:
+        journal = " ".join(match.group("journal").split()).strip(" ,:")
+        return journal, int(match.group("year"))
+    return None, None
+
+
+def detect_bibliographic_fields(
+    metadata: dict[str, Any] | None, page_text: str
+) -> dict[str, Any]:
+    """
+    High-confidence bibliographic fields from the PDF metadata and the first
+    page's text layer: `{"doi", "fields", "sources"}`.
+
+    A value is only returned when a second source backs it: metadata title
+    and authors must be printed on the first page, a journal must come with a
+    volume/year citation line, and a year must be printed next to a
+    copyright / publication marker (the PDF creation date is ignored). A
+    year from such a marker alone has source "page_text" and is weaker than
+    one from a citation line.
+    """
+    metadata = metadata or {}
+    fields: dict[str, Any] = {}
+    sources: dict[str, str] = {}
+
+    title = _metadata_title(metadata, page_text)
+    if title:
+        fields["title"], sources["title"] = title, "pdf_metadata"
+
+    authors = _metadata_authors(metadata, page_text)
+    if authors:
+        fields["authors"], sources["authors"] = authors, "pdf_metadata"
+
+    journal, year = _journal_and_year(metadata, page_text)
+    if journal:
+        fields["journal"], sources["journal"] = journal, "citation_line"
+    if year is None:
+        match = _PUBLISHED_YEAR_RE.search(page_text)
+        if match:
+            year = int(match.group("year"))
+    if year is not None:
+        fields["year"] = year
+        sources["year"] = "citation_line" if journal else "page_text"
+
+    doi = find_doi(
+        str(metadata.get("subject") or ""),
+        str(metadata.get("keywords") or ""),
+        page_text,
+    )
+    return {"doi": doi, "fields": fields, "sources": sources}
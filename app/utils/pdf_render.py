@@ -0,0 +1,426 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, AsyncIterator
+
+import fitz  # PyMuPDF
+
+from app.utils.pdf_image import encode_page_image
+from app.utils.pdf_text import classify_page, extract_page_content, text_fingerprint
+
+# Worker processes import this module by name to run the page jobs, so it
+# must stay importable without the app settings / env (see get_pdf_renderer).
+
+
+# -------------------------
+# Page jobs (run in the pool)
+# -------------------------
+
+
+def _open_pdf(data: bytes) -> Any:
+    try:
+        return fitz.open(stream=data, filetype="pdf")
+    except Exception as exc:
+        raise ValueError(f"Invalid PDF: {exc}") from exc
+
+
+def _process_page(
+    doc: Any,
+    index: int,
+    scale: float,
+    text_layer: dict[str, Any] | None,
+    encoding: dict[str, Any] | None,
+) -> dict[str, Any]:
+    """
+    `{"page", "image", "mime"}`, or `{"page", "content"}` when the page's text
+    layer is good enough to skip OCR (only checked when `text_layer`
+    thresholds are set).
+    """
+    page = doc.load_page(index)
+    result: dict[str, Any] = {"page": index + 1}
+    if text_layer is not None:
+        metrics = classify_page(page, **text_layer)
+        result["metrics"] = metrics
+        if metrics["text_layer"]:
+            result["content"] = extract_page_content(page)
+            return result
+
+    image, mime, info = encode_page_image(page, scale=scale, options=encoding)
+    # content address of what the VLM will see (OCR page cache key)
+    result.update(
+        image=image,
+        mime=mime,
+        image_info=info,
+        image_sha256=hashlib.sha256(image).hexdigest(),
+    )
+    return result
+
+
+# per-process: recently used documents, keyed by their segment name. Jobs
+# of concurrent uploads interleave on the same worker, so keeping only the
+# last document would reopen a PDF on nearly every page.
+_WORKER_DOC_CACHE_SIZE = 4
+_worker_docs: OrderedDict[str, Any] = OrderedDict()
+
+
+def _open_shared_pdf(name: str, size: int) -> Any:
+    doc = _worker_docs.get(name)
+    if doc is not None:
+        _worker_docs.move_to_end(name)
+        return doc
+
+    shm = SharedMemory(name=name, track=False)
+    try:
+        data = bytes(shm.buf[:size])
+    finally:
+        shm.close()
+    doc = _open_pdf(data)
+    _worker_docs[name] = doc
+    while len(_worker_docs) > _WORKER_DOC_CACHE_SIZE:
+        _, evicted = _worker_docs.popitem(last=False)
+        evicted.close()
+    return doc
+
+
+def _count_shared_pages(name: str, size: int) -> int:
+    return _open_shared_pdf(name, size).page_count
+
+
+def _process_shared_page(
+    name: str,
+    size: int,
+    index: int,
+    scale: float,
+    text_layer: dict[str, Any] | None,
+    encoding: dict[str, Any] | None,
+) -> dict[str, Any]:
+    """One page job; the image goes back through a new shared segment."""
+    result = _process_page(
+        _open_shared_pdf(name, size), index, scale, text_layer, encoding
+    )
+    image = result.pop("image", None)
+    if image is not None:
+        out = SharedMemory(create=True, size=max(1, len(image)), track=False)
+        try:
+            out.buf[: len(image)] = image
+        finally:
+            out.close()
+        result["image_segment"] = (out.name, len(image))
+    return result
+
+
+def _count_pages(data: bytes) -> int:
+    doc = _open_pdf(data)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def _process_bytes_page(
+    data: bytes,
+    index: int,
+    scale: float,
+    text_layer: dict[str, Any] | None,
+    encoding: dict[str, Any] | None,
+) -> dict[str, Any]:
+    # thread mode: PyMuPDF documents are not thread-safe, one per job
+    doc = _open_pdf(data)
+    try:
+        return _process_page(doc, index, scale, text_layer, encoding)
+    finally:
+        doc.close()
+
+
+def _fingerprint_pdf(data: bytes) -> dict[str, Any]:
+    doc = _open_pdf(data)
+    try:
+        return {
+            "pdf_sha256": hashlib.sha256(data).hexdigest(),
+            "text_fingerprint": text_fingerprint(doc[0]) if doc.page_count else None,
+            "page_count": doc.page_count,
+        }
+    finally:
+        doc.close()
+
+
+def _read_metadata(data: bytes) -> dict[str, Any]:
+    doc = _open_pdf(data)
+    try:
+        return {
+            "metadata": dict(doc.metadata or {}),
+            "first_page_text": doc[0].get_text("text") if doc.page_count else "",
+        }
+    finally:
+        doc.close()
+
+
+def _take_shared_bytes(name: str, size: int) -> bytes:
+    shm = SharedMemory(name=name, track=False)
+    try:
+        return bytes(shm.buf[:size])
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _collect_image(result: dict[str, Any]) -> dict[str, Any]:
+    segment = result.pop("image_segment", None)
+    if segment is not None:
+        result["image"] = _take_shared_bytes(*segment)
+    return result
+
+
+def _discard_output(job: Future) -> None:
+    if not job.cancelled() and job.exception() is None:
+        _collect_image(job.result())
+
+
+# -------------------------
+# Renderer
+# -------------------------
+
+
+class RenderDocument:
+    """
+    A PDF opened for page jobs, from `PdfRenderer.document()`.
+
+    Pages are processed one `process_page()` call at a time, so a caller can
+    bound how many rendered images are alive at once. In process mode the
+    PDF lives in one shared memory segment until the document is closed.
+    """
+
+    def __init__(self, renderer: PdfRenderer, executor: Executor, pdf_bytes: bytes):
+        self.page_count = 0
+        self._renderer = renderer
+        self._executor = executor
+        self._pdf_bytes = pdf_bytes
+        self._source: SharedMemory | None = None
+
+    async def _open(self) -> None:
+        loop = asyncio.get_running_loop()
+        if not self._renderer.use_processes:
+            self.page_count = await loop.run_in_executor(
+                self._executor, _count_pages, self._pdf_bytes
+            )
+            return
+
+        size = len(self._pdf_bytes)
+        self._source = SharedMemory(create=True, size=max(1, size))
+        self._source.buf[:size] = self._pdf_bytes
+        self.page_count = await loop.run_in_executor(
+            self._executor, _count_shared_pages, self._source.name, size
+        )
+
+    def _submit(
+        self,
+        index: int,
+        scale: float,
+        text_layer: dict[str, Any] | None,
+        encoding: dict[str, Any] | None,
+    ) -> Future:
+        if self._source is None:
+            return self._executor.submit(
+                _process_bytes_page, self._pdf_bytes, index, scale, text_layer, encoding
+            )
+        return self._executor.submit(
+            _process_shared_page,
+            self._source.name,
+            len(self._pdf_bytes),
+            index,
+            scale,
+            text_layer,
+            encoding,
+        )
+
+    async def process_page(
+        self,
+        index: int,
+        *,
+        scale: float = 2.0,
+        text_layer: dict[str, Any] | None = None,
+        encoding: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """
+        `{"page", "image", "mime", "image_sha256"}` for a rasterized page,
+        `{"page", "content"}` for a page served from the text layer (0-based
+        `index`, 1-based "page").
+
+        `text_layer` holds the `classify_page` thresholds; None always
+        rasterizes. `encoding` holds the `encode_page_image` options; None is
+        an RGB PNG at `scale`.
+        """
+        renderer = self._renderer
+        try:
+            job = self._submit(index, scale, text_layer, encoding)
+            try:
+                result = await asyncio.wrap_future(job)
+            except asyncio.CancelledError:
+                # a job already running still writes an image segment; free it when done
+                job.add_done_callback(_discard_output)
+                raise
+        except BrokenProcessPool as exc:
+            renderer.failures += 1
+            renderer._discard_executor(self._executor)
+            raise ValueError(f"PDF rendering failed: {exc}") from exc
+        except Exception:
+            renderer.failures += 1
+            raise
+
+        page = _collect_image(result)
+        if "image" in page:
+            renderer.pages_rendered += 1
+            renderer.image_bytes += len(page["image"])
+        else:
+            renderer.pages_text_layer += 1
+        return page
+
+    def close(self) -> None:
+        if self._source is not None:
+            self._source.close()
+            self._source.unlink()
+            self._source = None
+
+
+class PdfRenderer:
+    """
+    Rasterizes PDF pages off the event loop, one pool job per page.
+
+    With text-layer thresholds, born-digital pages are extracted natively in
+    the same job instead (see app/utils/pdf_text.py) and never rasterized.
+
+    In process mode (default) the PDF is copied once into a shared memory
+    segment that every worker reads, and each page's image comes back through
+    its own segment, so only segment names are pickled. Each worker keeps the
+    open document between pages of the same PDF. Thread mode skips shared
+    memory; it only helps where PyMuPDF releases the GIL, so it is mainly a
+    fallback for environments without process support.
+    """
+
+    def __init__(self, *, max_workers: int, use_processes: bool = True):
+        self.max_workers = max(1, max_workers)
+        self.use_processes = use_processes
+        self._lock = threading.Lock()
+        self._executor: Executor | None = None
+
+        self.documents = 0
+        self.pages_rendered = 0
+        self.pages_text_layer = 0
+        self.image_bytes = 0
+        self.failures = 0
+        self.pool_restarts = 0
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="pdf-render",
+                    )
+            return self._executor
+
+    def _discard_executor(self, executor: Executor) -> None:
+        # a crashed worker breaks the whole pool; the next call starts a new one
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self.pool_restarts += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    @asynccontextmanager
+    async def document(self, pdf_bytes: bytes) -> AsyncIterator[RenderDocument]:
+        """
+        Open a PDF for `process_page()` calls.
+
+        Raises ValueError for an unreadable PDF.
+        """
+        executor = self._get_executor()
+        document = RenderDocument(self, executor, pdf_bytes)
+        try:
+            try:
+                await document._open()
+            except BrokenProcessPool as exc:
+                self.failures += 1
+                self._discard_executor(executor)
+                raise ValueError(f"PDF rendering failed: {exc}") from exc
+            except Exception:
+                self.failures += 1
+                raise
+            self.documents += 1
+            yield document
+        finally:
+            document.close()
+
+    async def _run(self, fn: Any, *args: Any) -> Any:
+        # one whole-document job (no page window, no shared memory)
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool as exc:
+            self.failures += 1
+            self._discard_executor(executor)
+            raise ValueError(f"PDF rendering failed: {exc}") from exc
+
+    async def fingerprint(self, pdf_bytes: bytes) -> dict[str, Any]:
+        """
+        `{"pdf_sha256", "text_fingerprint", "page_count"}` for duplicate checks,
+        computed in the pool. `text_fingerprint` hashes the normalized first
+        page text (None for scans). Raises ValueError for an unreadable PDF.
+        """
+        return await self._run(_fingerprint_pdf, pdf_bytes)
+
+    async def metadata(self, pdf_bytes: bytes) -> dict[str, Any]:
+        """
+        `{"metadata", "first_page_text"}`: the PDF info dictionary and the
+        first page's text layer. Raises ValueError for an unreadable PDF.
+        """
+        return await self._run(_read_metadata, pdf_bytes)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "mode": "process" if self.use_processes else "thread",
+            "max_workers": self.max_workers,
+            "started": self._executor is not None,
+            "documents": self.documents,
+            "pages_rendered": self.pages_rendered,
+            "pages_text_layer": self.pages_text_layer,
+            "image_bytes": self.image_bytes,
+            "failures": self.failures,
+            "pool_restarts": self.pool_restarts,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_pdf_renderer() -> PdfRenderer:
+    # imported here so pool workers never load the settings
+    from app.core.config import settings
+
+    max_workers = settings.pdf_render_workers or min(4, os.cpu_count() or 1)
+    return PdfRenderer(
+        max_workers=max_workers,
+        use_processes=settings.pdf_render_use_processes,
+    )
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+from typing import Any
+
+# Runs inside the pdf_render pool workers: keep it free of app settings.
+
+
+_CAPTION_RE = re.compile(r"^\s*(?:fig(?:ure)?\.?|chart|scheme|plate)\s*\d+[a-z]?\b.*$", re.I)
+_UNMAPPED_CHARS = {"\ufffd", "\x00"}
+_WORD_RE = re.compile(r"\w+")
+
+
+def _image_area_ratio(page: Any) -> float:
+    page_rect = page.rect
+    page_area = abs(page_rect.width * page_rect.height)
+    if not page_area:
+        return 0.0
+
+    covered = 0.0
+    for info in page.get_image_info():
+        bbox = page_rect & info.get("bbox", (0, 0, 0, 0))
+        if not bbox.is_empty:
+            covered += abs(bbox.width * bbox.height)
+    return min(1.0, covered / page_area)
+
+
+def classify_page(
+    page: Any,
+    *,
+    min_chars: int,
+    min_glyph_coverage: float,
+    max_image_ratio: float,
+) -> dict[str, Any]:
+    """
+    Decide whether a page's embedded text layer can replace VLM OCR.
+
+    - char_count: non-whitespace characters in the text layer
+    - glyph_coverage: share of those characters that map to real unicode
+      (fonts without a ToUnicode map extract as U+FFFD)
+    - image_area_ratio: share of the page covered by raster images; scans
+      (even ones with a hidden OCR text layer) are mostly image
+    """
+    text = page.get_text("text")
+    chars = [ch for ch in text if not ch.isspace()]
+    char_count = len(chars)
+    unmapped = sum(1 for ch in chars if ch in _UNMAPPED_CHARS)
+    glyph_coverage = (char_count - unmapped) / char_count if char_count else 0.0
+    image_ratio = _image_area_ratio(page)
+
+    return {
+        "char_count": char_count,
+        "glyph_coverage": round(glyph_coverage, 4),
+        "image_area_ratio": round(image_ratio, 4),
+        "text_layer": (
+            char_count >= min_chars
+            and glyph_coverage >= min_glyph_coverage
+            and image_ratio <= max_image_ratio
+        ),
+    }
+
+
+def _cell(value: Any) -> str:
+    return " ".join(str(value).split()) if value is not None else ""
+
+
+def _extract_tables(page: Any) -> list[dict[str, Any]]:
+    try:
+        found = page.find_tables()
+    except Exception:
+        return []
+
+    tables: list[dict[str, Any]] = []
+    for table in found.tables:
+        rows = [[_cell(value) for value in row] for row in table.extract()]
+        header = getattr(table, "header", None)
+        headers = [_cell(name) for name in (header.names if header else [])]
+        if header is not None and not header.external and rows:
+            rows = rows[1:]  # the header is the first extracted row
+        if headers or rows:
+            tables.append({"headers": headers, "rows": rows})
+    return tables
+
+
+def _column_ordered_text(page: Any) -> str:
+    """
+    Page text in reading order for one- and two-column layouts.
+
+    Blocks are split on the page midline. Blocks that straddle it (titles,
+    full-width figures) cut the page into bands; inside a band the left
+    column is read before the right one, each top to bottom.
+    """
+    midline = (page.rect.x0 + page.rect.x1) / 2
+    blocks = [
+        block
+        for block in page.get_text("blocks")
+        if block[6] == 0 and block[4].strip()  # text blocks only
+    ]
+    blocks.sort(key=lambda block: (block[1], block[0]))
+
+    ordered: list[str] = []
+    left: list[tuple] = []
+    right: list[tuple] = []
+
+    def _flush() -> None:
+        for column in (left, right):
+            ordered.extend(block[4].strip() for block in column)
+            column.clear()
+
+    for block in blocks:
+        x0, _, x1 = block[:3]
+        if x1 <= midline:
+            left.append(block)
+        elif x0 >= midline:
+            right.append(block)
+        else:
+            _flush()
+            ordered.append(block[4].strip())
+    _flush()
+    return "\n".join(ordered)
+
+
+def extract_page_content(page: Any) -> dict[str, Any]:
+    """
+    Native counterpart of the VLM OCR output: `{"text", "tables", "images"}`.
+
+    Figures cannot be described without a model, so `images` lists their
+    captions as found in the text layer.
+    """
+    text = _column_ordered_text(page).strip()
+    images = [
+        " ".join(line.split())
+        for line in text.splitlines()
+        if _CAPTION_RE.match(line)
+    ]
+    return {"text": text, "tables": _extract_tables(page), "images": images}
+
+
+def text_fingerprint(page: Any, *, min_chars: int = 200) -> str | None:
+    """
+    sha256 of the page text normalized for re-saved copies of the same file
+    (NFKC, case-folded, words only). None when the page has too little text
+    to identify a paper, e.g. scans.
+    """
+    text = unicodedata.normalize("NFKC", page.get_text("text")).casefold()
+    normalized = " ".join(_WORD_RE.findall(text))
+    if len(normalized) < min_chars:
+        return None
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
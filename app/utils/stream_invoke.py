@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 from collections.abc import Callable
+from contextlib import aclosing
 from typing import Any, AsyncIterator, Optional
 
-import httpx
-
 from app.clients.vllm_client import VllmClient
+from app.core.config import settings
+from app.enums.common import LlmOutputSchema
 from app.enums.multimodal_extraction import VllmTaskType
+from app.utils.json_stream import IncrementalJsonParser
 
 
 # -------------------------
@@ -51,6 +53,22 @@ def emit_node_progress(
     _emit(w, event="node_progress", node=node, **payload)
 
 
+def emit_node_event(
+    *,
+    event: str,
+    node: str,
+    page: int | None = None,
+    writer: StreamWriter | None = None,
+    **fields: Any,
+) -> None:
+    """Emit a custom named event, e.g. a per-page result (simple public API)."""
+
+    payload: dict[str, Any] = dict(fields)
+    if page is not None:
+        payload["page"] = page
+    _emit(_get_writer(writer), event=event, node=node, **payload)
+
+
 # -------------------------
 # LLM streaming (currently via vLLM)
 # -------------------------
@@ -66,35 +84,32 @@ async def stream_llm_delta_tokens(
     max_tokens: Optional[int] = None,
     temperature: float = 0.2,
     extra: Optional[dict[str, Any]] = None,
+    output_schema: Optional[LlmOutputSchema] = None,
 ) -> AsyncIterator[str]:
     """Stream chat completion and yield delta content tokens.
 
     Notes:
     - This is provider-agnostic at the call site, but is currently implemented
       with `VllmClient`.
-    - Owns http client creation and streaming iteration.
+    - Uses the app-wide pooled http client, so consecutive nodes reuse
+      the same keep-alive connections.
+    - Delta contents come straight from the byte-level SSE parser.
     """
 
     vllm_client = VllmClient(port=port, timeout_s=timeout_s)
 
-    async with httpx.AsyncClient(timeout=timeout_s, trust_env=False) as client:
-        async for chunk in vllm_client.stream_chat(
-            client,
+    async with aclosing(
+        vllm_client.stream_chat_deltas(
             system_prompt=system_prompt,
             user_prompt=user_prompt,
             task_type=task_type,
             max_tokens=max_tokens,
             temperature=temperature,
             extra=extra,
-        ):
-            try:
-                delta = chunk.get("choices", [{}])[0].get("delta", {}).get("content")
-            except Exception:
-                delta = None
-
-            if not delta:
-                continue
-
+            output_schema=output_schema,
+        )
+    ) as deltas:
+        async for delta in deltas:
             yield str(delta)
 
 
@@ -109,36 +124,66 @@ async def stream_llm_and_collect(
     max_tokens: Optional[int] = None,
     temperature: float = 0.2,
     extra: Optional[dict[str, Any]] = None,
+    output_schema: Optional[LlmOutputSchema] = None,
+    on_field: Callable[[str, Any], None] | None = None,
+    stop_at_json_end: bool = False,
 ) -> dict[str, Any]:
     """Stream tokens (side-effect) and return collected result.
 
     - Streaming output: via `on_token(token)` callback (optional)
+    - JSON output: `on_field(key, value)` fires as each top-level key of the
+      root object completes; with `stop_at_json_end` the upstream request is
+      closed as soon as the root object closes (trailing prose is never
+      decoded; the response cache keeps the stream up to that point)
     - Return value: includes both `tokens` and concatenated `text`
     """
 
     tokens: list[str] = []
+    parser = (
+        IncrementalJsonParser()
+        if on_field is not None or stop_at_json_end
+        else None
+    )
+    early_stopped = False
 
-    async for token in stream_llm_delta_tokens(
-        system_prompt=system_prompt,
-        user_prompt=user_prompt,
-        task_type=task_type,
-        port=port,
-        timeout_s=timeout_s,
-        max_tokens=max_tokens,
-        temperature=temperature,
-        extra=extra,
-    ):
-        tokens.append(token)
-        if on_token is not None:
-            on_token(token)
+    async with aclosing(
+        stream_llm_delta_tokens(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            task_type=task_type,
+            port=port,
+            timeout_s=timeout_s,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            extra=extra,
+            output_schema=output_schema,
+        )
+    ) as stream:
+        async for token in stream:
+            tokens.append(token)
+            if on_token is not None:
+                on_token(token)
+            if parser is None:
+                continue
+
+            for key, value in parser.feed(token):
+                if on_field is not None:
+                    on_field(key, value)
+            if parser.done and stop_at_json_end:
+                early_stopped = True
+                break
 
     text = "".join(tokens)
-    return {
+    result: dict[str, Any] = {
         "tokens": tokens,
         "text": text,
         "text_length": len(text),
         "token_count": len(tokens),
     }
+    if parser is not None:
+        result["json_complete"] = parser.done
+        result["early_stopped"] = early_stopped
+    return result
 
 
 async def stream_node_llm_and_collect(
@@ -156,10 +201,15 @@ async def stream_node_llm_and_collect(
     max_tokens: Optional[int] = None,
     temperature: float = 0.2,
     extra: Optional[dict[str, Any]] = None,
+    output_schema: Optional[LlmOutputSchema] = None,
+    stop_at_json_end: bool | None = None,
 ) -> dict[str, Any]:
     """One-call helper for LangGraph nodes (simple public API).
 
     Handles writer + progress/token events + final collected return.
+    Structured calls (`output_schema`) also emit a `field_complete` event per
+    finished top-level key and, unless `stop_at_json_end=False` (default:
+    LLM_STREAM_STOP_AT_JSON_END), stop the stream once the object closes.
     """
 
     w = _get_writer(writer)
@@ -168,6 +218,14 @@ async def stream_node_llm_and_collect(
     def on_token(token: str) -> None:
         _emit(w, event="llm_token", node=node, token=token, page=page)
 
+    def on_field(key: str, value: Any) -> None:
+        _emit(w, event="field_complete", node=node, key=key, value=value, page=page)
+
+    if stop_at_json_end is None:
+        stop_at_json_end = (
+            output_schema is not None and settings.llm_stream_stop_at_json_end
+        )
+
     result = await stream_llm_and_collect(
         system_prompt=system_prompt,
         user_prompt=user_prompt,
@@ -178,6 +236,9 @@ async def stream_node_llm_and_collect(
         max_tokens=max_tokens,
         temperature=temperature,
         extra=extra,
+        output_schema=output_schema,
+        on_field=on_field if output_schema is not None else None,
+        stop_at_json_end=stop_at_json_end,
     )
 
     emit_node_progress(
@@ -186,5 +247,6 @@ async def stream_node_llm_and_collect(
         page=page,
         writer=w,
         text_length=int(result.get("text_length") or 0),
+        early_stopped=bool(result.get("early_stopped")),
     )
     return result
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from functools import lru_cache
+from typing import Any
+
+import httpx
+
+from app.clients.load_balancer import ReplicaPool
+from app.core.config import settings
+from app.core.logger import set_log
+
+# VLLM_MAX_MODEL_LEN, or what vLLM reported at startup
+_discovered_max_model_len: int | None = None
+
+
+class ContextBudgetExceededError(ValueError):
+    """Raised before sending a request that cannot fit the model context."""
+
+
+class TokenCounter:
+    """
+    Token counts for prompt packing.
+
+    Uses a local HuggingFace `tokenizers` file when LLM_TOKENIZER_PATH is set
+    and the package is installed; otherwise a chars-per-token estimate that
+    is re-calibrated from the `usage.prompt_tokens` vLLM reports back.
+    """
+
+    def __init__(self, *, chars_per_token: float, tokenizer_path: str | None = None):
+        self.chars_per_token = max(0.5, chars_per_token)
+        self._tokenizer: Any = None
+        self._lock = threading.Lock()
+        self.calibration_samples = 0
+
+        if tokenizer_path:
+            try:
+                from tokenizers import Tokenizer
+
+                self._tokenizer = Tokenizer.from_file(tokenizer_path)
+            except Exception as exc:
+                set_log(
+                    f"Tokenizer unavailable ({exc}), using {self.chars_per_token} chars/token",
+                    level="warning",
+                )
+
+    @property
+    def mode(self) -> str:
+        return "tokenizer" if self._tokenizer is not None else "estimate"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._tokenizer is not None:
+            return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+        return int(len(text) / self.chars_per_token) + 1
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Longest prefix of `text` that fits in `max_tokens`."""
+        if max_tokens <= 0:
+            return ""
+        if self._tokenizer is not None:
+            encoding = self._tokenizer.encode(text, add_special_tokens=False)
+            if len(encoding.ids) <= max_tokens:
+                return text
+            return text[: encoding.offsets[max_tokens - 1][1]]
+        return text[: int((max_tokens - 1) * self.chars_per_token)]
+
+    def calibrate(self, chars: int, prompt_tokens: int) -> None:
+        """Move the estimate towards an observed chars/token ratio (text-only prompts)."""
+        if self._tokenizer is not None or chars <= 0 or prompt_tokens <= 0:
+            return
+        with self._lock:
+            observed = chars / prompt_tokens
+            self.calibration_samples += 1
+            # the configured value counts as a few prior samples
+            weight = max(0.05, 1.0 / (self.calibration_samples + 3))
+            self.chars_per_token += (observed - self.chars_per_token) * weight
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "chars_per_token": round(self.chars_per_token, 3),
+            "calibration_samples": self.calibration_samples,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_token_counter() -> TokenCounter:
+    return TokenCounter(
+        chars_per_token=settings.llm_chars_per_token,
+        tokenizer_path=settings.llm_tokenizer_path,
+    )
+
+
+def get_max_model_len() -> int | None:
+    return settings.vllm_max_model_len or _discovered_max_model_len
+
+
+async def discover_max_model_len(
+    client: httpx.AsyncClient,
+    replicas: ReplicaPool,
+    *,
+    retry_interval_s: float = 30.0,
+) -> None:
+    """
+    Read the served context length from /v1/models of `replicas` (the pool
+    chat calls go to) unless VLLM_MAX_MODEL_LEN is set. Retries until a
+    replica answers, so run it as a background task; until then the context
+    check is skipped.
+    """
+    global _discovered_max_model_len
+    while get_max_model_len() is None:
+        max_model_len = await replicas.fetch_max_model_len(
+            client, settings.vllm_model
+        )
+        if max_model_len is not None:
+            _discovered_max_model_len = max_model_len
+            set_log(f"vLLM max_model_len: {max_model_len}")
+            return
+        set_log(
+            f"vLLM max_model_len unknown, context checks are off; retry in "
+            f"{retry_interval_s:.0f}s",
+            level="warning",
+        )
+        await asyncio.sleep(retry_interval_s)
+
+
+class PagePack:
+    """Pages context packed into a token budget, plus what did not fit."""
+
+    def __init__(self, budget_tokens: int):
+        self.budget_tokens = budget_tokens
+        self.parts: list[str] = []
+        self.used_tokens = 0
+        self.included_pages: list[Any] = []
+        self.truncated_pages: list[Any] = []
+        self.dropped_pages: list[Any] = []
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(self.parts)
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "budget_tokens": self.budget_tokens,
+            "used_tokens": self.used_tokens,
+            "included_pages": self.included_pages,
+            "truncated_pages": self.truncated_pages,
+            "dropped_pages": self.dropped_pages,
+        }
+
+
+def _format_page(item: dict[str, Any]) -> str:
+    text = str(item.get("text") or "").strip()
+    tables = item.get("tables") or []
+
+    part = f"[PAGE {item.get('page')}]"
+    if text:
+        part += f"\nTEXT:\n{text}"
+    if tables:
+        part += f"\nTABLES:\n{json.dumps(tables, ensure_ascii=False)}"
+    return part
+
+
+def pack_pages(
+    pages_content: list[dict[str, Any]],
+    *,
+    budget_tokens: int,
+    counter: TokenCounter | None = None,
+    min_partial_tokens: int = 128,
+) -> PagePack:
+    """
+    Fill `budget_tokens` with whole pages in order.
+
+    The first page that does not fit is cut to the remaining budget (when at
+    least `min_partial_tokens` are left); every page after that is dropped.
+    """
+    counter = counter or get_token_counter()
+    pack = PagePack(budget_tokens)
+    separator_tokens = counter.count("\n\n")
+
+    for item in pages_content:
+        page = item.get("page")
+        if pack.dropped_pages or pack.truncated_pages:
+            pack.dropped_pages.append(page)
+            continue
+
+        part = _format_page(item)
+        cost = counter.count(part) + (separator_tokens if pack.parts else 0)
+        remaining = budget_tokens - pack.used_tokens
+        if cost <= remaining:
+            pack.parts.append(part)
+            pack.used_tokens += cost
+            pack.included_pages.append(page)
+            continue
+
+        if remaining - separator_tokens >= min_partial_tokens:
+            partial = counter.truncate(part, remaining - separator_tokens)
+            pack.parts.append(partial)
+            pack.used_tokens += counter.count(partial) + separator_tokens
+            pack.truncated_pages.append(page)
+        else:
+            pack.dropped_pages.append(page)
+
+    return pack
+
+
+def check_context_budget(
+    *,
+    system_prompt: str,
+    user_prompt: str,
+    image_count: int = 0,
+    max_tokens: int | None = None,
+    counter: TokenCounter | None = None,
+) -> int:
+    """
+    Estimated prompt tokens; raises if prompt + completion exceed the model
+    context (not checked while the context length is still unknown).
+    """
+    counter = counter or get_token_counter()
+    prompt_tokens = (
+        counter.count(system_prompt)
+        + counter.count(user_prompt)
+        + image_count * settings.llm_image_token_estimate
+    )
+    completion_tokens = (
+        max_tokens if max_tokens is not None else settings.llm_completion_reserve_tokens
+    )
+    max_model_len = get_max_model_len()
+    if max_model_len is not None and prompt_tokens + completion_tokens > max_model_len:
+        raise ContextBudgetExceededError(
+            f"Prompt needs ~{prompt_tokens} tokens + {completion_tokens} for the "
+            f"completion, over the model context of {max_model_len}"
+        )
+    return prompt_tokens
@@ -0,0 +1,113 @@
+"""
+Bulk ingestion CLI: every PDF under a directory, or in a zip archive, through
+the document graph in this process.
+
+    python -m app.workers.bulk_ingestion ./corpus --manifest corpus.jsonl
+
+Each file's result is appended to the JSONL manifest as it finishes; running
+the same command again resumes, skipping files already ingested. Files whose
+sha256 is already in the DB are not processed. Exits 1 if any file failed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.logger import set_log
+from app.enums.multimodal_extraction import BulkFileStatus
+from app.services.bulk_ingestion import (
+    BulkManifest,
+    list_directory_pdfs,
+    list_zip_pdfs,
+    open_zip,
+    run_bulk_ingestion,
+)
+from app.workers.runtime import backend_clients
+
+
+def _format_progress(progress: dict) -> str:
+    return (
+        f"{progress['files_done']}/{progress['files_total']} files "
+        f"(ingested={progress['ingested']} similar={progress['similar']} "
+        f"duplicate={progress['duplicate']} failed={progress['failed']} "
+        f"resumed={progress['resumed']}), {progress['pages']} pages in "
+        f"{progress['elapsed_s']}s: {progress['pages_per_s']} pages/s, "
+        f"{progress['papers_per_min']} papers/min"
+    )
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk PDF ingestion")
+    parser.add_argument("source", help="directory of PDFs or a .zip archive")
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        help="JSONL result manifest (default: BULK_MANIFEST_DIR/<source>.jsonl)",
+    )
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--ingestion-source", default="bulk")
+    parser.add_argument("--prompt", default="Describe the document")
+    parser.add_argument(
+        "--progress-every", type=float, default=10.0, help="seconds between logs"
+    )
+    args = parser.parse_args()
+
+    source = Path(args.source)
+    archive = None
+    if source.is_file() and source.suffix.lower() == ".zip":
+        archive = open_zip(source)
+        sources = list_zip_pdfs(archive)
+    else:
+        sources = list_directory_pdfs(source)
+    try:
+        manifest = BulkManifest(
+            args.manifest
+            or Path(settings.bulk_manifest_dir) / f"{source.resolve().name}.jsonl"
+        )
+    except ValueError as exc:
+        set_log(str(exc), level="error")
+        if archive is not None:
+            archive.close()
+        return 1
+
+    failed = 0
+    last_log = 0.0
+    try:
+        async with backend_clients():
+            async for event in run_bulk_ingestion(
+                sources,
+                manifest,
+                ingestion_source=args.ingestion_source,
+                prompt=args.prompt,
+                concurrency=args.concurrency,
+            ):
+                name = event.pop("event")
+                if name == "file_result":
+                    failed += event["status"] == BulkFileStatus.FAILED.value
+                    set_log(
+                        f"{event['status']}: {event['file']} "
+                        f"({event.get('page_count', 0)} pages, {event['elapsed_s']}s)"
+                        + (f" {event['error']}" if event.get("error") else "")
+                    )
+                elif name == "progress" and (
+                    time.monotonic() - last_log >= args.progress_every
+                ):
+                    last_log = time.monotonic()
+                    set_log(_format_progress(event))
+                elif name == "done":
+                    set_log(f"Done: {_format_progress(event)}")
+                    set_log(f"Manifest: {event['manifest']}")
+    finally:
+        manifest.close()
+        if archive is not None:
+            archive.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
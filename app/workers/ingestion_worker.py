@@ -0,0 +1,279 @@
+"""
+Ingestion worker: claims PDF ingestion jobs from cr_soles.jobs and runs them
+through the document graph, outside the HTTP process.
+
+    python -m app.workers.ingestion_worker --concurrency 4
+
+Start as many as the GPUs can feed, on any host that reaches the database:
+jobs are claimed with FOR UPDATE SKIP LOCKED, so workers never share one.
+A running job holds a lease (JOB_VISIBILITY_TIMEOUT_S) that the worker
+renews; if the worker dies, the lease lapses and another worker retries the
+job. Failed attempts are retried with exponential backoff up to
+JOB_MAX_ATTEMPTS; invalid PDFs fail at once.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+from typing import Any
+from uuid import UUID, uuid4
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.core.logger import set_log
+from app.models.jobs import Jobs
+from app.repositories.jobs_repository import (
+    claim_jobs,
+    complete_job,
+    fail_abandoned_jobs,
+    fail_job,
+    renew_job_lease,
+)
+from app.services.jobs import retry_delay_for, run_ingestion_job
+from app.workers.runtime import backend_clients
+from sqlalchemy.orm import undefer
+
+
+class IngestionWorker:
+    def __init__(
+        self,
+        *,
+        worker_id: str | None = None,
+        concurrency: int | None = None,
+        poll_interval_s: float | None = None,
+        visibility_timeout_s: float | None = None,
+    ):
+        self.worker_id = worker_id or (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        )
+        self.concurrency = max(1, concurrency or settings.job_worker_concurrency)
+        self.poll_interval_s = poll_interval_s or settings.job_poll_interval_s
+        self.visibility_timeout_s = (
+            visibility_timeout_s or settings.job_visibility_timeout_s
+        )
+        self._stopping = asyncio.Event()
+        self._tasks: set[asyncio.Task] = set()
+
+        self.claimed = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+        self.lost_leases = 0
+
+    def stop(self) -> None:
+        if not self._stopping.is_set():
+            set_log(f"Worker {self.worker_id} stopping, no new jobs will be claimed")
+            self._stopping.set()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "running": len(self._tasks),
+            "claimed": self.claimed,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "failed": self.failed,
+            "lost_leases": self.lost_leases,
+        }
+
+    # -------------------------
+    # DB calls (sync session, run in a thread)
+    # -------------------------
+
+    def _claim_sync(self, limit: int) -> list[UUID]:
+        with SessionLocal() as db:
+            abandoned = fail_abandoned_jobs(db)
+            if abandoned:
+                set_log(f"Failed {abandoned} abandoned jobs", level="warning")
+            jobs = claim_jobs(
+                db,
+                worker_id=self.worker_id,
+                limit=limit,
+                visibility_timeout_s=self.visibility_timeout_s,
+            )
+            job_ids = [job.id for job in jobs]
+            db.commit()
+        return job_ids
+
+    def _renew_sync(self, job_id: UUID) -> bool:
+        with SessionLocal() as db:
+            renewed = renew_job_lease(
+                db,
+                job_id=job_id,
+                worker_id=self.worker_id,
+                visibility_timeout_s=self.visibility_timeout_s,
+            )
+            db.commit()
+        return renewed
+
+    def _fail_sync(
+        self,
+        job_id: UUID,
+        error: str,
+        retry_delay_s: float | None,
+        count_attempt: bool = True,
+    ) -> None:
+        with SessionLocal() as db:
+            fail_job(
+                db,
+                job_id=job_id,
+                worker_id=self.worker_id,
+                error=error,
+                retry_delay_s=retry_delay_s,
+                count_attempt=count_attempt,
+            )
+            db.commit()
+
+    # -------------------------
+    # Jobs
+    # -------------------------
+
+    async def _keep_lease(self, job_id: UUID, work: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(self.visibility_timeout_s / 3)
+            try:
+                renewed = await asyncio.to_thread(self._renew_sync, job_id)
+            except Exception as exc:
+                set_log(
+                    f"Lease renewal failed for job {job_id}: {exc}", level="warning"
+                )
+                continue
+            if not renewed:
+                # lapsed and reclaimed elsewhere: stop spending GPU time on it
+                self.lost_leases += 1
+                set_log(f"Lost the lease on job {job_id}, cancelling", level="warning")
+                work.cancel()
+                return
+
+    async def _run_job(self, job_id: UUID) -> None:
+        db = SessionLocal()
+        try:
+            # the claim left the upload deferred; load it with the job
+            job = db.get(Jobs, job_id, options=[undefer(Jobs.pdf_bytes)])
+            if job is None:
+                return
+            attempt, max_attempts = job.attempts, job.max_attempts
+            set_log(f"Running job {job_id} (attempt {attempt}/{max_attempts})")
+
+            work = asyncio.create_task(run_ingestion_job(db, job))
+            lease = asyncio.create_task(self._keep_lease(job_id, work))
+            try:
+                result = await work
+            except asyncio.CancelledError:
+                db.rollback()
+                if lease.done():
+                    return  # lost the lease; the new owner runs the job
+                if self._stopping.is_set():
+                    # shutdown: hand the job back right away instead of
+                    # waiting for the lease to lapse, without using up an attempt
+                    await asyncio.to_thread(
+                        self._fail_sync, job_id, "Worker shut down", 0.0, False
+                    )
+                raise
+            except Exception as exc:
+                db.rollback()
+                error = f"{type(exc).__name__}: {exc}"
+                # invalid uploads will not get better on retry
+                retry_delay_s = None
+                if not isinstance(exc, ValueError) and attempt < max_attempts:
+                    retry_delay_s = retry_delay_for(attempt)
+                if retry_delay_s is None:
+                    self.failed += 1
+                    set_log(f"Job {job_id} failed: {error}", level="error")
+                else:
+                    self.retried += 1
+                    set_log(
+                        f"Job {job_id} failed ({error}), retry in {retry_delay_s:.0f}s",
+                        level="warning",
+                    )
+                await asyncio.to_thread(self._fail_sync, job_id, error, retry_delay_s)
+                return
+            finally:
+                lease.cancel()
+
+            # the papers_staging insert and the job result commit together
+            if complete_job(db, job_id=job_id, worker_id=self.worker_id, result=result):
+                db.commit()
+                self.succeeded += 1
+                set_log(f"Job {job_id} succeeded")
+            else:
+                db.rollback()
+                self.lost_leases += 1
+                set_log(
+                    f"Job {job_id} finished after losing its lease", level="warning"
+                )
+        finally:
+            db.close()
+
+    # -------------------------
+    # Main loop
+    # -------------------------
+
+    def _start(self, job_id: UUID) -> None:
+        task = asyncio.create_task(self._run_job(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def run(self) -> None:
+        set_log(
+            f"Worker {self.worker_id} started: concurrency={self.concurrency}, "
+            f"visibility_timeout={self.visibility_timeout_s}s"
+        )
+        stopping = asyncio.create_task(self._stopping.wait())
+        try:
+            while not self._stopping.is_set():
+                free = self.concurrency - len(self._tasks)
+                if free > 0:
+                    try:
+                        job_ids = await asyncio.to_thread(self._claim_sync, free)
+                    except Exception as exc:
+                        set_log(f"Job claim failed: {exc}", level="warning")
+                        job_ids = []
+                    self.claimed += len(job_ids)
+                    for job_id in job_ids:
+                        self._start(job_id)
+
+                # a free slot, the next poll or shutdown, whichever comes first
+                await asyncio.wait(
+                    {stopping, *self._tasks},
+                    timeout=self.poll_interval_s,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+            if self._tasks:
+                set_log(
+                    f"Waiting up to {settings.job_shutdown_grace_s}s for running jobs"
+                )
+                _, pending = await asyncio.wait(
+                    set(self._tasks), timeout=settings.job_shutdown_grace_s
+                )
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            stopping.cancel()
+            set_log(f"Worker stopped: {self.stats()}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="PDF ingestion job worker")
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--worker-id", default=None)
+    args = parser.parse_args()
+
+    worker = IngestionWorker(worker_id=args.worker_id, concurrency=args.concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+
+    async with backend_clients():
+        await worker.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from app.clients.http_pool import get_http_pool
+from app.clients.load_balancer import get_vllm_replica_pool
+from app.clients.vllm_client import VllmClient
+from app.core.config import settings
+from app.enums.common import HttpBackend
+from app.utils.pdf_render import get_pdf_renderer
+from app.utils.token_budget import discover_max_model_len
+
+
+@asynccontextmanager
+async def backend_clients() -> AsyncIterator[None]:
+    """Process-wide clients for CLI entry points, as the API lifespan opens them."""
+    http_pool = get_http_pool()
+    http_pool.open()
+    replica_pool = get_vllm_replica_pool() if settings.vllm_replicas else None
+    if replica_pool is not None:
+        replica_pool.start_health_checks(http_pool.get(HttpBackend.VLLM))
+    # same endpoint as the graph nodes' VllmClient(port=""), bare base URL or replicas
+    context_discovery = asyncio.create_task(
+        discover_max_model_len(
+            http_pool.get(HttpBackend.VLLM), VllmClient(port="").replicas
+        )
+    )
+    try:
+        yield
+    finally:
+        context_discovery.cancel()
+        if replica_pool is not None:
+            await replica_pool.stop_health_checks()
+        await http_pool.aclose()
+        get_pdf_renderer().shutdown()
@@ -0,0 +1,211 @@
+"""
+Benchmark: page image encodings for VLM OCR against the PNG @ 2x baseline.
+
+For every variant it reports image bytes, base64 payload bytes and
+render+encode time per page. With --ocr each image is also sent to the
+configured vLLM server (needs the app env) and the benchmark reports the
+prompt tokens per page, plus the OCR text similarity to the baseline's OCR
+and to the page's own text layer when it has one.
+
+    python -m benchmarks.image_encoding --pdf-dir ./samples --max-pages 40
+    python -m benchmarks.image_encoding --pdf-dir ./samples --ocr
+
+Without --pdf-dir a small synthetic corpus is used (dense text, a coloured
+chart page and a scanned page).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import difflib
+import time
+from pathlib import Path
+from typing import Any
+
+import fitz  # PyMuPDF
+
+from app.utils.pdf_image import Image, encode_page_image
+
+
+BASELINE = "png@2x"
+
+VARIANTS: dict[str, dict[str, Any] | None] = {
+    BASELINE: None,
+    "png adaptive": {"format": "png", "adaptive_dpi": True},
+    "jpeg85@2x": {"format": "jpeg", "quality": 85},
+    "jpeg85 gray+crop": {"format": "jpeg", "quality": 85, "grayscale": True, "crop": True},
+    "jpeg85 gray+crop+adaptive": {
+        "format": "jpeg",
+        "quality": 85,
+        "grayscale": True,
+        "crop": True,
+        "adaptive_dpi": True,
+    },
+    "webp80 gray+crop+adaptive": {
+        "format": "webp",
+        "quality": 80,
+        "grayscale": True,
+        "crop": True,
+        "adaptive_dpi": True,
+    },
+}
+
+
+def synthetic_corpus() -> list[bytes]:
+    doc = fitz.open()
+    words = "cognitive reserve was assessed with the CRIq in older adults aged 65 ".split()
+
+    page = doc.new_page()
+    for column in range(2):
+        text = " ".join(words[i % len(words)] for i in range(600))
+        spare = page.insert_textbox(
+            fitz.Rect(50 + column * 255, 60, 290 + column * 255, 790), text, fontsize=8
+        )
+        assert spare >= 0, "synthetic text does not fit its column"
+
+    page = doc.new_page()
+    page.insert_text((72, 80), "Figure 2. Mean scores by group", fontsize=11)
+    for i, color in enumerate(((0.8, 0.1, 0.1), (0.1, 0.5, 0.8), (0.2, 0.7, 0.2))):
+        page.draw_rect(
+            fitz.Rect(120 + i * 110, 500 - i * 90, 190 + i * 110, 600), fill=color
+        )
+
+    scan_source = fitz.open()
+    scan_page = scan_source.new_page()
+    scan_page.insert_textbox(fitz.Rect(60, 60, 540, 780), " ".join(words * 60), fontsize=9)
+    page = doc.new_page()
+    page.insert_image(page.rect, pixmap=scan_page.get_pixmap(dpi=110))
+    return [doc.tobytes()]
+
+
+def load_corpus(pdf_dir: str | None) -> list[bytes]:
+    if not pdf_dir:
+        return synthetic_corpus()
+    return [path.read_bytes() for path in sorted(Path(pdf_dir).glob("*.pdf"))]
+
+
+def encode_all(corpus: list[bytes], max_pages: int) -> dict[str, list[dict[str, Any]]]:
+    results: dict[str, list[dict[str, Any]]] = {name: [] for name in VARIANTS}
+    page_total = 0
+    for pdf_bytes in corpus:
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        for page in doc:
+            if page_total >= max_pages:
+                return results
+            page_total += 1
+            text_layer = page.get_text("text")
+            for name, options in VARIANTS.items():
+                started = time.perf_counter()
+                image, mime, info = encode_page_image(page, scale=2.0, options=options)
+                elapsed = time.perf_counter() - started
+                results[name].append(
+                    {
+                        "image": image,
+                        "mime": mime,
+                        "info": info,
+                        "seconds": elapsed,
+                        "text_layer": text_layer,
+                    }
+                )
+        doc.close()
+    return results
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def similarity(a: str, b: str) -> float:
+    return difflib.SequenceMatcher(None, _normalize(a), _normalize(b), autojunk=False).ratio()
+
+
+async def run_ocr(results: dict[str, list[dict[str, Any]]]) -> None:
+    # imported here: the app settings (env) are only needed for --ocr
+    from app.clients.vllm_client import VllmClient
+    from app.enums.common import LlmOutputSchema
+    from app.enums.multimodal_extraction import VllmTaskType
+    from app.prompts.multimodal_extraction import get_vlm_ocr_system_prompt
+    from app.schemas.llm_outputs import parse_structured_output
+
+    client = VllmClient(port="", timeout_s=300.0)
+
+    async def ocr(index: int, page: dict[str, Any]) -> None:
+        resp = await client.chat(
+            system_prompt=get_vlm_ocr_system_prompt(),
+            user_prompt=f"Page {index}: Extract the content of this page.",
+            image_b64=base64.b64encode(page["image"]).decode("ascii"),
+            image_mime=page["mime"],
+            task_type=VllmTaskType.OCR,
+            output_schema=LlmOutputSchema.OCR_PAGE,
+            use_cache=False,
+        )
+        content = resp.get("choices", [{}])[0].get("message", {}).get("content", "")
+        try:
+            parsed = parse_structured_output(LlmOutputSchema.OCR_PAGE, content)
+            page["ocr_text"] = str(parsed.get("text") or "")
+        except ValueError:
+            page["ocr_text"] = ""
+        page["prompt_tokens"] = int((resp.get("usage") or {}).get("prompt_tokens") or 0)
+
+    for pages in results.values():
+        await asyncio.gather(*(ocr(i, page) for i, page in enumerate(pages, start=1)))
+
+
+def report(results: dict[str, list[dict[str, Any]]], with_ocr: bool) -> None:
+    baseline = results[BASELINE]
+    if not baseline:
+        print("no pages")
+        return
+    base_bytes = sum(len(page["image"]) for page in baseline)
+
+    header = f"{'variant':<28}{'bytes/page':>12}{'b64/page':>12}{'vs png@2x':>11}{'ms/page':>9}"
+    if with_ocr:
+        header += f"{'prompt tok':>12}{'sim base':>10}{'sim text':>10}"
+    print(header)
+    for name, pages in results.items():
+        count = len(pages)
+        total = sum(len(page["image"]) for page in pages)
+        b64 = sum(4 * ((len(page["image"]) + 2) // 3) for page in pages)
+        ms = 1000 * sum(page["seconds"] for page in pages) / count
+        line = (
+            f"{name:<28}{total / count:>12,.0f}{b64 / count:>12,.0f}"
+            f"{total / base_bytes:>10.0%} {ms:>8.1f}"
+        )
+        if with_ocr:
+            tokens = sum(page.get("prompt_tokens", 0) for page in pages) / count
+            sim_base = [
+                similarity(page.get("ocr_text", ""), ref.get("ocr_text", ""))
+                for page, ref in zip(pages, baseline)
+            ]
+            sim_text = [
+                similarity(page.get("ocr_text", ""), page["text_layer"])
+                for page in pages
+                if len(page["text_layer"].strip()) >= 200
+            ]
+            line += f"{tokens:>12,.0f}{sum(sim_base) / len(sim_base):>10.3f}"
+            line += f"{sum(sim_text) / len(sim_text):>10.3f}" if sim_text else f"{'-':>10}"
+        print(line)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pdf-dir", default=None, help="directory of sample PDFs")
+    parser.add_argument("--max-pages", type=int, default=40)
+    parser.add_argument("--ocr", action="store_true", help="also OCR every variant via vLLM")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.pdf_dir)
+    results = encode_all(corpus, args.max_pages)
+    print(
+        f"{len(results[BASELINE])} pages from {len(corpus)} PDFs, "
+        f"Pillow {'available' if Image is not None else 'missing (webp -> jpeg)'}"
+    )
+    if args.ocr:
+        await run_ocr(results)
+    report(results, args.ocr)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
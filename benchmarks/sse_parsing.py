@@ -0,0 +1,139 @@
+"""
+Micro-benchmark: vLLM stream parsing, old path vs byte-level SSE parser.
+
+old: aiter_lines() + json.loads + chained .get on choices[0].delta.content
+new: aiter_bytes() + SseDeltaParser (orjson when installed)
+
+Both run through a real httpx stream on a mock transport, so httpx's own
+decoding is part of the measurement. No vLLM server or settings needed:
+
+    python -m benchmarks.sse_parsing --tokens 20000 --streams 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+
+from app.clients.sse import DONE, JSON_DECODER, SseDeltaParser
+
+
+def build_stream(tokens: int) -> bytes:
+    words = ["the", " trial", " enrolled", " 120", " patients", ",", " aged", " 18"]
+    lines = []
+    for i in range(tokens):
+        chunk = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": 1700000000,
+            "model": "Qwen/Qwen3-VL-8B-Instruct",
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"content": words[i % len(words)]},
+                    "logprobs": None,
+                    "finish_reason": None,
+                }
+            ],
+        }
+        lines.append(f"data: {json.dumps(chunk)}\n\n")
+    lines.append("data: [DONE]\n\n")
+    return "".join(lines).encode("utf-8")
+
+
+def frames(body: bytes, seed: int) -> list[bytes]:
+    """Split the body at random points, like network reads would."""
+    rng = random.Random(seed)
+    out, pos = [], 0
+    while pos < len(body):
+        size = rng.randint(200, 4096)
+        out.append(body[pos : pos + size])
+        pos += size
+    return out
+
+
+class _FrameStream(httpx.AsyncByteStream):
+    def __init__(self, parts: list[bytes]):
+        self.parts = parts
+
+    async def __aiter__(self):
+        for part in self.parts:
+            yield part
+
+
+def make_client(parts: list[bytes]) -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, stream=_FrameStream(parts))
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def old_path(client: httpx.AsyncClient) -> int:
+    count = 0
+    async with client.stream("POST", "http://bench/v1/chat/completions") as response:
+        async for line in response.aiter_lines():
+            if not line or not line.startswith("data:"):
+                continue
+            data = line.removeprefix("data:").strip()
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            try:
+                delta = chunk.get("choices", [{}])[0].get("delta", {}).get("content")
+            except Exception:
+                delta = None
+            if delta:
+                count += 1
+    return count
+
+
+async def new_path(client: httpx.AsyncClient) -> int:
+    count = 0
+    parser = SseDeltaParser()
+    async with client.stream("POST", "http://bench/v1/chat/completions") as response:
+        async for data in response.aiter_bytes():
+            for event in parser.feed(data):
+                if event is DONE:
+                    return count
+                if event[1]:
+                    count += 1
+    return count
+
+
+async def run(path, parts: list[bytes], streams: int) -> tuple[int, float]:
+    client = make_client(parts)
+    started = time.perf_counter()
+    counts = await asyncio.gather(*(path(client) for _ in range(streams)))
+    elapsed = time.perf_counter() - started
+    await client.aclose()
+    return sum(counts), elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens", type=int, default=20000)
+    parser.add_argument("--streams", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    parts = frames(build_stream(args.tokens), seed=0)
+    print(
+        f"{args.streams} concurrent streams x {args.tokens} tokens, "
+        f"json decoder for new path: {JSON_DECODER}"
+    )
+    for name, path in (("old", old_path), ("new", new_path)):
+        best = None
+        for _ in range(args.repeat):
+            tokens, elapsed = await run(path, parts, args.streams)
+            rate = tokens / elapsed
+            best = rate if best is None else max(best, rate)
+        print(f"{name}: {best:,.0f} tokens/s (best of {args.repeat})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())